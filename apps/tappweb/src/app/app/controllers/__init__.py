@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 
+from app.app.controllers.debug import router as debug_router
 from app.app.controllers.user import router as user_router
 
 
 router = APIRouter()
 
 router.include_router(user_router, prefix="/user", tags=["USER"])
+router.include_router(debug_router, prefix="/debug", tags=["DEBUG"])
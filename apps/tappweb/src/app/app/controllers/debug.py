@@ -0,0 +1,128 @@
+import os
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import PlainTextResponse
+
+from app.app.schemas import MemoryStatResponse, TaskResponse
+from config import settings
+from core.auth import admin_token
+from core.profiling import memory_tracer, stack_sampler, task_inspector
+from core.types import MemoryStatKey
+from core.utils.schema import SuccessResponse
+
+
+def worker_pid(response: Response) -> None:
+    """
+    Tell which worker answered, the state inspected by the debug routes is per worker process.
+
+    :param response: FastAPI Response.
+    """
+    response.headers["X-Worker-Pid"] = str(os.getpid())
+    return None
+
+
+router = APIRouter(dependencies=[Depends(admin_token), Depends(worker_pid)])
+
+
+@router.get(
+    "/profile",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+    description="Sample the stacks of this worker and return them collapsed, for flamegraph.pl or speedscope",
+    name="Profile worker",
+)
+async def profile(
+    duration: float = Query(10.0, gt=0, le=settings.PROFILE_MAX_DURATION),
+    interval: float = Query(0.01, ge=0.001, le=1.0),
+):
+    """
+    Sample the stacks of the worker threads.
+
+    :param duration: Seconds to sample.
+    :param interval: Seconds between samples.
+    :return: Collapsed stacks, one per line with its number of samples.
+    """
+    return await stack_sampler.profile(duration, interval)
+
+
+@router.get(
+    "/tasks",
+    response_model=List[TaskResponse],
+    status_code=status.HTTP_200_OK,
+    description="List the pending asyncio tasks of this worker, oldest first",
+    name="Dump tasks",
+)
+async def dump_tasks(frames: int = Query(10, ge=1, le=100)):
+    """
+    List the pending asyncio tasks of the worker, oldest first.
+
+    :param frames: Maximum stack frames per task.
+    :return: Pending tasks.
+    """
+    return task_inspector.dump(frames)
+
+
+@router.post(
+    "/tasks/stop",
+    response_model=SuccessResponse,
+    status_code=status.HTTP_200_OK,
+    description="Stop recording the creation time of the tasks of this worker",
+    name="Stop task tracking",
+)
+async def stop_task_tracking():
+    task_inspector.stop()
+    return SuccessResponse()
+
+
+@router.post(
+    "/memory/start",
+    response_model=SuccessResponse,
+    status_code=status.HTTP_200_OK,
+    description="Start tracing the memory allocations of this worker",
+    name="Start memory tracing",
+)
+async def start_memory_tracing(frames: int = Query(settings.TRACEMALLOC_FRAMES, ge=1, le=100)):
+    """
+    Start tracing the memory allocations of the worker and take the baseline snapshot.
+
+    :param frames: Stack frames stored per allocation.
+    :return: Success response.
+    """
+    await memory_tracer.start(frames)
+    return SuccessResponse()
+
+
+@router.get(
+    "/memory/diff",
+    response_model=List[MemoryStatResponse],
+    status_code=status.HTTP_200_OK,
+    description="Compare the memory allocations of this worker with the previous snapshot",
+    name="Diff memory snapshots",
+)
+async def diff_memory(key: MemoryStatKey = MemoryStatKey.LINENO, limit: int = Query(25, ge=1, le=500)):
+    """
+    Compare the traced allocations with the baseline snapshot.
+
+    :param key: Grouping of the allocations.
+    :param limit: Number of groups returned, largest growth first.
+    :return: Allocation statistics.
+    """
+    return await memory_tracer.diff(key, limit)
+
+
+@router.post(
+    "/memory/stop",
+    response_model=SuccessResponse,
+    status_code=status.HTTP_200_OK,
+    description="Stop tracing the memory allocations of this worker",
+    name="Stop memory tracing",
+)
+async def stop_memory_tracing():
+    """
+    Stop tracing the memory allocations of the worker.
+
+    :return: Success response.
+    """
+    memory_tracer.stop()
+    return SuccessResponse()
@@ -1,14 +1,184 @@
-from fastapi import APIRouter, Depends, status
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
 
-from app.app.schemas import UserCreateRequest
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi_pagination import Page, Params
+
+import constants
+from app.app.exceptions import InvalidDateRangeException
+from app.app.schemas import BulkIngestResponse, DailyCountResponse, UserCountResponse, UserCreateRequest, UserResponse
 from app.app.services.service import Service
+from config import settings
+from core.auth import rate_limited
+from core.cache import CachedRoute, cache_response
+from core.idempotency import IdempotentRoute, idempotent
+from core.types import CountStrategy, SearchMode
+from core.utils import ConditionalRequest, CursorPage
+from core.utils.ingest import CSV_MEDIA_TYPES, NDJSON_MEDIA_TYPES, stream_rows
+
 
+class UserRoute(IdempotentRoute, CachedRoute):
+    """
+    Route class of the user endpoints, with idempotent writes and cached reads.
+    """
 
-router = APIRouter()
+
+router = APIRouter(route_class=UserRoute, dependencies=[Depends(rate_limited)])
 
 
 @router.post(
     "/", response_model=UserCreateRequest, status_code=status.HTTP_200_OK, description="Create user", name="Create user"
 )
+@idempotent()
 async def create_user(request: UserCreateRequest, service: Service = Depends(Service)):
     return await service.create_user(**request.dict())
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkIngestResponse,
+    status_code=status.HTTP_200_OK,
+    description="Create users from a NDJSON or CSV stream, invalid rows are reported without aborting the upload",
+    name="Bulk create users",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                media_type: {"schema": {"type": "string", "format": "binary"}}
+                for media_type in (*NDJSON_MEDIA_TYPES, *CSV_MEDIA_TYPES)
+            },
+        }
+    },
+)
+async def bulk_create_users(request: Request, service: Service = Depends(Service)):
+    """
+    Create users from a streamed NDJSON or CSV body.
+
+    :param request: FastAPI Request.
+    :param service: User service.
+    :return: Ingestion report.
+    """
+    return await service.bulk_create_users(stream_rows(request, settings.BULK_INGEST_MAX_LINE_BYTES))
+
+
+@router.get(
+    "/", response_model=Page[UserResponse], status_code=status.HTTP_200_OK, description="List users", name="List users"
+)
+@cache_response(ttl=30, stale_ttl=30, namespace="users")
+async def list_users(
+    response: Response,
+    params: Params = Depends(),
+    conditional: ConditionalRequest = Depends(ConditionalRequest),
+    service: Service = Depends(Service),
+):
+    """
+    List users, answering conditional requests from the listing validators.
+
+    :param response: FastAPI Response.
+    :param params: Pagination parameters.
+    :param conditional: Conditional request of the client.
+    :param service: User service.
+    :return: A page of users, or an empty ``304`` response.
+    """
+    last_modified, total = await service.get_users_validators()
+    conditional.set_validators(last_modified, total, params.page, params.size)
+    if conditional.not_modified:
+        return conditional.not_modified_response()
+    response.headers.update(conditional.headers())
+    return await service.list_users(params, count_strategy=CountStrategy.CACHED)
+
+
+@router.get(
+    "/search",
+    response_model=CursorPage[UserResponse],
+    status_code=status.HTTP_200_OK,
+    description="Search users by name",
+    name="Search users",
+)
+@cache_response(ttl=30, namespace="users")
+async def search_users(
+    q: str = Query(min_length=1, max_length=100),
+    mode: SearchMode = SearchMode.SUBSTRING,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    service: Service = Depends(Service),
+):
+    """
+    Search users by name.
+
+    :param q: Searched text.
+    :param mode: Search mode.
+    :param limit: Page size.
+    :param cursor: Cursor of the previous page.
+    :param service: User service.
+    :return: A page of users.
+    """
+    return await service.search_users(q, mode, limit, cursor)
+
+
+@router.get(
+    "/stats",
+    response_model=UserCountResponse,
+    status_code=status.HTTP_200_OK,
+    description="Count users",
+    name="Count users",
+)
+@cache_response(ttl=5, namespace="users")
+async def count_users(service: Service = Depends(Service)):
+    """
+    Count the users.
+
+    :param service: User service.
+    :return: Total of users.
+    """
+    return await service.count_users()
+
+
+@router.get(
+    "/stats/daily",
+    response_model=List[DailyCountResponse],
+    status_code=status.HTTP_200_OK,
+    description="Count users created per day, for at most a year",
+    name="Count users per day",
+)
+@cache_response(ttl=5, namespace="users")
+async def count_users_per_day(start: date, end: date, service: Service = Depends(Service)):
+    """
+    Count the users created per day.
+
+    :param start: First day.
+    :param end: Last day.
+    :param service: User service.
+    :return: Days and their number of created users.
+    :raises InvalidDateRangeException: If the range is reversed or longer than a year.
+    """
+    if not 0 <= (end - start).days <= 366:
+        raise InvalidDateRangeException(constants.INVALID_DATE_RANGE)
+    return await service.count_users_per_day(start, end)
+
+
+@router.get(
+    "/{user_id}", response_model=UserResponse, status_code=status.HTTP_200_OK, description="Get user", name="Get user"
+)
+@cache_response(ttl=30, stale_ttl=30, namespace="users")
+async def get_user(
+    user_id: UUID,
+    response: Response,
+    conditional: ConditionalRequest = Depends(ConditionalRequest),
+    service: Service = Depends(Service),
+):
+    """
+    Get a user, answering conditional requests from its validators.
+
+    :param user_id: Id of the user.
+    :param response: FastAPI Response.
+    :param conditional: Conditional request of the client.
+    :param service: User service.
+    :return: The user, or an empty ``304`` response.
+    """
+    conditional.set_validators(await service.get_user_validators(user_id), user_id)
+    if conditional.not_modified:
+        return conditional.not_modified_response()
+    response.headers.update(conditional.headers())
+    return await service.get_user(user_id)
@@ -12,3 +12,15 @@ class RequestFailedException(BadRequestError):
 class UserNotFound(BadRequestError):
     def __init__(self, message: Optional[str] = constants.SOMETHING_WENT_WRONG) -> None:
         super().__init__(message)
+
+
+class InvalidDateRangeException(BadRequestError):
+    """
+    Raised for a reversed or too long date range.
+    """
+
+    def __init__(self, message: Optional[str] = constants.INVALID_DATE_RANGE) -> None:
+        """
+        :param message: Error message.
+        """
+        super().__init__(message)
@@ -1,4 +1,7 @@
-from core.db import async_session
+from core.aggregates import aggregated_models, reconcile_counters
+from core.db import job_session
+from core.idempotency import idempotency_store
+from core.partitioning import maintain_partitions
 from core.utils import logger
 
 
@@ -8,8 +11,45 @@ async def job() -> None:
     :return: Subscription state.
     """
     logger.info("Running cron job!")
-    async with async_session() as session:
+    async with job_session() as session:
         async with session.begin():
             await session.execute()
     logger.info("Finished cron job!")
     return None
+
+
+async def partition_maintenance_job() -> None:
+    """
+    Create upcoming partitions and apply the retention policy of the partitioned tables.
+    """
+    logger.info("Running partition maintenance!")
+    async with job_session() as session:
+        async with session.begin():
+            connection = await session.connection()
+            await connection.run_sync(maintain_partitions)
+    logger.info("Finished partition maintenance!")
+    return None
+
+
+async def idempotency_purge_job() -> None:
+    """
+    Delete the expired idempotency keys.
+    """
+    logger.info("Running idempotency key purge!")
+    purged = await idempotency_store.purge()
+    logger.info("Finished idempotency key purge, %d keys deleted!", purged)
+    return None
+
+
+async def aggregate_reconciliation_job() -> None:
+    """
+    Correct the drift of the aggregate counters against the aggregated tables.
+    """
+    logger.info("Running aggregate reconciliation!")
+    for model in aggregated_models():
+        async with job_session() as session:
+            async with session.begin():
+                corrected = await reconcile_counters(session, model)
+        logger.info("Reconciled the aggregates of %s, %d dimensions corrected!", model.__tablename__, corrected)
+    logger.info("Finished aggregate reconciliation!")
+    return None
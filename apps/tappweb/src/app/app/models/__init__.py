@@ -1,5 +1,9 @@
+from app.app.models.aggregate import AggregateCounter
+from app.app.models.idempotency import IdempotencyKey
+from app.app.models.rate_limit import RateLimitBucket
+from app.app.models.user import UserModel
 from app.app.models.webhook import WebhookUrl
 from core.db import Base
 
 
-__all__ = ["WebhookUrl", "Base"]
+__all__ = ["AggregateCounter", "IdempotencyKey", "RateLimitBucket", "UserModel", "WebhookUrl", "Base"]
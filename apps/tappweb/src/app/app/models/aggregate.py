@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.db import Base
+
+
+class AggregateCounter(Base):
+    """
+    A sharded counter model class, the value of an aggregate dimension is the sum of its shards so that concurrent
+    writes rarely update the same row.
+    """
+
+    __tablename__ = "aggregate_counters"
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    dimension: Mapped[str] = mapped_column(primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger)
@@ -0,0 +1,23 @@
+from typing import List, Optional
+
+from sqlalchemy import JSON, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.db import Base
+
+
+class IdempotencyKey(Base):
+    """
+    An idempotency key model class storing the response of the first request made with a key, shared by all the
+    workers. A row without a status code is an execution in flight.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[bytes] = mapped_column(primary_key=True)
+    request_hash: Mapped[bytes] = mapped_column()
+    status_code: Mapped[Optional[int]] = mapped_column(SmallInteger)
+    headers: Mapped[Optional[List[List[str]]]] = mapped_column(JSON)
+    body: Mapped[Optional[bytes]] = mapped_column()
+    locked_until: Mapped[float] = mapped_column()
+    expires_at: Mapped[float] = mapped_column(index=True)
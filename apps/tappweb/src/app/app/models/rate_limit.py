@@ -0,0 +1,16 @@
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.db import Base
+
+
+class RateLimitBucket(Base):
+    """
+    A token bucket model class shared by all the workers when the database rate limit backend is used.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    tokens: Mapped[float] = mapped_column()
+    updated_at: Mapped[float] = mapped_column()
+    allowed: Mapped[bool] = mapped_column()
@@ -1,19 +1,23 @@
 from typing import Self
-from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from core.db import Base
-from core.utils.mixins import TimeStampMixin
+from core.utils.mixins import Aggregate, AggregatedMixin, SearchableMixin, TimeStampMixin, UUIDPrimaryKeyMixin, uuid7
 
 
-class UserModel(Base, TimeStampMixin):
+class UserModel(Base, UUIDPrimaryKeyMixin, TimeStampMixin, SearchableMixin, AggregatedMixin):
 
     __tablename__ = "users"
+    __searchable__ = ("name",)
+    __aggregates__ = (Aggregate("users"), Aggregate("users_per_day", "created_at", "day"))
 
-    id: Mapped[UUID] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column()
 
     @classmethod
     def create(cls, name: str) -> Self:
-        return cls(id=uuid4(), name=name)
+        return cls(id=uuid7(), name=name)
+
+
+Index("ix_users_updated_at", UserModel.updated_at)
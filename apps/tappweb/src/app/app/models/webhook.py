@@ -1,18 +1,16 @@
-from uuid import UUID, uuid4
-
 from sqlalchemy.orm import Mapped, mapped_column
 
 from core.db import Base
+from core.utils.mixins import UUIDPrimaryKeyMixin, uuid7
 
 
-class WebhookUrl(Base):
+class WebhookUrl(Base, UUIDPrimaryKeyMixin):
     """
     A Webhook-url model class defining Columns and table name of the stored webhook-url values.
     """
 
     __tablename__ = "webhook_url"
 
-    id: Mapped[UUID] = mapped_column(primary_key=True)
     url: Mapped[str] = mapped_column()
 
     @classmethod
@@ -24,4 +22,4 @@ class WebhookUrl(Base):
 
         :return: Created webhook url model instance.
         """
-        return cls(id=uuid4(), url=url)
+        return cls(id=uuid7(), url=url)
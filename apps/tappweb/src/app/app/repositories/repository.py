@@ -1,15 +1,43 @@
-from typing import Dict, List, Optional, Type, TypeVar, Union
+import base64
+import binascii
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union
 from uuid import UUID
 
 from fastapi import Depends
-from fastapi_pagination import Params
-from fastapi_pagination.ext.sqlalchemy import paginate
-from sqlalchemy import Column, ColumnElement, and_, or_, select
+from fastapi_pagination import Page, Params
+from fastapi_pagination.api import create_page
+from sqlalchemy import (
+    REAL,
+    Column,
+    ColumnElement,
+    Select,
+    Table,
+    and_,
+    cast,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy import inspect as inspect_instance
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.interfaces import ORMOption
 
+from app.app.models.aggregate import AggregateCounter
+from config import settings
+from core.aggregates import update_counters
 from core.db import Base, db_session
-from core.exceptions import InvalidSQLQueryException
+from core.exceptions import InvalidCursorException, InvalidSQLQueryException
+from core.index_advisor import record_query_shapes
+from core.tracing import tracer
+from core.types import CountStrategy, SearchMode
+from core.utils.schema import UncountedPage
 
 
 Model = TypeVar("Model", bound=Type[Base])
@@ -19,6 +47,9 @@ ModelColumnValue = TypeVar("ModelColumnValue", bound=Union[UUID, str, int, bool]
 ModelObject = TypeVar("ModelObject", bound=Base)
 ModelObjectList = TypeVar("ModelObjectList", bound=List[Base])
 
+_COUNT_CACHE_MAX_ENTRIES = 10_000
+_count_cache: Dict[str, Tuple[float, int]] = {}
+
 
 class Repository:
     def __init__(self, session: AsyncSession = Depends(db_session)) -> None:
@@ -31,19 +62,63 @@ class Repository:
         """
         self.session = session
 
-    def save(self, model: Union[ModelObject, ModelObjectList]) -> Union[ModelObject, ModelObjectList]:
+    async def save(self, model: Union[ModelObject, ModelObjectList]) -> Union[ModelObject, ModelObjectList]:
         """
         Save the data to the database.
+        New instances of models with aggregates are flushed and counted in the same transaction.
 
         :param model: A SQLAlchemy model instance.
         :return: A SQLAlchemy model instance.
         """
-        if isinstance(model, list):
-            self.session.add_all(model)
-        else:
-            self.session.add(model)
+        instances = model if isinstance(model, list) else [model]
+        new = [
+            instance
+            for instance in instances
+            if getattr(instance, "__aggregates__", ()) and not inspect_instance(instance).has_identity
+        ]
+        self.session.add_all(instances)
+        if new:
+            await self.session.flush(new)
+            await self._update_counters(new, 1)
         return model
 
+    async def _update_counters(self, instances: ModelObjectList, sign: int) -> None:
+        """
+        Count instances in the aggregates of their model.
+
+        :param instances: Model instances.
+        :param sign: 1 for inserted instances, -1 for deleted ones.
+        """
+        by_model: Dict[type, List[Base]] = {}
+        for instance in instances:
+            by_model.setdefault(type(instance), []).append(instance)
+        for model, group in by_model.items():
+            await update_counters(self.session, model, group, sign)
+        return None
+
+    @tracer.traced("Repository.insert_many")
+    async def insert_many(self, model: Model, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert rows with batched multi-row statements, without loading them as model instances like :meth:`save`.
+        The aggregate columns of the rows are returned by the insert to count them in the aggregates of the model.
+
+        :param model: Model type.
+        :param rows: Column values of the rows.
+        """
+        if not rows:
+            return None
+        aggregates = getattr(model, "__aggregates__", ())
+        columns = sorted({aggregate.column for aggregate in aggregates if aggregate.column})
+        statement = insert(model.__table__)
+        if columns:
+            statement = statement.returning(*[model.__table__.c[name] for name in columns])
+        result = await self.session.execute(statement, rows)
+        if aggregates:
+            await update_counters(self.session, model, result.all() if columns else rows)
+        return None
+
+    @tracer.traced("Repository.get")
+    @record_query_shapes
     async def get(
         self,
         model: Model,
@@ -59,6 +134,7 @@ class Repository:
         stream_result: Optional[bool] = False,
         page: Optional[bool] = False,
         page_params: Optional[Params] = None,
+        count_strategy: Optional[CountStrategy] = None,
     ) -> Union[ModelObject, ModelObjectList]:
         """
         Query data from the database.
@@ -84,6 +160,7 @@ class Repository:
         :param stream_result: Flag to set the return value to a stream result.
         :param page: Flag to set the return value to a paginated result.
         :param page_params: Pagination parameters.
+        :param count_strategy: Strategy counting the total of a paginated result, defaults to the configured one.
 
         :return: A SQLAlchemy model instance.
         :raises InvalidSQLQueryParams: If the query parameters are of invalid combination.
@@ -104,7 +181,7 @@ class Repository:
             if isinstance(p_key, list):
                 query = query.where(model.id.in_(p_key))
                 if page:
-                    return await paginate(self.session, query, page_params)
+                    return await self.paginate(query, page_params, count_strategy)
                 else:
                     query = await self.session.stream_scalars(query)
                     return await query.all() if not stream_result else query  # type: ignore
@@ -126,7 +203,7 @@ class Repository:
                 query = query.where(with_field.in_(with_field_value))
 
                 if page:
-                    return await paginate(self.session, query, page_params)
+                    return await self.paginate(query, page_params, count_strategy)
 
                 query = await self.session.stream_scalars(query)
                 return await query.all() if not stream_result else query  # type: ignore
@@ -135,7 +212,7 @@ class Repository:
                 query = query.where(with_field == with_field_value)
 
                 if return_all and page:
-                    return await paginate(self.session, query, page_params)
+                    return await self.paginate(query, page_params, count_strategy)
                 query = await self.session.stream_scalars(query)
                 if return_all and not page:
                     return await query.all() if not stream_result else query  # type: ignore
@@ -157,7 +234,7 @@ class Repository:
                 )
 
             if return_all and page:
-                return await paginate(self.session, query, page_params)
+                return await self.paginate(query, page_params, count_strategy)
             query = await self.session.stream_scalars(query)
             if return_all and not page:
                 return await query.all() if not stream_result else query  # type: ignore
@@ -179,7 +256,7 @@ class Repository:
                 )
 
             if return_all and page:
-                return await paginate(self.session, query, page_params)
+                return await self.paginate(query, page_params, count_strategy)
             elif return_all and not page:
                 query = await self.session.stream_scalars(query)
                 return await query.all() if not stream_result else query  # type: ignore
@@ -207,7 +284,7 @@ class Repository:
                 )
 
             if return_all and page:
-                return await paginate(self.session, query, page_params)
+                return await self.paginate(query, page_params, count_strategy)
             elif return_all and not page:
                 query = await self.session.stream_scalars(query)
                 return await query.all() if not stream_result else query  # type: ignore
@@ -216,23 +293,244 @@ class Repository:
 
         else:
             if return_all and page:
-                return await paginate(self.session, query, page_params)
+                return await self.paginate(query, page_params, count_strategy)
             elif return_all and not page:
                 query = await self.session.stream_scalars(query)
                 return await query.all() if not stream_result else query  # type: ignore
             else:
                 return await query.first() if not stream_result else query
 
+    async def paginate(
+        self, query: Select, params: Params, count_strategy: Optional[CountStrategy] = None
+    ) -> Page[ModelObject]:
+        """
+        Paginate a query.
+
+        With :attr:`CountStrategy.NONE` the page is fetched with one extra row to detect a next page, and returned as
+        an :class:`UncountedPage`: the total is only known, and returned, on the last page.
+
+        :param query: Query to paginate.
+        :param params: Pagination parameters.
+        :param count_strategy: Strategy counting the total, defaults to the configured one.
+
+        :return: A page of model instances.
+        """
+        count_strategy = CountStrategy(count_strategy or settings.PAGINATION_COUNT_STRATEGY)
+        raw_params = params.to_raw_params()
+
+        if count_strategy is CountStrategy.NONE:
+            items = (await self.session.scalars(query.limit(raw_params.limit + 1).offset(raw_params.offset))).all()
+            has_next = len(items) > raw_params.limit
+            items = items[: raw_params.limit]
+            total = None if has_next or (raw_params.offset and not items) else raw_params.offset + len(items)
+            return UncountedPage.create(items, params, total=total)
+        else:
+            total = await self.count(query, count_strategy)
+            items = (await self.session.scalars(query.limit(raw_params.limit).offset(raw_params.offset))).all()
+        return create_page(items, total, params)
+
+    async def count(self, query: Select, count_strategy: CountStrategy = CountStrategy.EXACT) -> int:
+        """
+        Count the rows of a query.
+
+        :param query: Query to count.
+        :param count_strategy: :attr:`CountStrategy.EXACT` runs ``COUNT(*)``, :attr:`CountStrategy.CACHED` memoizes
+            it per query shape and parameters for ``PAGINATION_COUNT_CACHE_TTL`` seconds and
+            :attr:`CountStrategy.ESTIMATED` reads the planner statistics.
+
+        :return: Number of rows.
+        """
+        query = query.order_by(None)
+        if count_strategy is CountStrategy.ESTIMATED:
+            estimate = await self._estimate(query)
+            if estimate is not None:
+                return estimate
+
+        if count_strategy is CountStrategy.CACHED:
+            compiled = query.compile(dialect=self.session.bind.dialect, compile_kwargs={"render_postcompile": True})
+            key = f"{compiled}:{sorted(compiled.params.items())!r}"
+            cached = _count_cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+
+        total = await self.session.scalar(select(func.count()).select_from(query.subquery()))
+        if count_strategy is CountStrategy.CACHED:
+            if len(_count_cache) >= _COUNT_CACHE_MAX_ENTRIES:
+                _count_cache.clear()
+            _count_cache[key] = (time.monotonic() + settings.PAGINATION_COUNT_CACHE_TTL, total)
+        return total
+
+    async def _estimate(self, query: Select) -> Optional[int]:
+        """
+        Estimate the rows of a query from ``pg_class.reltuples`` for a whole table, else from the planner row estimate.
+
+        :param query: Query to estimate.
+
+        :return: Estimated number of rows, None if the table was never analyzed.
+        """
+        froms = query.get_final_froms()
+        if query.whereclause is None and len(froms) == 1 and isinstance(froms[0], Table):
+            estimate = await self.session.scalar(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": froms[0].fullname},
+            )
+            return estimate if estimate is not None and estimate >= 0 else None
+
+        connection = await self.session.connection()
+        compiled = query.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", tuple(compiled.params[name] for name in compiled.positiontup or ())
+        )
+        plan = result.scalar()
+        return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]["Plan Rows"]
+
+    @tracer.traced("Repository.search")
+    async def search(
+        self,
+        model: Model,
+        term: str,
+        *where: ColumnElement,
+        mode: SearchMode = SearchMode.SUBSTRING,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Tuple[ModelObjectList, Optional[str]]:
+        """
+        Search the ``__searchable__`` columns of a :class:`SearchableMixin` model, most relevant results first.
+
+        :attr:`SearchMode.SUBSTRING` and :attr:`SearchMode.PREFIX` match case insensitively and rank by trigram
+        similarity, :attr:`SearchMode.FULLTEXT` matches web search syntax and ranks with ``ts_rank``. Results are
+        paginated with a keyset cursor on (relevance, primary key): pages stay stable as rows are written, and no
+        OFFSET is scanned. The relevance is not indexed though, every page ranks all the matching rows.
+
+        :param model: Searchable model type.
+        :param term: Searched text.
+        :param where: Additional filters of the searched rows.
+        :param mode: Search mode.
+        :param limit: Maximum number of results.
+        :param cursor: Cursor of the previous page.
+
+        :return: A page of model instances and the cursor of the next page, None on the last page.
+        :raises InvalidCursorException: If the cursor is malformed.
+        """
+        columns = [getattr(model, name) for name in model.__searchable__]
+        if mode is SearchMode.FULLTEXT:
+            vector = model.search_vector()
+            query = func.websearch_to_tsquery(model.search_config(), term)
+            condition, rank = vector.op("@@")(query), func.ts_rank(vector, query)
+        else:
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"{escaped}%" if mode is SearchMode.PREFIX else f"%{escaped}%"
+            condition = or_(*[column.ilike(pattern, escape="\\") for column in columns])
+            similarities = [func.similarity(column, term) for column in columns]
+            rank = similarities[0] if len(similarities) == 1 else func.greatest(*similarities)
+        rank = cast(rank, REAL)
+
+        statement = select(model, rank).where(condition, *where)
+        if cursor:
+            last_rank, last_id = _decode_cursor(cursor)
+            statement = statement.where(
+                tuple_(rank, model.id) < tuple_(cast(literal(last_rank), REAL), literal(last_id))
+            )
+        statement = statement.order_by(rank.desc(), model.id.desc()).limit(limit + 1)
+
+        rows = (await self.session.execute(statement)).all()
+        next_cursor = _encode_cursor(*rows[limit - 1]) if len(rows) > limit else None
+        return [row[0] for row in rows[:limit]], next_cursor
+
+    async def get_last_modified(self, model: Model, *where: ColumnElement) -> Optional[datetime]:
+        """
+        Query the latest update of the rows of a model, an index scan with the ``updated_at`` index.
+
+        :param model: Model type, it must have an ``updated_at`` column.
+        :param where: Filters of the queried rows.
+
+        :return: Latest ``updated_at`` of the matching rows.
+        """
+        query = select(func.max(model.updated_at))
+        if where:
+            query = query.where(*where)
+        return await self.session.scalar(query)
+
+    async def get_validators(self, model: Model, *where: ColumnElement) -> Tuple[Optional[datetime], int]:
+        """
+        Query the conditional request validators of a model, without loading any row.
+
+        :param model: Model type, it must have an ``updated_at`` column.
+        :param where: Filters of the queried rows.
+
+        :return: Latest ``updated_at`` and number of the matching rows.
+        """
+        query = select(func.max(model.updated_at), func.count()).select_from(model)
+        if where:
+            query = query.where(*where)
+        last_modified, count = (await self.session.execute(query)).one()
+        return last_modified, count
+
     async def delete(self, model: Union[ModelObject, ModelObjectList]) -> None:
         """
         Get data from the database.
+        Persisted instances of models with aggregates are uncounted in the same transaction.
 
         :param model: A SQLAlchemy model instance.
         :return: A SQLAlchemy model instance.
         """
-        if isinstance(model, list):
-            for _ in model:
-                await self.session.delete(_)
-        else:
-            await self.session.delete(model)
+        instances = model if isinstance(model, list) else [model]
+        counted = [
+            instance
+            for instance in instances
+            if getattr(instance, "__aggregates__", ()) and inspect_instance(instance).persistent
+        ]
+        for instance in instances:
+            await self.session.delete(instance)
+        if counted:
+            await self._update_counters(counted, -1)
         return None
+
+    async def get_aggregate(self, name: str, dimension: str = "") -> int:
+        """
+        Read an aggregate dimension from its counter shards, without scanning the aggregated model.
+
+        :param name: Aggregate name.
+        :param dimension: Aggregate dimension, the empty dimension for totals.
+        :return: Aggregate value.
+        """
+        query = select(func.coalesce(func.sum(AggregateCounter.value), 0)).where(
+            AggregateCounter.name == name, AggregateCounter.dimension == dimension
+        )
+        return int(await self.session.scalar(query))
+
+    async def get_aggregate_series(self, name: str, start: str, end: str) -> List[Tuple[str, int]]:
+        """
+        Read a range of aggregate dimensions from their counter shards, dimensions without rows are omitted.
+
+        :param name: Aggregate name.
+        :param start: First dimension of the range.
+        :param end: Last dimension of the range.
+        :return: Dimensions and their values, in order.
+        """
+        query = (
+            select(AggregateCounter.dimension, func.sum(AggregateCounter.value))
+            .where(AggregateCounter.name == name, AggregateCounter.dimension.between(start, end))
+            .group_by(AggregateCounter.dimension)
+            .having(func.sum(AggregateCounter.value) != 0)
+            .order_by(AggregateCounter.dimension)
+        )
+        return [(dimension, int(value)) for dimension, value in (await self.session.execute(query)).all()]
+
+
+def _encode_cursor(instance: ModelObject, rank: float) -> str:
+    """
+    Encode the keyset position of a search result.
+    """
+    return base64.urlsafe_b64encode(json.dumps([rank, str(instance.id)]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, UUID]:
+    """
+    Decode the keyset position of a search cursor.
+    """
+    try:
+        rank, id_ = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), UUID(id_)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursorException()
@@ -1,4 +1,22 @@
 from app.app.schemas.request import UserCreateRequest
+from app.app.schemas.response import (
+    BulkIngestError,
+    BulkIngestResponse,
+    DailyCountResponse,
+    MemoryStatResponse,
+    TaskResponse,
+    UserCountResponse,
+    UserResponse,
+)
 
 
-__all__ = ["UserCreateRequest"]
+__all__ = [
+    "BulkIngestError",
+    "BulkIngestResponse",
+    "DailyCountResponse",
+    "MemoryStatResponse",
+    "TaskResponse",
+    "UserCountResponse",
+    "UserCreateRequest",
+    "UserResponse",
+]
@@ -1,3 +1,5 @@
+from datetime import date
+from typing import List
 from uuid import UUID
 
 from core.utils import CamelCaseModel
@@ -9,3 +11,79 @@ class UserCreateRequest(CamelCaseModel):
 
     class Config:
         orm_mode = True
+
+
+class UserResponse(CamelCaseModel):
+    """
+    A schemas model for a user.
+    """
+
+    id: UUID
+    name: str
+
+    class Config:
+        """
+        Read the fields from model attributes.
+        """
+
+        orm_mode = True
+
+
+class BulkIngestError(CamelCaseModel):
+    """
+    A schemas model for a rejected row of a bulk ingestion.
+    """
+
+    row: int
+    error: str
+
+
+class BulkIngestResponse(CamelCaseModel):
+    """
+    A schemas model for the report of a bulk ingestion, at most ``BULK_INGEST_MAX_ERRORS`` errors are listed.
+    """
+
+    inserted: int
+    failed: int
+    errors: List[BulkIngestError]
+    errors_truncated: bool
+
+
+class TaskResponse(CamelCaseModel):
+    """
+    A schemas model for a pending asyncio task.
+    """
+
+    name: str
+    coroutine: str
+    age: float
+    stack: List[str]
+
+
+class MemoryStatResponse(CamelCaseModel):
+    """
+    A schemas model for the allocations of a location since the baseline snapshot.
+    """
+
+    location: List[str]
+    size: int
+    size_diff: int
+    count: int
+    count_diff: int
+
+
+class UserCountResponse(CamelCaseModel):
+    """
+    A schemas model for the total of users.
+    """
+
+    total: int
+
+
+class DailyCountResponse(CamelCaseModel):
+    """
+    A schemas model for the number of users created on a day.
+    """
+
+    day: date
+    count: int
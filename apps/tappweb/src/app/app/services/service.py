@@ -1,9 +1,25 @@
-from typing import Any, Dict
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
 
 from fastapi import Depends
+from fastapi_pagination import Page, Params
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 
+import constants
+from app.app.exceptions import UserNotFound
 from app.app.models.user import UserModel
 from app.app.repositories.repository import Repository
+from app.app.schemas import UserCreateRequest
+from config import settings
+from core.cache import response_cache
+from core.db import async_session
+from core.types import CountStrategy, SearchMode
+from core.utils import logger
+from core.utils.ingest import Row
+from core.utils.mixins import uuid7_batch
 
 
 class Service:
@@ -29,4 +45,167 @@ class Service:
 
         :return: Created user model instance.
         """
+        response_cache.invalidate_on_commit(self.repo.session, "users")
         return await self.repo.save(UserModel.create(name=name))
+
+    async def get_user_validators(self, user_id: UUID) -> Optional[datetime]:
+        """
+        Get the conditional request validators of a user.
+
+        :param user_id: Id of the user.
+
+        :return: Last update of the user.
+        :raises UserNotFound: If the user does not exist.
+        """
+        last_modified, count = await self.repo.get_validators(UserModel, UserModel.id == user_id)
+        if not count:
+            raise UserNotFound(constants.USER_NOT_FOUND)
+        return last_modified
+
+    async def get_user(self, user_id: UUID) -> UserModel:
+        """
+        Get a user.
+
+        :param user_id: Id of the user.
+
+        :return: User model instance.
+        :raises UserNotFound: If the user does not exist.
+        """
+        user = await self.repo.get(UserModel, p_key=user_id)
+        if not user:
+            raise UserNotFound(constants.USER_NOT_FOUND)
+        return user
+
+    async def get_users_validators(self) -> Tuple[Optional[datetime], int]:
+        """
+        Get the conditional request validators of the user listing.
+        The number of users shares the count memoized for the listing rather than counting the table per request:
+        deletions, which leave the last update unchanged, change the validators within ``PAGINATION_COUNT_CACHE_TTL``.
+
+        :return: Last update and number of the users.
+        """
+        last_modified = await self.repo.get_last_modified(UserModel)
+        return last_modified, await self.repo.count(select(UserModel), CountStrategy.CACHED)
+
+    async def list_users(self, params: Params, count_strategy: Optional[CountStrategy] = None) -> Page[UserModel]:
+        """
+        List users, oldest first.
+
+        :param params: Pagination parameters.
+        :param count_strategy: Strategy counting the total of users.
+
+        :return: A page of users.
+        """
+        return await self.repo.get(
+            UserModel,
+            order_by=UserModel.created_at,
+            return_all=True,
+            page=True,
+            page_params=params,
+            count_strategy=count_strategy,
+        )
+
+    async def search_users(
+        self, term: str, mode: SearchMode, limit: int, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Search users by name, most relevant first.
+
+        :param term: Searched text.
+        :param mode: Search mode.
+        :param limit: Maximum number of users.
+        :param cursor: Cursor of the previous page.
+
+        :return: A page of users and the cursor of the next page.
+        """
+        users, next_cursor = await self.repo.search(UserModel, term, mode=mode, limit=limit, cursor=cursor)
+        return {"items": users, "next_cursor": next_cursor}
+
+    async def count_users(self) -> Dict[str, int]:
+        """
+        Count the users from the maintained aggregates.
+
+        :return: Total of users.
+        """
+        return {"total": await self.repo.get_aggregate("users")}
+
+    async def count_users_per_day(self, start: date, end: date) -> List[Dict[str, Any]]:
+        """
+        Count the users created per day from the maintained aggregates.
+
+        :param start: First day.
+        :param end: Last day.
+
+        :return: Days with created users and their count, in order.
+        """
+        series = await self.repo.get_aggregate_series("users_per_day", start.isoformat(), end.isoformat())
+        return [{"day": day, "count": count} for day, count in series]
+
+    async def bulk_create_users(self, rows: AsyncIterator[Row]) -> Dict[str, Any]:
+        """
+        Create users from a stream of rows, validated one by one and inserted in batches of
+        ``BULK_INGEST_BATCH_SIZE``. Each batch is committed in its own transaction so that an upload of any size
+        holds at most one batch in memory, invalid rows are reported without aborting the upload.
+
+        :param rows: Row number and fields, or parsing error, of every row.
+
+        :return: Number of inserted and failed rows, and the errors of the first ``BULK_INGEST_MAX_ERRORS`` rows.
+        """
+        report = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+        batch: List[Tuple[int, str]] = []
+        async for number, row in rows:
+            if isinstance(row, str):
+                self._reject(report, number, row)
+                continue
+            try:
+                user = UserCreateRequest.parse_obj(row)
+            except ValidationError as exc:
+                self._reject(
+                    report, number, "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+                )
+                continue
+            batch.append((number, user.name))
+            if len(batch) >= settings.BULK_INGEST_BATCH_SIZE:
+                await self._insert_users(report, batch)
+                batch = []
+        await self._insert_users(report, batch)
+        return report
+
+    async def _insert_users(self, report: Dict[str, Any], batch: List[Tuple[int, str]]) -> None:
+        """
+        Insert a batch of validated users in its own transaction.
+
+        :param report: Ingestion report to update.
+        :param batch: Row number and name of the users.
+        """
+        if not batch:
+            return None
+        users = [{"id": id_, "name": name} for id_, (_, name) in zip(uuid7_batch(len(batch)), batch)]
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    response_cache.invalidate_on_commit(session, "users")
+                    await Repository(session).insert_many(UserModel, users)
+        except SQLAlchemyError:
+            logger.exception(f"Bulk insert of {len(batch)} users failed")
+            for number, _ in batch:
+                self._reject(report, number, constants.SOMETHING_WENT_WRONG)
+            return None
+        report["inserted"] += len(batch)
+        return None
+
+    @staticmethod
+    def _reject(report: Dict[str, Any], number: int, error: str) -> None:
+        """
+        Record a rejected row, only the first ``BULK_INGEST_MAX_ERRORS`` errors are kept.
+
+        :param report: Ingestion report to update.
+        :param number: Row number.
+        :param error: Error message.
+        """
+        report["failed"] += 1
+        if len(report["errors"]) < settings.BULK_INGEST_MAX_ERRORS:
+            report["errors"].append({"row": number, "error": error})
+        else:
+            report["errors_truncated"] = True
+        return None
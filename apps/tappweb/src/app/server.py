@@ -1,3 +1,4 @@
+import logging
 from typing import Dict
 
 from fastapi import FastAPI, status
@@ -8,10 +9,20 @@ from gunicorn.app.base import BaseApplication
 
 import constants
 from app.app.controllers import router
-from app.app.jobs import job
+from app.app.jobs import aggregate_reconciliation_job, idempotency_purge_job, job, partition_maintenance_job
 from config import settings
 from core.exceptions import CustomException
-from core.utils import logger, scheduler
+from core.index_advisor import query_recorder
+from core.middlewares import AdmissionControlMiddleware, CompressionMiddleware, TracingMiddleware
+from core.readiness import readiness_prober
+from core.tracing import tracer
+from core.types import RequestPriority
+from core.utils import add_job, job_loop, log_pipeline, logger, scheduler
+
+
+HEALTH_PATHS = ("/", "/healthcheck", "/readiness")
+
+ROUTE_PRIORITIES = {"/docs": RequestPriority.LOW, "/redoc": RequestPriority.LOW, "/openapi.json": RequestPriority.LOW}
 
 
 class Application(BaseApplication):
@@ -41,14 +52,29 @@ def root_health_path(_app: FastAPI) -> None:
     Health Check Endpoint.
     """
 
-    @_app.get("/", include_in_schema=False)
+    @_app.get(HEALTH_PATHS[0], include_in_schema=False)
     def root() -> JSONResponse:
         return JSONResponse(status_code=status.HTTP_200_OK, content={"message": constants.SUCCESS})
 
-    @_app.get("/healthcheck", include_in_schema=False)
+    @_app.get(HEALTH_PATHS[1], include_in_schema=False)
     def healthcheck() -> JSONResponse:
         return JSONResponse(status_code=status.HTTP_200_OK, content={"message": constants.SUCCESS})
 
+    @_app.get(HEALTH_PATHS[2], include_in_schema=False)
+    async def readiness() -> JSONResponse:
+        """
+        Readiness of the worker from the last background probe, a load balancer should stop routing to it on 503.
+        """
+        report = readiness_prober.report
+        if report is None:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"message": constants.NOT_READY}
+            )
+        return JSONResponse(
+            status_code=status.HTTP_200_OK if report.ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"message": constants.SUCCESS if report.ready else constants.NOT_READY, "checks": report.checks},
+        )
+
     return
 
 
@@ -56,9 +82,21 @@ def init_middlewares(_app: FastAPI) -> None:
     """
     Middleware initialization.
     """
+    _app.add_middleware(
+        AdmissionControlMiddleware,
+        max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+        retry_after=settings.ADMISSION_RETRY_AFTER,
+        exempt_paths=HEALTH_PATHS,
+        priorities=ROUTE_PRIORITIES,
+    )
+    if settings.COMPRESSION_ENABLED:
+        _app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
     _app.add_middleware(
         CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
     )
+    _app.add_middleware(TracingMiddleware)
     return
 
 
@@ -73,7 +111,7 @@ def start_exception_handlers(_app: FastAPI) -> None:
         Handler for all the :class:`RequestValidationError` raised within the app.
         """
         exc = args[1]
-        logger.exception(f"{exc.__class__.__name__}: {exc.errors()}")
+        logger.info("%s: %s", exc.__class__.__name__, exc.errors(), extra={"sample_key": exc.__class__.__name__})
         return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={"error": exc.errors()})
 
     @_app.exception_handler(CustomException)
@@ -82,8 +120,15 @@ def start_exception_handlers(_app: FastAPI) -> None:
         Handler for all the :class:`CustomException` raised within the app.
         """
         exc = args[1]
-        logger.exception(f"{exc.__class__.__name__}: {exc.message}")
-        return JSONResponse(status_code=exc.status_code, content={"error": exc.message})
+        logger.log(
+            exc.log_level,
+            "%s: %s",
+            exc.__class__.__name__,
+            exc.message,
+            exc_info=exc if exc.log_level >= logging.ERROR else None,
+            extra={"sample_key": exc.__class__.__name__},
+        )
+        return JSONResponse(status_code=exc.status_code, content={"error": exc.message}, headers=exc.headers)
 
     return
 
@@ -96,10 +141,23 @@ def startup_events(_app: FastAPI) -> None:
         """
         Startup event.
         """
+        if settings.LOG_QUEUE_ENABLED:
+            log_pipeline.start()
+        tracer.instrument_engine()
+        readiness_prober.start()
         logger.info("Starting scheduler")
         scheduler.start()
-        scheduler.add_job(job, "cron", hour="23", minute="59", id="check_subscriptions")
+        add_job(job, "cron", hour="23", minute="59", id="check_subscriptions")
         logger.info("Added Subscription check job")
+        add_job(partition_maintenance_job, "cron", hour="0", minute="15", id="maintain_partitions")
+        logger.info("Added partition maintenance job")
+        add_job(idempotency_purge_job, "cron", minute="30", id="purge_idempotency_keys")
+        logger.info("Added idempotency key purge job")
+        add_job(aggregate_reconciliation_job, "cron", hour="1", minute="30", id="reconcile_aggregates")
+        logger.info("Added aggregate reconciliation job")
+        if settings.QUERY_SHAPES_RECORD:
+            query_recorder.start()
+            logger.info("Recording repository query shapes")
         return None
 
     return
@@ -113,8 +171,13 @@ def shutdown_events(_app: FastAPI) -> None:
         """
         Shutdown event.
         """
+        await readiness_prober.stop()
         logger.info("Shutting down scheduler")
         scheduler.shutdown()
+        await job_loop.stop()
+        query_recorder.stop()
+        tracer.shutdown()
+        log_pipeline.stop()
         return None
 
     return
@@ -0,0 +1,18 @@
+from typer import Typer
+
+from benchmarks.compression import compression_cost
+from benchmarks.pgbouncer import pgbouncer_throughput
+from benchmarks.primary_keys import primary_keys
+from benchmarks.rate_limit import rate_limit_overhead
+from benchmarks.scheduler import scheduler_latency
+
+
+cli = Typer(pretty_exceptions_show_locals=False, help="Run performance benchmarks")
+
+cli.command(name="scheduler", help="Measure request latency while a scheduler job is running.")(scheduler_latency)
+cli.command(name="rate-limit", help="Measure the per request overhead of the rate limiter.")(rate_limit_overhead)
+cli.command(name="primary-keys", help="Compare uuid4 and time-ordered primary key inserts.")(primary_keys)
+cli.command(name="pgbouncer", help="Compare direct and PgBouncer pooled connections.")(pgbouncer_throughput)
+cli.command(name="compression", help="Compare the CPU cost and the bytes saved of response compression.")(
+    compression_cost
+)
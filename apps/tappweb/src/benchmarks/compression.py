@@ -0,0 +1,75 @@
+import json
+import random
+import uuid
+from time import perf_counter_ns
+from typing import Dict, List
+
+from typer import Option
+
+from benchmarks.utils import percentile, print_report
+from core.types import ContentEncoding
+from core.utils.compression import AVAILABLE_ENCODINGS, StreamCompressor, compress
+
+
+def _listing(size: int) -> bytes:
+    """
+    A JSON user listing of about ``size`` bytes, shaped like the user endpoints responses.
+    """
+    users: List[bytes] = []
+    length = 2
+    while length < size:
+        name = "".join(random.choices("abcdefghijklmnopqrstuvwxyz", k=random.randint(4, 12)))
+        user = {
+            "id": str(uuid.uuid4()),
+            "firstName": name.title(),
+            "lastName": name[::-1].title(),
+            "email": f"{name}@example.com",
+            "createdAt": f"2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T12:00:00",
+        }
+        users.append(json.dumps(user, separators=(",", ":")).encode())
+        length += len(users[-1]) + 1
+    return b"[" + b",".join(users) + b"]"
+
+
+def _measure(body: bytes, encoding: ContentEncoding, repeat: int, chunk_size: int) -> Dict[str, str]:
+    """
+    Time the compression of a body at once and streamed in chunks.
+
+    :return: Compression cost and savings.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter_ns()
+        compressed = compress(body, encoding)
+        timings.append((perf_counter_ns() - start) / 1000)
+
+    compressor = StreamCompressor(encoding)
+    chunks = [body[offset : offset + chunk_size] for offset in range(0, len(body), chunk_size)]
+    streamed = sum(len(compressor.compress(chunk)) for chunk in chunks[:-1]) + len(compressor.finish(chunks[-1]))
+
+    p50 = percentile(timings, 50)
+    saved = len(body) - len(compressed)
+    return {
+        "size (B)": str(len(body)),
+        "encoding": encoding.value,
+        "compressed (B)": str(len(compressed)),
+        "saved (%)": f"{saved / len(body) * 100:.1f}",
+        "streamed (B)": str(streamed),
+        "p50 (µs)": f"{p50:.1f}",
+        "MB/s": f"{len(body) / p50:.1f}" if p50 else "n/a",
+        "µs per saved KB": f"{p50 / (saved / 1024):.2f}" if saved > 0 else "n/a",
+    }
+
+
+def compression_cost(
+    sizes: List[int] = Option([256, 1_024, 16_384, 262_144], help="Body sizes in bytes."),
+    repeat: int = Option(200, help="Compressions per size and encoding."),
+    chunk_size: int = Option(4_096, help="Chunk size of the streamed compression."),
+) -> None:
+    """
+    Measure the CPU cost of each available content coding against the bytes it saves on JSON listings,
+    to choose the compression levels and the minimum size.
+    """
+    bodies = [_listing(size) for size in sizes]
+    rows = [_measure(body, encoding, repeat, chunk_size) for body in bodies for encoding in AVAILABLE_ENCODINGS]
+    print_report("Response compression cost", rows)
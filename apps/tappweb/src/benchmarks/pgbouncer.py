@@ -0,0 +1,85 @@
+import asyncio
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from typer import Option
+
+from app.app.models import UserModel
+from benchmarks.utils import latency_summary, print_report
+from config import settings
+from core.db import engine_options
+
+
+async def _load(engine: AsyncEngine, seconds: float, concurrency: int) -> List[float]:
+    """
+    Run short transactions from concurrent clients for a fixed duration, each one looking up a user by id.
+
+    :param engine: Engine under test.
+    :param seconds: Duration of the load.
+    :param concurrency: Number of concurrent clients.
+    :return: Transaction latencies in milliseconds.
+    """
+    async with engine.connect() as connection:
+        ids = (await connection.scalars(select(UserModel.id).limit(1_000))).all()
+    if not ids:
+        raise SystemExit("The users table is empty, create some users before running this benchmark.")
+    query = select(UserModel).where(UserModel.id == bindparam("id"))
+    latencies: List[float] = []
+    deadline = perf_counter() + seconds
+
+    async def client(offset: int) -> None:
+        """
+        Run transactions until the deadline.
+
+        :param offset: Index of the first queried row.
+        """
+        index = offset
+        while perf_counter() < deadline:
+            start = perf_counter()
+            async with engine.begin() as connection:
+                await connection.execute(query, {"id": ids[index % len(ids)]})
+            latencies.append((perf_counter() - start) * 1000)
+            index += concurrency
+
+    await asyncio.gather(*[client(offset) for offset in range(concurrency)])
+    return latencies
+
+
+async def _benchmark(
+    direct_url: str, pooled_url: Optional[str], seconds: float, concurrency: int, pool_size: int
+) -> List[Dict[str, str]]:
+    """
+    Measure the throughput of every connection mode.
+    """
+    modes = {"direct": (direct_url, dict(pgbouncer=False, null_pool=False))}
+    if pooled_url:
+        modes["pgbouncer"] = (pooled_url, dict(pgbouncer=True, null_pool=False))
+        modes["pgbouncer, null pool"] = (pooled_url, dict(pgbouncer=True, null_pool=True))
+    rows = []
+    for mode, (url, options) in modes.items():
+        engine = create_async_engine(url, **engine_options(pool_size=pool_size, max_overflow=0, **options))
+        try:
+            latencies = await _load(engine, seconds, concurrency)
+        finally:
+            await engine.dispose()
+        rows.append({"mode": mode, "tx/s": f"{len(latencies) / seconds:,.0f}", **latency_summary(latencies)})
+    return rows
+
+
+def pgbouncer_throughput(
+    pooled_url: Optional[str] = Option(None, help="Database URL through PgBouncer in transaction pooling mode."),
+    direct_url: Optional[str] = Option(None, help="Database URL of the server itself, defaults to DATABASE_URL."),
+    seconds: float = Option(10.0, help="Duration of each mode."),
+    concurrency: int = Option(20, help="Concurrent clients."),
+    pool_size: int = Option(10, help="Client side pool size, unused with the null pool."),
+) -> None:
+    """
+    Compare transaction throughput and latency of direct connections with connections through PgBouncer, with and
+    without a client side pool.
+    """
+    print_report(
+        f"Point lookups by {concurrency} clients",
+        asyncio.run(_benchmark(direct_url or settings.DATABASE_URL, pooled_url, seconds, concurrency, pool_size)),
+    )
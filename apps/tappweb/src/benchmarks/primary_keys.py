@@ -0,0 +1,93 @@
+import asyncio
+import timeit
+import uuid
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from sqlalchemy import Column, MetaData, Table, Text, Uuid, insert, text
+from typer import Option
+
+from benchmarks.utils import print_report
+from core.db import engine
+from core.utils.mixins import uuid7, uuid7_batch
+
+
+def _uuid4_batch(count: int) -> List[uuid.UUID]:
+    """
+    Generate ``count`` random UUIDs.
+    """
+    return [uuid.uuid4() for _ in range(count)]
+
+
+GENERATORS: Dict[str, Callable[[int], List[uuid.UUID]]] = {"uuid4": _uuid4_batch, "uuid7": uuid7_batch}
+
+
+async def _insert(name: str, rows: int, batch_size: int, keep: bool) -> Dict[str, str]:
+    """
+    Insert ``rows`` rows keyed by the ids of a generator into a fresh table.
+
+    :return: Insert throughput and primary key index statistics.
+    """
+    metadata = MetaData()
+    table = Table(f"bench_pk_{name}", metadata, Column("id", Uuid, primary_key=True), Column("payload", Text))
+    async with engine.begin() as connection:
+        await connection.run_sync(metadata.drop_all)
+        await connection.run_sync(metadata.create_all)
+
+    generate = GENERATORS[name]
+    start = perf_counter()
+    for offset in range(0, rows, batch_size):
+        ids = generate(min(batch_size, rows - offset))
+        async with engine.begin() as connection:
+            await connection.execute(insert(table), [{"id": id_, "payload": "x" * 64} for id_ in ids])
+    elapsed = perf_counter() - start
+
+    async with engine.begin() as connection:
+        index_size = await connection.scalar(text(f"SELECT pg_relation_size('{table.name}_pkey')"))
+        leaf_density = None
+        if await connection.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pgstattuple'")):
+            leaf_density = await connection.scalar(
+                text("SELECT avg_leaf_density FROM pgstatindex(:index)"), {"index": f"{table.name}_pkey"}
+            )
+        if not keep:
+            await connection.run_sync(metadata.drop_all)
+    return {
+        "key": name,
+        "rows": str(rows),
+        "rows/s": f"{rows / elapsed:,.0f}",
+        "pkey size (MB)": f"{index_size / 2**20:.1f}",
+        "leaf density (%)": f"{leaf_density:.1f}" if leaf_density is not None else "n/a",
+    }
+
+
+async def _benchmark(rows: int, batch_size: int, keep: bool) -> List[Dict[str, str]]:
+    """
+    Run the insert benchmark for every generator.
+    """
+    try:
+        return [await _insert(name, rows, batch_size, keep) for name in GENERATORS]
+    finally:
+        await engine.dispose()
+
+
+def primary_keys(
+    rows: int = Option(1_000_000, help="Rows inserted per key type."),
+    batch_size: int = Option(5_000, help="Rows inserted per transaction."),
+    keep: bool = Option(False, help="Keep the benchmark tables."),
+) -> None:
+    """
+    Compare uuid4 and time-ordered uuid7 primary keys: generation cost and insert throughput on a large table.
+    """
+    number = 100_000
+    print_report(
+        "Primary key generation",
+        [
+            {"generator": "uuid4()", "µs/id": f"{timeit.timeit(uuid.uuid4, number=number) * 1e6 / number:.2f}"},
+            {"generator": "uuid7()", "µs/id": f"{timeit.timeit(uuid7, number=number) * 1e6 / number:.2f}"},
+            {
+                "generator": "uuid7_batch(1000)",
+                "µs/id": f"{timeit.timeit(lambda: uuid7_batch(1000), number=number // 1000) * 1e6 / number:.2f}",
+            },
+        ],
+    )
+    print_report("Primary key inserts", asyncio.run(_benchmark(rows, batch_size, keep)))
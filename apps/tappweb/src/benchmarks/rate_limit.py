@@ -0,0 +1,54 @@
+import asyncio
+from time import perf_counter_ns
+from typing import List
+
+from typer import Option
+
+from benchmarks.utils import percentile, print_report
+from core.rate_limit import RateLimit, create_backend
+from core.types import RateLimitBackendType
+
+
+BUDGET_US = 50.0
+
+
+async def _benchmark(backend: RateLimitBackendType, requests: int, principals: int) -> List[float]:
+    """
+    Time the limiter path of :meth:`JWToken.limit`: bucket consumption and header generation.
+
+    :return: Per request overhead in microseconds.
+    """
+    limiter = create_backend(backend)
+    limit = RateLimit(capacity=100, refill_rate=10.0)
+    keys = [f"3:{principal}" for principal in range(principals)]
+    timings = []
+    for index in range(requests):
+        start = perf_counter_ns()
+        result = await limiter.consume(keys[index % principals], limit)
+        result.headers()
+        timings.append((perf_counter_ns() - start) / 1000)
+    return timings
+
+
+def rate_limit_overhead(
+    backend: RateLimitBackendType = Option(RateLimitBackendType.MEMORY, help="Rate limit backend."),
+    requests: int = Option(100_000, help="Number of limited requests."),
+    principals: int = Option(1_000, help="Number of distinct principals."),
+) -> None:
+    """
+    Measure the per request overhead of the rate limiter against the 50µs budget.
+    """
+    timings = asyncio.run(_benchmark(backend, requests, principals))
+    p99 = percentile(timings, 99)
+    print_report(
+        f"Rate limiter overhead ({backend.value} backend)",
+        [
+            {
+                "requests": str(requests),
+                "mean (µs)": f"{sum(timings) / len(timings):.2f}",
+                "p50 (µs)": f"{percentile(timings, 50):.2f}",
+                "p99 (µs)": f"{p99:.2f}",
+                f"p99 < {BUDGET_US:.0f}µs": "yes" if p99 < BUDGET_US else "no",
+            }
+        ],
+    )
@@ -0,0 +1,136 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Callable, List, Tuple
+
+import uvicorn
+from aiohttp import ClientSession
+from fastapi import FastAPI
+from typer import Option
+
+from benchmarks.utils import latency_summary, print_report
+from core.types import JobExecutorType
+from core.utils.scheduler import job_loop, run_in_process
+
+
+async def busy_job(seconds: float) -> None:
+    """
+    A CPU bound job standing in for a heavy nightly job.
+
+    :param seconds: Seconds of CPU work.
+    """
+    deadline = perf_counter() + seconds
+    while perf_counter() < deadline:
+        sum(range(10_000))
+    return None
+
+
+async def _run_job(executor: JobExecutorType, seconds: float) -> Tuple[float, float]:
+    """
+    Run :func:`busy_job` the way the scheduler runs it on the given executor.
+
+    :param executor: Executor type.
+    :param seconds: Seconds of CPU work.
+    :return: Start and finish times of the job, the worker process is spawned beforehand.
+    """
+    if executor is JobExecutorType.THREAD:
+        started = perf_counter()
+        await job_loop.run(busy_job, seconds)
+    elif executor is JobExecutorType.PROCESS:
+        with ProcessPoolExecutor(1) as pool:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(pool, int)
+            started = perf_counter()
+            await loop.run_in_executor(pool, run_in_process, busy_job, seconds)
+    else:
+        started = perf_counter()
+        await busy_job(seconds)
+    return started, perf_counter()
+
+
+async def _load(url: str, concurrency: int, done: Callable[[], bool]) -> List[Tuple[float, float]]:
+    """
+    Send requests from concurrent clients until ``done`` returns True.
+
+    :param url: Url to request.
+    :param concurrency: Number of concurrent clients.
+    :param done: Whether to stop sending requests.
+    :return: Start and end times of the requests.
+    """
+    samples: List[Tuple[float, float]] = []
+
+    async def client(session: ClientSession) -> None:
+        """
+        Send requests one at a time until ``done`` returns True.
+
+        :param session: HTTP client session.
+        """
+        while not done():
+            start = perf_counter()
+            async with session.get(url) as response:
+                await response.read()
+            samples.append((start, perf_counter()))
+
+    async with ClientSession() as session:
+        await asyncio.gather(*[client(session) for _ in range(concurrency)])
+    return samples
+
+
+def _latencies(samples: List[Tuple[float, float]], start: float, end: float) -> List[float]:
+    """
+    Latencies of the requests in flight between ``start`` and ``end``.
+
+    :return: Latencies in milliseconds.
+    """
+    return [(finished - started) * 1000 for started, finished in samples if finished >= start and started <= end]
+
+
+async def _benchmark(executor: JobExecutorType, seconds: float, concurrency: int, port: int) -> None:
+    """
+    Measure request latency of an in-process server while idle and while a job is running.
+    """
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> dict:
+        """
+        An endpoint doing no work.
+        """
+        return {}
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    url = f"http://127.0.0.1:{port}/ping"
+    deadline = perf_counter() + seconds
+    idle = _latencies(await _load(url, concurrency, lambda: perf_counter() >= deadline), 0.0, deadline)
+
+    # Only the requests in flight while the job runs are kept, the load starts early so that clients are busy.
+    finished = asyncio.Event()
+    load = asyncio.create_task(_load(url, concurrency, finished.is_set))
+    await asyncio.sleep(seconds / 4)
+    job_started, job_finished = await _run_job(executor, seconds / 2)
+    finished.set()
+    busy = _latencies(await load, job_started, job_finished)
+
+    server.should_exit = True
+    await serving
+    await job_loop.stop()
+    print_report(
+        f"Request latency with a {seconds / 2}s job on the {executor.value} executor",
+        [{"phase": "idle", **latency_summary(idle)}, {"phase": "job running", **latency_summary(busy)}],
+    )
+
+
+def scheduler_latency(
+    executor: JobExecutorType = Option(JobExecutorType.ASYNCIO, help="Executor running the job."),
+    seconds: float = Option(5.0, help="Duration of the idle phase, the job runs for half of it."),
+    concurrency: int = Option(10, help="Concurrent clients."),
+    port: int = Option(8765, help="Port of the in-process server."),
+) -> None:
+    """
+    Compare request p99 while idle and while a CPU bound job runs on the given executor.
+    """
+    asyncio.run(_benchmark(executor, seconds, concurrency, port))
@@ -0,0 +1,48 @@
+from typing import Dict, List, Sequence
+
+from rich import print
+from rich.table import Table
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a sample.
+
+    :param values: Sample values.
+    :param pct: Percentile between 0 and 100.
+    :return: The percentile value, 0 for an empty sample.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def latency_summary(values: Sequence[float]) -> Dict[str, str]:
+    """
+    Summarise a latency sample in milliseconds.
+
+    :param values: Latencies in milliseconds.
+    :return: Formatted count, p50, p99 and max.
+    """
+    return {
+        "count": str(len(values)),
+        "p50 (ms)": f"{percentile(values, 50):.2f}",
+        "p99 (ms)": f"{percentile(values, 99):.2f}",
+        "max (ms)": f"{max(values, default=0.0):.2f}",
+    }
+
+
+def print_report(title: str, rows: List[Dict[str, str]]) -> None:
+    """
+    Print benchmark rows as a table, the keys of the first row are used as columns.
+
+    :param title: Title of the table.
+    :param rows: Benchmark rows.
+    """
+    table = Table(title=title)
+    for column in rows[0] if rows else []:
+        table.add_column(column)
+    for row in rows:
+        table.add_row(*row.values())
+    print(table)
@@ -4,6 +4,8 @@ from typing import Optional
 from dotenv import load_dotenv
 from pydantic import BaseSettings, PostgresDsn, validator
 
+from core.types import CountStrategy, JobExecutorType, LogFormat, RateLimitBackendType, TraceExporterType
+
 
 load_dotenv(override=True)
 
@@ -27,6 +29,77 @@ class Settings(BaseSettings):
     DATABASE_NAME: Optional[str] = os.getenv("DATABASE_NAME")
 
     DATABASE_URL: Optional[PostgresDsn] = os.getenv("DATABASE_URL")
+    DATABASE_PGBOUNCER: bool = os.getenv("DATABASE_PGBOUNCER", False)
+    DATABASE_NULL_POOL: bool = os.getenv("DATABASE_NULL_POOL", False)
+    DATABASE_QUERY_CACHE_SIZE: int = os.getenv("DATABASE_QUERY_CACHE_SIZE", 500)
+
+    SCHEDULER_EXECUTOR: JobExecutorType = os.getenv("SCHEDULER_EXECUTOR", JobExecutorType.ASYNCIO)
+    SCHEDULER_PROCESS_WORKERS: int = os.getenv("SCHEDULER_PROCESS_WORKERS", 1)
+    SCHEDULER_DB_POOL_SIZE: int = os.getenv("SCHEDULER_DB_POOL_SIZE", 2)
+    SCHEDULER_DB_MAX_OVERFLOW: int = os.getenv("SCHEDULER_DB_MAX_OVERFLOW", 0)
+
+    ADMISSION_MAX_CONCURRENCY: int = os.getenv("ADMISSION_MAX_CONCURRENCY", 50)
+    ADMISSION_MAX_QUEUE: int = os.getenv("ADMISSION_MAX_QUEUE", 100)
+    ADMISSION_QUEUE_TIMEOUT: float = os.getenv("ADMISSION_QUEUE_TIMEOUT", 2.0)
+    ADMISSION_RETRY_AFTER: int = os.getenv("ADMISSION_RETRY_AFTER", 1)
+
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", True)
+    RATE_LIMIT_BACKEND: RateLimitBackendType = os.getenv("RATE_LIMIT_BACKEND", RateLimitBackendType.MEMORY)
+    RATE_LIMIT_CAPACITY: int = os.getenv("RATE_LIMIT_CAPACITY", 100)
+    RATE_LIMIT_REFILL_RATE: float = os.getenv("RATE_LIMIT_REFILL_RATE", 10.0)
+    RATE_LIMIT_MAX_KEYS: int = os.getenv("RATE_LIMIT_MAX_KEYS", 100_000)
+    RATE_LIMIT_DB_POOL_SIZE: int = os.getenv("RATE_LIMIT_DB_POOL_SIZE", 5)
+    RATE_LIMIT_DB_MAX_OVERFLOW: int = os.getenv("RATE_LIMIT_DB_MAX_OVERFLOW", 0)
+
+    RESPONSE_CACHE_MAX_ENTRIES: int = os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 10_000)
+
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", True)
+    COMPRESSION_MINIMUM_SIZE: int = os.getenv("COMPRESSION_MINIMUM_SIZE", 1_024)
+    COMPRESSION_GZIP_LEVEL: int = os.getenv("COMPRESSION_GZIP_LEVEL", 6)
+    COMPRESSION_BROTLI_QUALITY: int = os.getenv("COMPRESSION_BROTLI_QUALITY", 4)
+    COMPRESSION_ZSTD_LEVEL: int = os.getenv("COMPRESSION_ZSTD_LEVEL", 3)
+
+    IDEMPOTENCY_TTL: int = os.getenv("IDEMPOTENCY_TTL", 86_400)
+    IDEMPOTENCY_LOCK_TIMEOUT: float = os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", 30.0)
+    IDEMPOTENCY_WAIT_TIMEOUT: float = os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", 10.0)
+    IDEMPOTENCY_POLL_INTERVAL: float = os.getenv("IDEMPOTENCY_POLL_INTERVAL", 0.1)
+
+    PAGINATION_COUNT_STRATEGY: CountStrategy = os.getenv("PAGINATION_COUNT_STRATEGY", CountStrategy.EXACT)
+    PAGINATION_COUNT_CACHE_TTL: int = os.getenv("PAGINATION_COUNT_CACHE_TTL", 60)
+
+    AGGREGATE_SHARDS: int = os.getenv("AGGREGATE_SHARDS", 16)
+
+    MIGRATION_LOCK_TIMEOUT: int = os.getenv("MIGRATION_LOCK_TIMEOUT", 5_000)
+    MIGRATION_STATEMENT_TIMEOUT: int = os.getenv("MIGRATION_STATEMENT_TIMEOUT", 60_000)
+    MIGRATION_LOCK_RETRIES: int = os.getenv("MIGRATION_LOCK_RETRIES", 5)
+    MIGRATION_BACKFILL_BATCH_SIZE: int = os.getenv("MIGRATION_BACKFILL_BATCH_SIZE", 1_000)
+    MIGRATION_BACKFILL_PAUSE: float = os.getenv("MIGRATION_BACKFILL_PAUSE", 0.1)
+
+    QUERY_SHAPES_RECORD: bool = os.getenv("QUERY_SHAPES_RECORD", False)
+    QUERY_SHAPES_PATH: str = os.getenv("QUERY_SHAPES_PATH", "query_shapes.jsonl")
+
+    BULK_INGEST_BATCH_SIZE: int = os.getenv("BULK_INGEST_BATCH_SIZE", 1_000)
+    BULK_INGEST_MAX_ERRORS: int = os.getenv("BULK_INGEST_MAX_ERRORS", 1_000)
+    BULK_INGEST_MAX_LINE_BYTES: int = os.getenv("BULK_INGEST_MAX_LINE_BYTES", 65_536)
+
+    LOG_FORMAT: LogFormat = os.getenv("LOG_FORMAT", LogFormat.TEXT)
+    LOG_QUEUE_ENABLED: bool = os.getenv("LOG_QUEUE_ENABLED", True)
+    LOG_SAMPLE_BURST: int = os.getenv("LOG_SAMPLE_BURST", 20)
+    LOG_SAMPLE_WINDOW: float = os.getenv("LOG_SAMPLE_WINDOW", 1.0)
+
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", False)
+    TRACING_SAMPLE_RATE: float = os.getenv("TRACING_SAMPLE_RATE", 0.01)
+    TRACING_EXPORTER: TraceExporterType = os.getenv("TRACING_EXPORTER", TraceExporterType.STDOUT)
+    TRACING_FILE: str = os.getenv("TRACING_FILE", "traces.jsonl")
+
+    READINESS_INTERVAL: float = os.getenv("READINESS_INTERVAL", 2.0)
+    READINESS_DB_TIMEOUT: float = os.getenv("READINESS_DB_TIMEOUT", 1.0)
+    READINESS_MAX_POOL_USAGE: float = os.getenv("READINESS_MAX_POOL_USAGE", 0.9)
+    READINESS_MAX_LOOP_LAG: float = os.getenv("READINESS_MAX_LOOP_LAG", 0.5)
+    READINESS_MAX_WEBHOOK_BACKLOG: int = os.getenv("READINESS_MAX_WEBHOOK_BACKLOG", 1_000)
+
+    PROFILE_MAX_DURATION: float = os.getenv("PROFILE_MAX_DURATION", 60.0)
+    TRACEMALLOC_FRAMES: int = os.getenv("TRACEMALLOC_FRAMES", 25)
 
     @validator("DATABASE_URL", pre=True)
     def assemble_db_url(cls, v, values) -> str:
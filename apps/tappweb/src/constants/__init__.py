@@ -1,10 +1,24 @@
 from constants.messages import (
     EXPIRED_TOKEN,
+    IDEMPOTENCY_KEY_IN_PROGRESS,
+    IDEMPOTENCY_KEY_REUSED,
+    INVALID_CURSOR,
+    INVALID_DATE_RANGE,
+    INVALID_IDEMPOTENCY_KEY,
+    INVALID_ROW,
     INVALID_TOKEN,
+    MEMORY_TRACING_NOT_STARTED,
+    NOT_READY,
+    PROFILE_RUNNING,
+    RATE_LIMIT_EXCEEDED,
     REQUEST_FAILED,
+    ROW_TOO_LONG,
+    SERVICE_OVERLOADED,
     SOMETHING_WENT_WRONG,
     SUCCESS,
     UNAUTHORIZED,
+    UNSUPPORTED_MEDIA_TYPE,
+    USER_NOT_FOUND,
     WEBHOOK_FAILED,
     WEBHOOK_SUCCESSFUL,
 )
@@ -12,11 +26,25 @@ from constants.messages import (
 
 __all__ = [
     "EXPIRED_TOKEN",
+    "IDEMPOTENCY_KEY_IN_PROGRESS",
+    "IDEMPOTENCY_KEY_REUSED",
+    "INVALID_CURSOR",
+    "INVALID_DATE_RANGE",
+    "INVALID_IDEMPOTENCY_KEY",
+    "INVALID_ROW",
     "INVALID_TOKEN",
+    "MEMORY_TRACING_NOT_STARTED",
+    "NOT_READY",
+    "PROFILE_RUNNING",
+    "RATE_LIMIT_EXCEEDED",
     "REQUEST_FAILED",
+    "ROW_TOO_LONG",
+    "SERVICE_OVERLOADED",
     "SOMETHING_WENT_WRONG",
     "SUCCESS",
     "UNAUTHORIZED",
+    "UNSUPPORTED_MEDIA_TYPE",
+    "USER_NOT_FOUND",
     "WEBHOOK_FAILED",
     "WEBHOOK_SUCCESSFUL",
 ]
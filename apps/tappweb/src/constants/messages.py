@@ -13,3 +13,31 @@ REQUEST_FAILED = "HTTP Request Failed!"
 WEBHOOK_FAILED = "Webhook Failed!"
 
 WEBHOOK_SUCCESSFUL = "Webhook Successful! Content: "
+
+NOT_READY = "Not ready!"
+
+SERVICE_OVERLOADED = "Service overloaded, please retry later!"
+
+RATE_LIMIT_EXCEEDED = "Rate limit exceeded!"
+
+USER_NOT_FOUND = "User not found!"
+
+INVALID_CURSOR = "Invalid cursor!"
+
+UNSUPPORTED_MEDIA_TYPE = "Unsupported media type!"
+
+INVALID_ROW = "Invalid row!"
+
+ROW_TOO_LONG = "Row too long!"
+
+PROFILE_RUNNING = "A profile is already running!"
+
+MEMORY_TRACING_NOT_STARTED = "Memory tracing is not started!"
+
+INVALID_IDEMPOTENCY_KEY = "Invalid idempotency key!"
+
+IDEMPOTENCY_KEY_REUSED = "Idempotency key already used for a different request!"
+
+INVALID_DATE_RANGE = "Invalid date range!"
+
+IDEMPOTENCY_KEY_IN_PROGRESS = "A request with this idempotency key is in progress, please retry later!"
@@ -0,0 +1,104 @@
+import random
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Type
+
+from sqlalchemy import SmallInteger, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.app.models.aggregate import AggregateCounter
+from config import settings
+from core.db import Base, advisory_xact_lock
+
+
+def _upsert(values: List[Dict[str, Any]]):
+    """
+    Add values to counter shards, creating the missing ones.
+    """
+    statement = insert(AggregateCounter)
+    return statement.values(values).on_conflict_do_update(
+        index_elements=[AggregateCounter.name, AggregateCounter.dimension, AggregateCounter.shard],
+        set_={"value": AggregateCounter.value + statement.excluded.value},
+    )
+
+
+async def update_counters(session: AsyncSession, model: Type[Base], rows: Iterable[Any], sign: int = 1) -> None:
+    """
+    Count rows written to a model in its aggregates, in the transaction of the write.
+    All the counters of a write go to a single random shard, in a fixed order to avoid deadlocks.
+
+    :param session: Session of the write.
+    :param model: Model type.
+    :param rows: Model instances or result rows with the aggregate columns.
+    :param sign: 1 for inserted rows, -1 for deleted ones.
+    """
+    aggregates = getattr(model, "__aggregates__", ())
+    if not aggregates:
+        return None
+    deltas: Counter = Counter()
+    for row in rows:
+        for aggregate in aggregates:
+            deltas[(aggregate.name, aggregate.dimension(row))] += sign
+    shard = random.randrange(settings.AGGREGATE_SHARDS)
+    values = [
+        {"name": name, "dimension": dimension, "shard": shard, "value": value}
+        for (name, dimension), value in sorted(deltas.items())
+        if value
+    ]
+    if values:
+        await session.execute(_upsert(values))
+    return None
+
+
+async def reconcile_counters(session: AsyncSession, model: Type[Base]) -> int:
+    """
+    Correct the drift of the aggregates of a model. The drift of each dimension is computed against the model rows in
+    a single statement, and so a single snapshot, and added to shard 0: writes committed meanwhile are kept.
+    Concurrent runs, from every worker, are serialized by an advisory lock held until the end of the transaction, so
+    that each one computes the drift left by the correction of the previous one.
+
+    :param session: A database session in a transaction.
+    :param model: Model type.
+    :return: Number of corrected dimensions.
+    """
+    await session.execute(advisory_xact_lock(f"reconcile_counters:{model.__tablename__}"))
+    corrected = 0
+    for aggregate in getattr(model, "__aggregates__", ()):
+        dimension = aggregate.expression(model)
+        actual = select(dimension.label("dimension"), func.count().label("value")).select_from(model)
+        if aggregate.column is not None:
+            actual = actual.group_by(dimension)
+        actual = actual.subquery()
+        counted = (
+            select(AggregateCounter.dimension, func.sum(AggregateCounter.value).label("value"))
+            .where(AggregateCounter.name == aggregate.name)
+            .group_by(AggregateCounter.dimension)
+            .subquery()
+        )
+        drift = func.coalesce(actual.c.value, 0) - func.coalesce(counted.c.value, 0)
+        source = (
+            select(
+                literal(aggregate.name),
+                func.coalesce(actual.c.dimension, counted.c.dimension),
+                literal(0, SmallInteger),
+                drift,
+            )
+            .select_from(actual.join(counted, actual.c.dimension == counted.c.dimension, full=True))
+            .where(drift != 0)
+        )
+        statement = insert(AggregateCounter).from_select(["name", "dimension", "shard", "value"], source)
+        statement = statement.on_conflict_do_update(
+            index_elements=[AggregateCounter.name, AggregateCounter.dimension, AggregateCounter.shard],
+            set_={"value": AggregateCounter.value + statement.excluded.value},
+        ).returning(AggregateCounter.dimension)
+        corrected += len((await session.execute(statement)).all())
+    return corrected
+
+
+def aggregated_models() -> List[Type[Base]]:
+    """
+    The mapped models with aggregates.
+
+    :return: Model types.
+    """
+    return [mapper.class_ for mapper in Base.registry.mappers if getattr(mapper.class_, "__aggregates__", ())]
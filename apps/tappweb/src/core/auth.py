@@ -1,26 +1,56 @@
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 
-from fastapi import Request
+from fastapi import Request, Response
 from fastapi.security import HTTPBearer
 from fastapi.security.utils import get_authorization_scheme_param
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
 
 import constants
 from config import settings
-from core.exceptions import InvalidJWTTokenException
+from core.exceptions import InvalidJWTTokenException, RateLimitExceededException
+from core.rate_limit import RateLimit, default_rate_limit, rate_limiter
 from core.types import RoleType
 
 
+async def apply_rate_limit(key: str, rate_limit: RateLimit, response: Response) -> None:
+    """
+    Take a token from the bucket of a key, and set the rate limit headers on the response.
+
+    :param key: Bucket key.
+    :param rate_limit: Bucket parameters.
+    :param response: FastAPI Response.
+    :raises RateLimitExceededException: If the bucket is empty.
+    """
+    result = await rate_limiter.consume(key, rate_limit)
+    if not result.allowed:
+        raise RateLimitExceededException(headers=result.headers())
+    response.headers.update(result.headers())
+    return None
+
+
+def principal_key(payload: Dict[str, Any]) -> str:
+    """
+    Bucket key of the principal of a token.
+
+    :param payload: Claims included in the token.
+    :return: Bucket key.
+    """
+    return f"{payload.get('role')}:{payload.get('sub')}"
+
+
 class JWToken(HTTPBearer):
     """
     A class inheriting from :class:`HTTPBearer` to inherit the methods necessary for
     token extraction from the request.
     """
 
-    def __init__(self, role: Optional[RoleType] = None, *args: Any, **kwargs: Any) -> None:
+    def __init__(
+        self, role: Optional[RoleType] = None, *args: Any, rate_limit: Optional[RateLimit] = None, **kwargs: Any
+    ) -> None:
         super(JWToken, self).__init__(*args, **kwargs)
         self.role = role
+        self.rate_limit = rate_limit
 
     def encode(self, payload: dict, expire_period: int) -> str:
         """
@@ -60,12 +90,25 @@ class JWToken(HTTPBearer):
         except ExpiredSignatureError:
             raise InvalidJWTTokenException(constants.EXPIRED_TOKEN)
 
-    async def __call__(self, request: Request) -> Dict[str, Any]:
+    async def limit(self, payload: Dict[str, Any], response: Response) -> None:
+        """
+        Apply the rate limit of the token subject and role, and set the rate limit headers on the response.
+
+        :param payload: Claims included in the token.
+        :param response: FastAPI Response.
+        :raises RateLimitExceededException: If the bucket of the principal is empty.
+        """
+        await apply_rate_limit(principal_key(payload), self.rate_limit, response)
+        return None
+
+    async def __call__(self, request: Request, response: Response) -> Dict[str, Any]:
         """
         A magic method intercepts the request and extracts token from it.
         allowing us to access the token in the request context.
+        The principal is rate limited after the token is decoded.
 
         :param request: FastAPI Request.
+        :param response: FastAPI Response.
         :return: Claims included in the token.
         """
         authorization: str = request.headers.get("Authorization")
@@ -74,8 +117,46 @@ class JWToken(HTTPBearer):
             raise InvalidJWTTokenException(constants.UNAUTHORIZED)
         if scheme.lower() != "bearer":
             raise InvalidJWTTokenException(constants.INVALID_TOKEN)
-        return self.decode(credentials)
+        payload = self.decode(credentials)
+        if self.rate_limit is not None:
+            await self.limit(payload, response)
+        return payload
+
+
+class RateLimited:
+    """
+    A dependency rate limiting the endpoints that do not require a token. Requests are counted against the principal
+    of their bearer token when it is valid, and against the client address otherwise.
+    """
+
+    def __init__(self, rate_limit: Optional[RateLimit]) -> None:
+        """
+        :param rate_limit: Bucket parameters, None to disable rate limiting.
+        """
+        self.rate_limit = rate_limit
+        self._token = JWToken()
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        """
+        Apply the rate limit of the caller.
+
+        :param request: FastAPI Request.
+        :param response: FastAPI Response.
+        :raises RateLimitExceededException: If the bucket of the caller is empty.
+        """
+        if self.rate_limit is None:
+            return None
+        key = f"address:{request.client.host if request.client else None}"
+        scheme, credentials = get_authorization_scheme_param(request.headers.get("Authorization"))
+        if scheme.lower() == "bearer" and credentials:
+            try:
+                key = principal_key(self._token.decode(credentials))
+            except InvalidJWTTokenException:
+                pass
+        await apply_rate_limit(key, self.rate_limit, response)
+        return None
 
 
-token = JWToken(role=RoleType.USER)
-admin_token = JWToken(role=RoleType.ADMIN)
+token = JWToken(role=RoleType.USER, rate_limit=default_rate_limit)
+admin_token = JWToken(role=RoleType.ADMIN, rate_limit=default_rate_limit)
+rate_limited = RateLimited(rate_limit=default_rate_limit)
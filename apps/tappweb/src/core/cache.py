@@ -0,0 +1,428 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import Request, Response, status
+from fastapi.routing import APIRoute
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import MutableHeaders
+
+from config import settings
+from core.auth import JWToken
+from core.exceptions import InvalidJWTTokenException
+from core.types import ContentEncoding
+from core.utils.compression import compress, is_compressible, negotiate, set_content_encoding
+from core.utils.conditional import is_not_modified
+
+
+_UNCACHED_HEADERS = {b"set-cookie", b"retry-after", b"ratelimit-limit", b"ratelimit-remaining", b"ratelimit-reset"}
+_CONDITIONAL_HEADERS = {b"if-none-match", b"if-modified-since"}
+
+Compute = Callable[[AsyncExitStack], Awaitable[Response]]
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """
+    Caching parameters of a route, responses are fresh for ``ttl`` seconds and served stale while being
+    revalidated for ``stale_ttl`` more seconds.
+    """
+
+    ttl: int
+    stale_ttl: int
+    namespace: str
+
+
+@dataclass
+class CacheEntry:
+    """
+    A cached response, with its body compressed in each content coding requested so far.
+    """
+
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+    stale_until: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    variants: Dict[ContentEncoding, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def from_response(cls, response: Response, config: CacheConfig) -> Optional["CacheEntry"]:
+        """
+        Build an entry from a rendered response.
+
+        :param response: Route handler response.
+        :param config: Caching parameters of the route.
+        :return: Cache entry, None if the response can not be cached.
+        """
+        if response.status_code != status.HTTP_200_OK or not hasattr(response, "body"):
+            return None
+        headers = [(name, value) for name, value in response.raw_headers if name not in _UNCACHED_HEADERS]
+        now = time.time()
+        return cls(
+            status_code=response.status_code,
+            headers=headers,
+            body=response.body,
+            expires_at=now + config.ttl,
+            stale_until=now + config.ttl + config.stale_ttl,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+    def to_response(self, cache_status: str, encoding: Optional[ContentEncoding] = None) -> Response:
+        """
+        Render the entry. A compressed body is computed once per content coding and reused by the later hits.
+
+        :param cache_status: Value of the ``X-Cache`` header.
+        :param encoding: Content coding negotiated with the client, None to send the identity body.
+        :return: Response.
+        """
+        headers = MutableHeaders(raw=[*self.headers, (b"x-cache", cache_status.encode())])
+        body = self.body
+        if encoding is not None and is_compressible(headers, len(body)):
+            body = self.variants.get(encoding)
+            if body is None:
+                body = self.variants[encoding] = compress(self.body, encoding)
+            set_content_encoding(headers, encoding, len(body))
+        response = Response(content=body, status_code=self.status_code)
+        response.raw_headers = headers.raw
+        return response
+
+    def not_modified_response(self) -> Response:
+        """
+        An empty ``304`` response carrying the validators of the entry.
+
+        :return: Not modified response.
+        """
+        headers = {"ETag": self.etag} if self.etag else {}
+        if self.last_modified:
+            headers["Last-Modified"] = self.last_modified
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    def not_modified(self, request: Request) -> bool:
+        """
+        Whether the client copy of the entry is current.
+
+        :param request: FastAPI Request.
+        :return: Whether a ``304`` can be returned.
+        """
+        return is_not_modified(
+            request.headers.get("If-None-Match"),
+            request.headers.get("If-Modified-Since"),
+            self.etag,
+            parsedate_to_datetime(self.last_modified) if self.last_modified else None,
+        )
+
+
+class CacheBackend(ABC):
+    """
+    Storage of the cached responses.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get an entry.
+
+        :param key: Cache key.
+        :return: The entry, None on a miss.
+        """
+
+    @abstractmethod
+    async def set(self, key: str, namespace: str, entry: CacheEntry) -> None:
+        """
+        Store an entry.
+
+        :param key: Cache key.
+        :param namespace: Namespace of the entry, used for invalidation.
+        :param entry: Cache entry.
+        """
+
+    @abstractmethod
+    async def invalidate(self, namespace: str) -> None:
+        """
+        Drop all the entries of a namespace.
+
+        :param namespace: Namespace to invalidate.
+        """
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    A per-worker LRU cache.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        """
+        :param max_entries: Maximum number of entries held.
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[str, CacheEntry]] = OrderedDict()
+        self._namespaces: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get an entry, dropping it once it can no longer be served stale.
+
+        :param key: Cache key.
+        :return: The entry, None on a miss.
+        """
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        if item[1].stale_until <= time.time():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return item[1]
+
+    async def set(self, key: str, namespace: str, entry: CacheEntry) -> None:
+        """
+        Store an entry, evicting the least recently used ones beyond ``max_entries``.
+
+        :param key: Cache key.
+        :param namespace: Namespace of the entry, used for invalidation.
+        :param entry: Cache entry.
+        """
+        self._entries[key] = (namespace, entry)
+        self._entries.move_to_end(key)
+        self._namespaces.setdefault(namespace, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        return None
+
+    async def invalidate(self, namespace: str) -> None:
+        """
+        Drop all the entries of a namespace.
+
+        :param namespace: Namespace to invalidate.
+        """
+        for key in self._namespaces.pop(namespace, ()):
+            self._entries.pop(key, None)
+        return None
+
+    def _drop(self, key: str) -> None:
+        """
+        Remove an entry and its namespace reference.
+
+        :param key: Cache key.
+        """
+        namespace, _ = self._entries.pop(key)
+        keys = self._namespaces.get(namespace)
+        if keys is not None:
+            keys.discard(key)
+        return None
+
+
+class ResponseCache:
+    """
+    Response cache coalescing concurrent misses of a key into a single computation.
+
+    A computation outlives the request that started it, so it runs the route handler with an exit stack of its own:
+    the yield dependencies of the handler, such as the database session, are closed once it has returned.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        """
+        :param backend: Storage of the cached responses.
+        """
+        self.backend = backend
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._generations: Dict[str, int] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def fetch(
+        self, key: str, config: CacheConfig, compute: Compute
+    ) -> Tuple[Optional[CacheEntry], Optional[Response], str]:
+        """
+        Get the response of a key, computing it at most once at a time.
+        Stale entries are served while a single background computation revalidates them.
+
+        :param key: Cache key.
+        :param config: Caching parameters of the route.
+        :param compute: Route handler call, with the exit stack of the handler dependencies.
+        :return: The entry or the uncacheable response, and the cache status. Both are None for a streamed response,
+            which can not be shared: the caller runs the handler itself.
+        """
+        entry = await self.backend.get(key)
+        if entry is not None:
+            if time.time() < entry.expires_at:
+                return entry, None, "HIT"
+            if key not in self._inflight:
+                self._start(key, config, compute)
+            return entry, None, "STALE"
+
+        task = self._inflight.get(key)
+        if task is None:
+            entry, response = await asyncio.shield(self._start(key, config, compute))
+        else:
+            entry, response = await asyncio.shield(task)
+        return entry, response, "MISS"
+
+    def _start(self, key: str, config: CacheConfig, compute: Compute) -> asyncio.Task:
+        """
+        Start the computation of a key, it outlives the request that started it.
+
+        :return: The computation task.
+        """
+        task = asyncio.create_task(self._compute(key, config, compute))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        task.add_done_callback(lambda _: _.cancelled() or _.exception())
+        return task
+
+    async def _compute(
+        self, key: str, config: CacheConfig, compute: Compute
+    ) -> Tuple[Optional[CacheEntry], Optional[Response]]:
+        """
+        Compute and store a response, unless its namespace was invalidated in the meantime.
+
+        :return: The entry, or the response when it can not be cached and is not streamed.
+        """
+        generation = self._generations.get(config.namespace, 0)
+        async with AsyncExitStack() as stack:
+            response = await compute(stack)
+        entry = CacheEntry.from_response(response, config)
+        if entry is None:
+            # A streamed body would be produced after the dependencies of the handler are closed.
+            return None, response if hasattr(response, "body") else None
+        if generation == self._generations.get(config.namespace, 0):
+            await self.backend.set(key, config.namespace, entry)
+        return entry, None
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """
+        Drop the cached responses of namespaces, to be called once a write is committed.
+
+        :param namespaces: Namespaces to invalidate.
+        """
+        for namespace in namespaces:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            await self.backend.invalidate(namespace)
+        return None
+
+    def invalidate_on_commit(self, session: AsyncSession, *namespaces: str) -> None:
+        """
+        Drop the cached responses of namespaces once the transaction of a session is committed.
+
+        :param session: Session of the write.
+        :param namespaces: Namespaces to invalidate.
+        """
+
+        def after_commit(_) -> None:
+            """
+            Schedule the invalidation on the running loop, keeping its task until it is done.
+            """
+            task = asyncio.get_running_loop().create_task(self.invalidate(*namespaces))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        event.listen(session.sync_session, "after_commit", after_commit, once=True)
+        return None
+
+
+def cache_response(ttl: int, stale_ttl: int = 0, namespace: Optional[str] = None) -> Callable:
+    """
+    Cache the responses of a GET endpoint of a router using :class:`CachedRoute`.
+    Responses are shared by all the callers with the same path, query and role: only use it for
+    endpoints whose response does not depend on the principal beyond its role.
+
+    :param ttl: Seconds a response is fresh.
+    :param stale_ttl: Seconds a response is served stale while being revalidated.
+    :param namespace: Invalidation namespace, defaults to the endpoint name.
+    :return: Decorator.
+    """
+
+    def decorator(endpoint: Callable) -> Callable:
+        """
+        Attach the caching parameters to an endpoint.
+
+        :param endpoint: Endpoint function.
+        :return: The endpoint.
+        """
+        endpoint._cache_config = CacheConfig(
+            ttl=ttl, stale_ttl=stale_ttl, namespace=namespace or f"{endpoint.__module__}.{endpoint.__name__}"
+        )
+        return endpoint
+
+    return decorator
+
+
+_token = JWToken()
+
+
+def cache_key(request: Request, config: CacheConfig) -> Optional[str]:
+    """
+    Cache key of a request, built from its path, query and role.
+
+    :param request: FastAPI Request.
+    :param config: Caching parameters of the route.
+    :return: Cache key, None if the request credentials are invalid.
+    """
+    role = None
+    scheme, credentials = get_authorization_scheme_param(request.headers.get("Authorization"))
+    if credentials:
+        try:
+            role = _token.decode(credentials).get("role") if scheme.lower() == "bearer" else None
+        except InvalidJWTTokenException:
+            return None
+    query = "&".join(sorted(request.url.query.split("&")))
+    return f"{config.namespace}:{role}:{request.url.path}?{query}"
+
+
+class CachedRoute(APIRoute):
+    """
+    A route class serving the endpoints decorated with :func:`cache_response` from :data:`response_cache`.
+    Cache hits skip the endpoint dependencies, including rate limiting.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        """
+        Serve the handler of a cached endpoint from :data:`response_cache`.
+
+        :return: Route handler.
+        """
+        handler = super().get_route_handler()
+        config: Optional[CacheConfig] = getattr(self.endpoint, "_cache_config", None)
+        if config is None or "GET" not in self.methods:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            """
+            Answer a request from the cache, computing the response on a miss.
+
+            :param request: FastAPI Request.
+            :return: Response.
+            """
+            key = cache_key(request, config)
+            if key is None:
+                return await handler(request)
+
+            # The shared computation must not depend on the validators of the request that triggered it.
+            scope = {
+                **request.scope,
+                "headers": [header for header in request.scope["headers"] if header[0] not in _CONDITIONAL_HEADERS],
+            }
+            entry, response, cache_status = await response_cache.fetch(
+                key, config, lambda stack: handler(Request({**scope, "fastapi_astack": stack}, request.receive))
+            )
+            if entry is None:
+                return response if response is not None else await handler(request)
+            if entry.not_modified(request):
+                return entry.not_modified_response()
+            encoding = negotiate(request.headers.get("Accept-Encoding")) if settings.COMPRESSION_ENABLED else None
+            return entry.to_response(cache_status, encoding)
+
+        return cached_handler
+
+
+response_cache = ResponseCache(InMemoryCacheBackend(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES))
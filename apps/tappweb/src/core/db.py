@@ -1,20 +1,63 @@
-from contextlib import asynccontextmanager
-from typing import AsyncIterator
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Dict
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import TextClause, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import NullPool
 
 from config import settings
 
 
-engine = create_async_engine(
-    settings.DATABASE_URL, pool_pre_ping=True, pool_recycle=3600, pool_size=10, max_overflow=20
-)
+def _prepared_statement_name() -> str:
+    """
+    A prepared statement name that cannot clash with the statements of other clients on a shared server connection.
+    """
+    return f"__asyncpg_{uuid4().hex}__"
+
+
+def engine_options(
+    pool_size: int,
+    max_overflow: int,
+    pgbouncer: bool = settings.DATABASE_PGBOUNCER,
+    null_pool: bool = settings.DATABASE_NULL_POOL,
+) -> Dict[str, Any]:
+    """
+    Keyword arguments of :func:`create_async_engine` for the application engines.
+
+    Behind PgBouncer in transaction pooling mode, consecutive transactions of a connection may run on different
+    server connections: prepared statements are then uniquely named and not cached by asyncpg, while the compiled
+    SQL cache of SQLAlchemy is kept. Pooling can also be left to PgBouncer alone with ``null_pool``.
+
+    :param pool_size: Connections kept in the pool.
+    :param max_overflow: Connections opened above ``pool_size`` under load.
+    :param pgbouncer: Whether the database is reached through PgBouncer in transaction pooling mode.
+    :param null_pool: Whether to open a connection per checkout instead of pooling them.
+    :return: Engine options.
+    """
+    options: Dict[str, Any] = {"query_cache_size": settings.DATABASE_QUERY_CACHE_SIZE}
+    if pgbouncer:
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _prepared_statement_name,
+        }
+    if null_pool:
+        options["poolclass"] = NullPool
+    else:
+        options.update(pool_pre_ping=True, pool_recycle=3600, pool_size=pool_size, max_overflow=max_overflow)
+    return options
+
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(pool_size=10, max_overflow=20))
 
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
+_job_sessions: Dict[asyncio.AbstractEventLoop, async_sessionmaker] = {}
+
 
-@asynccontextmanager
 async def db_session() -> AsyncIterator[AsyncSession]:
     """
     Database Session Generator.
@@ -30,5 +73,56 @@ async def db_session() -> AsyncIterator[AsyncSession]:
                 raise
 
 
+def bind_job_engine() -> AsyncEngine:
+    """
+    Create an engine with the scheduler connection budget and bind it to the running event loop.
+    Sessions opened with :func:`job_session` on this loop will use it instead of the request pool.
+
+    :return: The job engine.
+    """
+    job_engine = create_async_engine(
+        settings.DATABASE_URL,
+        **engine_options(pool_size=settings.SCHEDULER_DB_POOL_SIZE, max_overflow=settings.SCHEDULER_DB_MAX_OVERFLOW),
+    )
+    _job_sessions[asyncio.get_running_loop()] = async_sessionmaker(job_engine, expire_on_commit=False)
+    return job_engine
+
+
+async def unbind_job_engine() -> None:
+    """
+    Dispose the job engine bound to the running event loop, if any.
+    """
+    session_maker = _job_sessions.pop(asyncio.get_running_loop(), None)
+    if session_maker is not None:
+        await session_maker.kw["bind"].dispose()
+    return None
+
+
+def job_session() -> AsyncSession:
+    """
+    Open a session for a scheduler job.
+    Falls back to the request pool when the running loop has no job engine bound to it.
+
+    :return: A database session.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    return _job_sessions.get(loop, async_session)()
+
+
+def advisory_xact_lock(name: str) -> TextClause:
+    """
+    A statement waiting for the transaction-level advisory lock of a name, released when the transaction ends.
+    Jobs scheduled in every worker take it so that their runs are serialized.
+
+    :param name: Lock name, hashed to the 64-bit key of the lock.
+    :return: ``pg_advisory_xact_lock`` statement.
+    """
+    key = int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big", signed=True)
+    return text("SELECT pg_advisory_xact_lock(:key)").bindparams(key=key)
+
+
 class Base(DeclarativeBase):
     pass
@@ -1,4 +1,5 @@
-from typing import Optional
+import logging
+from typing import Dict, Optional
 
 from fastapi import status
 
@@ -11,6 +12,8 @@ class CustomException(Exception):
     """
 
     status_code = status.HTTP_502_BAD_GATEWAY
+    headers: Optional[Dict[str, str]] = None
+    log_level = logging.ERROR
 
     def __init__(self, message: Optional[str] = constants.SOMETHING_WENT_WRONG) -> None:
         if message:
@@ -19,31 +22,148 @@ class CustomException(Exception):
 
 class BadRequestError(CustomException):
     status_code = status.HTTP_400_BAD_REQUEST
+    log_level = logging.INFO
 
 
 class UnauthorizedError(CustomException):
     status_code = status.HTTP_401_UNAUTHORIZED
+    log_level = logging.INFO
 
 
 class ForbiddenError(CustomException):
     status_code = status.HTTP_403_FORBIDDEN
+    log_level = logging.INFO
 
 
 class NotFoundError(CustomException):
     status_code = status.HTTP_404_NOT_FOUND
+    log_level = logging.INFO
 
 
 class AlreadyExistsError(CustomException):
     status_code = status.HTTP_409_CONFLICT
+    log_level = logging.INFO
 
 
 class UnprocessableEntityError(CustomException):
     status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    log_level = logging.INFO
+
+
+class UnsupportedMediaTypeError(CustomException):
+    """
+    Base class of the errors answered with ``415``.
+    """
+
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    log_level = logging.INFO
+
+
+class TooManyRequestsError(CustomException):
+    """
+    Base class of the errors answered with ``429``.
+    """
+
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    log_level = logging.INFO
 
 
 class InvalidJWTTokenException(CustomException):
     status_code = status.HTTP_401_UNAUTHORIZED
+    log_level = logging.INFO
 
 
 class InvalidSQLQueryException(CustomException):
     pass
+
+
+class IdempotencyKeyInProgressException(AlreadyExistsError):
+    """
+    Raised when the first request of an idempotency key is still running.
+    """
+
+    def __init__(
+        self, message: Optional[str] = constants.IDEMPOTENCY_KEY_IN_PROGRESS, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        :param message: Error message.
+        :param headers: Response headers, e.g. ``Retry-After``.
+        """
+        super().__init__(message)
+        self.headers = headers
+
+
+class IdempotencyKeyReusedException(UnprocessableEntityError):
+    """
+    Raised when an idempotency key is sent again with another request body.
+    """
+
+    def __init__(self, message: Optional[str] = constants.IDEMPOTENCY_KEY_REUSED) -> None:
+        """
+        :param message: Error message.
+        """
+        super().__init__(message)
+
+
+class InvalidCursorException(BadRequestError):
+    """
+    Raised for a malformed keyset pagination cursor.
+    """
+
+    def __init__(self, message: Optional[str] = constants.INVALID_CURSOR) -> None:
+        """
+        :param message: Error message.
+        """
+        super().__init__(message)
+
+
+class InvalidIdempotencyKeyException(BadRequestError):
+    """
+    Raised for an empty or oversized idempotency key.
+    """
+
+    def __init__(self, message: Optional[str] = constants.INVALID_IDEMPOTENCY_KEY) -> None:
+        """
+        :param message: Error message.
+        """
+        super().__init__(message)
+
+
+class MemoryTracingNotStartedException(BadRequestError):
+    """
+    Raised when memory allocations are compared or stopped before tracing was started.
+    """
+
+    def __init__(self, message: Optional[str] = constants.MEMORY_TRACING_NOT_STARTED) -> None:
+        """
+        :param message: Error message.
+        """
+        super().__init__(message)
+
+
+class ProfileRunningException(AlreadyExistsError):
+    """
+    Raised when a profile is requested while another one is running.
+    """
+
+    def __init__(self, message: Optional[str] = constants.PROFILE_RUNNING) -> None:
+        """
+        :param message: Error message.
+        """
+        super().__init__(message)
+
+
+class RateLimitExceededException(TooManyRequestsError):
+    """
+    Raised when the token bucket of a principal is empty.
+    """
+
+    def __init__(
+        self, message: Optional[str] = constants.RATE_LIMIT_EXCEEDED, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        :param message: Error message.
+        :param headers: Rate limit headers of the response.
+        """
+        super().__init__(message)
+        self.headers = headers
@@ -0,0 +1,302 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+
+from app.app.models.idempotency import IdempotencyKey
+from config import settings
+from core.db import engine
+from core.exceptions import (
+    IdempotencyKeyInProgressException,
+    IdempotencyKeyReusedException,
+    InvalidIdempotencyKeyException,
+)
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+_UNSTORED_HEADERS = {b"set-cookie", b"retry-after", b"ratelimit-limit", b"ratelimit-remaining", b"ratelimit-reset"}
+
+
+@dataclass(frozen=True)
+class IdempotencyConfig:
+    """
+    Idempotency parameters of a route, the response of a key is replayed for ``ttl`` seconds.
+    """
+
+    ttl: int
+
+
+class IdempotencyStore:
+    """
+    Runs each idempotency key at most once across the workers.
+
+    The first request claims the key with an upsert, later ones get the stored response or, while the first one is in
+    flight, wait for it: on an in-process event when it runs in the same worker, by polling the table otherwise.
+    A claim that outlives ``lock_timeout``, for instance of a crashed worker, can be taken over.
+    """
+
+    def __init__(self, lock_timeout: float, wait_timeout: float, poll_interval: float) -> None:
+        """
+        :param lock_timeout: Seconds a claim is held before it can be taken over.
+        :param wait_timeout: Seconds a request waits for the first request of its key.
+        :param poll_interval: Seconds between two reads of a key claimed by another worker.
+        """
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._events: Dict[bytes, asyncio.Event] = {}
+
+    async def execute(
+        self, request: Request, key: bytes, config: IdempotencyConfig, handler: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        """
+        Run the handler for the first request of a key, replay its response for the others.
+
+        :param request: FastAPI Request.
+        :param key: Digest of the idempotency key and its scope.
+        :param config: Idempotency parameters of the route.
+        :param handler: Route handler.
+        :return: The handler response or the stored one.
+        :raises IdempotencyKeyReusedException: If the key was used for a request with another body.
+        :raises IdempotencyKeyInProgressException: If the first request is still running after ``wait_timeout``.
+        """
+        request_hash = hashlib.sha256(await request.body()).digest()
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            claimed, record = await self._claim(key, request_hash, config)
+            if claimed:
+                return await self._run(request, key, handler)
+            if record is None:
+                # Released between the claim and the read, claim it again.
+                continue
+            if record.request_hash != request_hash:
+                raise IdempotencyKeyReusedException
+            if record.status_code is not None:
+                return self._replay(record)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyKeyInProgressException(headers={"Retry-After": "1"})
+            await self._wait(key, min(remaining, self.poll_interval))
+
+    async def _claim(self, key: bytes, request_hash: bytes, config: IdempotencyConfig) -> Tuple[bool, Optional[Row]]:
+        """
+        Claim a key unless it is in flight within its lock or already has a response.
+
+        :return: Whether the key was claimed, and its current row otherwise.
+        """
+        now = time.time()
+        table = IdempotencyKey.__table__.c
+        values = dict(
+            request_hash=request_hash,
+            status_code=None,
+            headers=None,
+            body=None,
+            locked_until=now + self.lock_timeout,
+            expires_at=now + config.ttl,
+        )
+        query = (
+            insert(IdempotencyKey)
+            .values(key=key, **values)
+            .on_conflict_do_update(
+                index_elements=[table.key],
+                set_=values,
+                where=or_(table.expires_at < now, table.status_code.is_(None) & (table.locked_until < now)),
+            )
+            .returning(table.key)
+        )
+        async with engine.begin() as connection:
+            if (await connection.execute(query)).first() is not None:
+                return True, None
+            record = (await connection.execute(select(IdempotencyKey.__table__).where(table.key == key))).first()
+        return False, record
+
+    async def _run(self, request: Request, key: bytes, handler: Callable[[Request], Awaitable[Response]]) -> Response:
+        """
+        Run the handler of a claimed key. The response is stored once the dependencies of the request are closed,
+        that is after the transaction of the request is committed, and the key is released if anything failed.
+        """
+        event = self._events[key] = asyncio.Event()
+        outcome: Dict[str, Response] = {}
+
+        async def finish(exc_type, exc, traceback) -> bool:
+            """
+            Exit callback of the request dependencies, storing the response or releasing the key.
+
+            :return: False, exceptions are not suppressed.
+            """
+            try:
+                response = outcome.get("response")
+                if exc_type is None and response is not None and self._storable(response):
+                    await self._store(key, response)
+                else:
+                    await self._release(key)
+            finally:
+                self._events.pop(key, None)
+                event.set()
+            return False
+
+        request.scope["fastapi_astack"].push_async_exit(finish)
+        outcome["response"] = await handler(request)
+        return outcome["response"]
+
+    @staticmethod
+    def _storable(response: Response) -> bool:
+        """
+        Whether a response can be replayed: successful and rendered. Failures release the key so that the client can
+        retry them.
+        """
+        return 200 <= response.status_code < 300 and hasattr(response, "body")
+
+    @staticmethod
+    async def _store(key: bytes, response: Response) -> None:
+        """
+        Store the response of a key.
+        """
+        headers = [
+            [name.decode("latin-1"), value.decode("latin-1")]
+            for name, value in response.raw_headers
+            if name not in _UNSTORED_HEADERS
+        ]
+        table = IdempotencyKey.__table__
+        query = (
+            table.update()
+            .where(table.c.key == key, table.c.status_code.is_(None))
+            .values(status_code=response.status_code, headers=headers, body=response.body)
+        )
+        async with engine.begin() as connection:
+            await connection.execute(query)
+        return None
+
+    @staticmethod
+    async def _release(key: bytes) -> None:
+        """
+        Drop the claim of a key whose execution failed.
+        """
+        table = IdempotencyKey.__table__.c
+        async with engine.begin() as connection:
+            await connection.execute(delete(IdempotencyKey).where(table.key == key, table.status_code.is_(None)))
+        return None
+
+    @staticmethod
+    def _replay(record: Row) -> Response:
+        """
+        Render a stored response.
+        """
+        response = Response(content=record.body, status_code=record.status_code)
+        response.raw_headers = [
+            *((name.encode("latin-1"), value.encode("latin-1")) for name, value in record.headers),
+            (b"idempotent-replayed", b"true"),
+        ]
+        return response
+
+    async def _wait(self, key: bytes, timeout: float) -> None:
+        """
+        Wait for an in-flight execution of this worker to finish, or for the next poll.
+        """
+        event = self._events.get(key)
+        if event is None:
+            await asyncio.sleep(timeout)
+            return None
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return None
+
+    @staticmethod
+    async def purge() -> int:
+        """
+        Delete the expired keys.
+
+        :return: Number of deleted keys.
+        """
+        async with engine.begin() as connection:
+            result = await connection.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.__table__.c.expires_at < time.time())
+            )
+        return result.rowcount
+
+
+def idempotent(ttl: int = settings.IDEMPOTENCY_TTL) -> Callable:
+    """
+    Make a write endpoint of a router using :class:`IdempotentRoute` honour the ``Idempotency-Key`` header.
+    Keys are scoped to the credentials, method and path of the request, and a key sent again with another body is
+    rejected. Requests without the header are not affected.
+
+    :param ttl: Seconds a response is replayed.
+    :return: Decorator.
+    """
+
+    def decorator(endpoint: Callable) -> Callable:
+        """
+        Attach the idempotency parameters to an endpoint.
+
+        :param endpoint: Endpoint function.
+        :return: The endpoint.
+        """
+        endpoint._idempotency_config = IdempotencyConfig(ttl=ttl)
+        return endpoint
+
+    return decorator
+
+
+def idempotency_key(request: Request, value: str) -> bytes:
+    """
+    Digest of an idempotency key and its scope.
+
+    :param request: FastAPI Request.
+    :param value: Value of the ``Idempotency-Key`` header.
+    :return: Key digest.
+    """
+    scope = "\n".join((request.headers.get("Authorization", ""), request.method, request.url.path, value))
+    return hashlib.sha256(scope.encode()).digest()
+
+
+class IdempotentRoute(APIRoute):
+    """
+    A route class running the endpoints decorated with :func:`idempotent` through :data:`idempotency_store`.
+    Replayed responses skip the endpoint dependencies, and so the service layer.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        """
+        Run the handler of an idempotent write endpoint through :data:`idempotency_store`.
+
+        :return: Route handler.
+        """
+        handler = super().get_route_handler()
+        config: Optional[IdempotencyConfig] = getattr(self.endpoint, "_idempotency_config", None)
+        if config is None or not self.methods & {"POST", "PUT", "PATCH", "DELETE"}:
+            return handler
+
+        async def idempotent_handler(request: Request) -> Response:
+            """
+            Run a request once per idempotency key, requests without the header run as usual.
+
+            :param request: FastAPI Request.
+            :return: Response.
+            :raises InvalidIdempotencyKeyException: If the key is empty or longer than 255 characters.
+            """
+            value = request.headers.get(IDEMPOTENCY_HEADER)
+            if value is None:
+                return await handler(request)
+            if not 0 < len(value) <= 255:
+                raise InvalidIdempotencyKeyException
+            return await idempotency_store.execute(request, idempotency_key(request, value), config, handler)
+
+        return idempotent_handler
+
+
+idempotency_store = IdempotencyStore(
+    lock_timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+    poll_interval=settings.IDEMPOTENCY_POLL_INTERVAL,
+)
@@ -0,0 +1,343 @@
+import json
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from config import settings
+from core.db import Base, engine
+
+
+_recording: ContextVar[bool] = ContextVar("recording_query_shapes", default=False)
+
+_IN_LIST = re.compile(r"\$\d+(?:::[\w\[\]]+)?(?:,\s*\$\d+(?:::[\w\[\]]+)?)+")
+_PLACEHOLDER = re.compile(r"\$(\d+)")
+_PREDICATE = re.compile(
+    r"(?:\b\w+\.)?\"?(\w+)\"?\)?(?:::[\w ]+)?\s*(=|<>|<=|>=|<|>|~~\*?|!~~\*?| IS NULL| IS NOT NULL| = ANY)"
+)
+_BTREE_OPERATORS = ("=", "= ANY", "IS NULL", "<", "<=", ">", ">=")
+_SORT_KEY = re.compile(r"^(?:\w+\.)?\"?(\w+)\"?(?:\s+(DESC|ASC))?")
+
+
+def shape_of(statement: str) -> str:
+    """
+    Shape of a statement, expanded ``IN`` lists are collapsed so that they do not depend on the number of values.
+
+    :param statement: SQL statement with positional placeholders.
+    :return: Query shape.
+    """
+    return _IN_LIST.sub("$n, ...", statement)
+
+
+class QueryRecorder:
+    """
+    Records the distinct query shapes run by :meth:`Repository.get` with a few parameter samples each.
+    Shapes are appended as JSON lines to ``path``, one line per shape and process, by :meth:`dump`.
+    """
+
+    def __init__(self, path: str, max_samples: int = 5) -> None:
+        """
+        :param path: File the recorded shapes are written to.
+        :param max_samples: Parameter samples kept per shape.
+        """
+        self.path = path
+        self.max_samples = max_samples
+        self.shapes: Dict[str, List[Tuple[str, list]]] = {}
+
+    def start(self) -> None:
+        """
+        Start recording, the engine is only instrumented while recording.
+        """
+        if not event.contains(engine.sync_engine, "before_cursor_execute", self._record):
+            event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+        return None
+
+    def stop(self) -> None:
+        """
+        Stop recording and dump the recorded shapes.
+        """
+        if event.contains(engine.sync_engine, "before_cursor_execute", self._record):
+            event.remove(engine.sync_engine, "before_cursor_execute", self._record)
+        self.dump()
+        return None
+
+    @contextmanager
+    def recording(self) -> Iterator["QueryRecorder"]:
+        """
+        Record the query shapes of a block, such as a test or a benchmark session.
+        """
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    def _record(self, connection, cursor, statement: str, parameters: Any, context, executemany: bool) -> None:
+        """
+        Engine ``before_cursor_execute`` listener, only records the statements run by a repository.
+        """
+        if not _recording.get() or executemany or not statement.lstrip().upper().startswith("SELECT"):
+            return None
+        samples = self.shapes.setdefault(shape_of(statement), [])
+        if len(samples) < self.max_samples:
+            samples.append((statement, list(parameters or ())))
+        return None
+
+    def dump(self) -> None:
+        """
+        Append the recorded shapes to the shapes file and reset them.
+        """
+        if not self.shapes:
+            return None
+        with open(self.path, "a") as file:
+            for shape, samples in self.shapes.items():
+                file.write(json.dumps({"shape": shape, "samples": samples}, default=str) + "\n")
+        self.shapes = {}
+        return None
+
+
+def record_query_shapes(func: Callable) -> Callable:
+    """
+    Mark the queries run by a repository coroutine as recordable by :class:`QueryRecorder`.
+
+    :param func: Repository coroutine function.
+    :return: Wrapped coroutine function.
+    """
+
+    @wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        """
+        Run the method with the statements it executes recorded.
+        """
+        token = _recording.set(True)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _recording.reset(token)
+
+    return wrapper
+
+
+def load_shapes(path: str) -> Dict[str, List[Tuple[str, list]]]:
+    """
+    Load and merge the shapes recorded by every process.
+
+    :param path: Shapes file.
+    :return: Parameter samples of every shape.
+    """
+    shapes: Dict[str, List[Tuple[str, list]]] = {}
+    if not os.path.exists(path):
+        return shapes
+    with open(path) as file:
+        for line in file:
+            record = json.loads(line)
+            samples = shapes.setdefault(record["shape"], [])
+            samples.extend(tuple(sample) for sample in record["samples"] if tuple(sample) not in samples)
+    return shapes
+
+
+def _literal(value: Any) -> str:
+    """
+    Render a recorded parameter as an untyped SQL literal, the placeholder casts give it its type.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, list):
+        value = "{" + ",".join(json.dumps(str(item)) for item in value) + "}"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def inline(statement: str, parameters: Sequence[Any]) -> str:
+    """
+    Inline the parameters of a statement, so that it can be explained without the original parameter types.
+
+    :param statement: SQL statement with positional placeholders.
+    :param parameters: Positional parameters.
+    :return: Executable SQL statement.
+    """
+    return _PLACEHOLDER.sub(lambda match: _literal(parameters[int(match[1]) - 1]), statement)
+
+
+@dataclass
+class IndexProposal:
+    """
+    An index proposed for a table, with the plans it should improve.
+    """
+
+    table: str
+    columns: Tuple[str, ...]
+    reasons: List[str] = field(default_factory=list)
+    actual_ms: float = 0.0
+    buffers: int = 0
+    cost_before: Optional[float] = None
+    cost_after: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        """
+        Index name, truncated to the PostgreSQL identifier length.
+        """
+        return f"ix_{self.table}_{'_'.join(self.columns)}"[:63]
+
+    @property
+    def ddl(self) -> str:
+        """
+        Statement creating the index without blocking writes.
+        """
+        return f"CREATE INDEX CONCURRENTLY {self.name} ON {self.table} ({', '.join(self.columns)})"
+
+
+def _walk(plan: dict) -> Iterator[dict]:
+    """
+    Nodes of a plan, depth first.
+    """
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _walk(child)
+
+
+def _columns(table: str, expression: str) -> Tuple[List[str], List[str]]:
+    """
+    Columns of a table compared in a plan filter, split into equality and range predicates.
+    """
+    known = Base.metadata.tables[table].c.keys() if table in Base.metadata.tables else []
+    equality, ranges = [], []
+    for column, operator in _PREDICATE.findall(expression):
+        operator = operator.strip()
+        if column not in known or column in equality or column in ranges or operator not in _BTREE_OPERATORS:
+            continue
+        (equality if operator in ("=", "= ANY", "IS NULL") else ranges).append(column)
+    return equality, ranges
+
+
+def _proposals(plan: dict, large_tables: Dict[str, float]) -> List[Tuple[str, Tuple[str, ...], str, dict]]:
+    """
+    Indexes that would avoid the sequential scans and sorts of large tables in a plan.
+
+    :return: Table, columns, reason and plan node of every proposal.
+    """
+    proposals = []
+    for node in _walk(plan):
+        if node["Node Type"] not in ("Sort", "Incremental Sort"):
+            continue
+        scans = [child for child in _walk(node) if child["Node Type"] == "Seq Scan"]
+        if len(scans) != 1 or scans[0]["Relation Name"] not in large_tables:
+            continue
+        table = scans[0]["Relation Name"]
+        equality, _ = _columns(table, scans[0].get("Filter", ""))
+        keys = [_SORT_KEY.match(key) for key in node.get("Sort Key", ())]
+        known = Base.metadata.tables[table].c.keys() if table in Base.metadata.tables else []
+        sort_columns = [match[1] for match in keys if match and match[1] in known and match[1] not in equality]
+        if sort_columns:
+            scans[0]["_advised"] = True
+            reason = f"sort on {', '.join(node['Sort Key'])}"
+            proposals.append((table, tuple(equality + sort_columns), reason, node))
+
+    for node in _walk(plan):
+        if node["Node Type"] != "Seq Scan" or node.get("_advised") or node["Relation Name"] not in large_tables:
+            continue
+        if "Filter" not in node:
+            continue
+        table = node["Relation Name"]
+        equality, ranges = _columns(table, node["Filter"])
+        if equality or ranges:
+            reason = f"seq scan filtering {node.get('Rows Removed by Filter', 0)} rows"
+            proposals.append((table, tuple(equality + ranges[:1]), reason, node))
+    return proposals
+
+
+async def _explain(connection: AsyncConnection, statement: str, analyze: bool) -> dict:
+    """
+    Plan of a statement, executed when analyzed.
+    """
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    plan = (await connection.exec_driver_sql(f"EXPLAIN ({options}) {statement}")).scalar()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+
+async def advise(shapes: Dict[str, List[Tuple[str, list]]], min_rows: int, samples: int) -> List[IndexProposal]:
+    """
+    Explain the recorded shapes with their parameter samples and propose indexes for the sequential scans and sorts
+    of tables with at least ``min_rows`` rows. Estimated gains use hypothetical indexes when ``hypopg`` is installed.
+
+    :param shapes: Parameter samples of every shape.
+    :param min_rows: Rows from which a table is considered large.
+    :param samples: Parameter samples explained per shape.
+    :return: Proposed indexes, most expensive plans first.
+    """
+    proposals: Dict[Tuple[str, Tuple[str, ...]], IndexProposal] = {}
+    async with engine.connect() as connection:
+        large_tables = dict(
+            (
+                await connection.execute(
+                    text("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p') AND reltuples >= :rows"),
+                    {"rows": min_rows},
+                )
+            ).all()
+        )
+        hypopg = bool(await connection.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")))
+        await connection.rollback()
+        statements: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+
+        for shape, recorded in shapes.items():
+            for statement, parameters in recorded[:samples]:
+                sql = inline(statement, parameters)
+                async with connection.begin() as transaction:
+                    plan = await _explain(connection, sql, analyze=True)
+                    await transaction.rollback()
+                for table, columns, reason, node in _proposals(plan, large_tables):
+                    proposal = proposals.setdefault((table, columns), IndexProposal(table, columns))
+                    if reason not in proposal.reasons:
+                        proposal.reasons.append(reason)
+                    proposal.actual_ms += node.get("Actual Total Time", 0.0) * node.get("Actual Loops", 1)
+                    proposal.buffers += node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+                    statements.setdefault((table, columns), []).append(sql)
+
+        if hypopg:
+            for key, proposal in proposals.items():
+                before = after = 0.0
+                async with connection.begin() as transaction:
+                    for sql in statements[key]:
+                        before += (await _explain(connection, sql, analyze=False))["Total Cost"]
+                    await connection.execute(
+                        text("SELECT hypopg_create_index(:ddl)"),
+                        {"ddl": f"CREATE INDEX ON {proposal.table} ({', '.join(proposal.columns)})"},
+                    )
+                    for sql in statements[key]:
+                        after += (await _explain(connection, sql, analyze=False))["Total Cost"]
+                    await connection.execute(text("SELECT hypopg_reset()"))
+                    await transaction.rollback()
+                proposal.cost_before, proposal.cost_after = before, after
+    await engine.dispose()
+    return sorted(proposals.values(), key=lambda proposal: proposal.actual_ms, reverse=True)
+
+
+def render_migration(proposals: List[IndexProposal]) -> Tuple[str, str, str]:
+    """
+    Render the proposals as the body of a migration using the online migration helpers.
+
+    :param proposals: Proposed indexes.
+    :return: Imports, upgrade and downgrade bodies.
+    """
+    imports = "from core.online_migrations import create_index_concurrently, drop_index_concurrently\n"
+    upgrade, downgrade = [], []
+    for proposal in proposals:
+        upgrade.append(f"    # {'; '.join(proposal.reasons)}")
+        upgrade.append(
+            f"    create_index_concurrently({proposal.name!r}, {proposal.table!r}, {list(proposal.columns)!r})"
+        )
+        downgrade.append(f"    drop_index_concurrently({proposal.name!r}, {proposal.table!r})")
+    return imports, "\n".join(upgrade) or "    pass", "\n".join(reversed(downgrade)) or "    pass"
+
+
+query_recorder = QueryRecorder(settings.QUERY_SHAPES_PATH)
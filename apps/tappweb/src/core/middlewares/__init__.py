@@ -0,0 +1,6 @@
+from core.middlewares.admission import AdmissionControlMiddleware
+from core.middlewares.compression import CompressionMiddleware
+from core.middlewares.tracing import TracingMiddleware
+
+
+__all__ = ["AdmissionControlMiddleware", "CompressionMiddleware", "TracingMiddleware"]
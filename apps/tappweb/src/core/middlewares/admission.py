@@ -0,0 +1,146 @@
+import asyncio
+import heapq
+from itertools import count
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import constants
+from core.types import RequestPriority
+
+
+class AdmissionLimiter:
+    """
+    A concurrency limiter with a bounded priority wait queue.
+    Waiters are admitted by priority and then in arrival order, :attr:`RequestPriority.LOW` never waits.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int) -> None:
+        """
+        :param max_concurrency: Maximum number of requests processed at once.
+        :param max_queue: Maximum number of requests waiting for a slot.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.queued = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = count()
+
+    async def acquire(self, priority: RequestPriority, timeout: float) -> bool:
+        """
+        Acquire a slot, waiting in the queue at most ``timeout`` seconds.
+
+        :param priority: Priority class of the request.
+        :param timeout: Queue deadline in seconds.
+        :return: Whether a slot was acquired.
+        """
+        if self.in_flight < self.max_concurrency and not self.queued:
+            self.in_flight += 1
+            return True
+        if priority is RequestPriority.LOW or self.queued >= self.max_queue:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self.queued += 1
+        admitted = False
+        try:
+            async with asyncio.timeout(timeout):
+                await waiter
+            admitted = True
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                self.queued -= 1
+                waiter.cancel()
+            elif not admitted:
+                # The slot was handed over while the wait was timing out or being cancelled, pass it on.
+                self.release()
+
+    def release(self) -> None:
+        """
+        Release a slot, handing it over to the next live waiter if any.
+        """
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self.queued -= 1
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class AdmissionControlMiddleware:
+    """
+    Caps the in-flight requests of a worker, queues a bounded number of requests for a short while and
+    sheds the rest with a fast ``503`` and a ``Retry-After`` header.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+        exempt_paths: Iterable[str] = (),
+        priorities: Optional[Dict[str, RequestPriority]] = None,
+    ) -> None:
+        """
+        :param app: ASGI application.
+        :param max_concurrency: Maximum number of requests processed at once.
+        :param max_queue: Maximum number of requests waiting for a slot.
+        :param queue_timeout: Seconds a request may wait for a slot.
+        :param retry_after: Seconds advertised in the ``Retry-After`` header of shed requests.
+        :param exempt_paths: Paths bypassing admission control, e.g. health checks.
+        :param priorities: Priority classes by path prefix, unmatched paths are :attr:`RequestPriority.NORMAL`.
+        """
+        self.app = app
+        self.limiter = AdmissionLimiter(max_concurrency, max_queue)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.exempt_paths = frozenset(exempt_paths)
+        self.priorities = sorted((priorities or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def priority(self, path: str) -> RequestPriority:
+        """
+        Priority class of a path, the longest matching prefix wins.
+
+        :param path: Request path.
+        :return: Priority class.
+        """
+        for prefix, priority in self.priorities:
+            if path.startswith(prefix):
+                return priority
+        return RequestPriority.NORMAL
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Process a request once it is admitted, or shed it with a ``503``.
+
+        :param scope: ASGI connection scope.
+        :param receive: ASGI receive channel.
+        :param send: ASGI send channel.
+        """
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.limiter.acquire(self.priority(scope["path"]), self.queue_timeout):
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"error": constants.SERVICE_OVERLOADED},
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release()
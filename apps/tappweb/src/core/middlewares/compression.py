@@ -0,0 +1,96 @@
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.utils.compression import StreamCompressor, compress, is_compressible, negotiate, set_content_encoding
+from core.utils.conditional import not_modified_etag
+
+
+class CompressionMiddleware:
+    """
+    A pure ASGI middleware compressing the responses with the content coding negotiated from ``Accept-Encoding``.
+
+    Bodies sent at once are compressed when they reach ``minimum_size`` bytes, smaller ones cost more CPU than they
+    save bandwidth. Streamed bodies are compressed chunk by chunk as they are sent. Responses already encoded, for
+    instance served from the response cache, are left untouched.
+
+    Compressed responses get the ``ETag`` of the identity body suffixed with their content coding, and ``304``
+    responses the suffixed ``ETag`` when the client copy is compressed.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int) -> None:
+        """
+        :param app: ASGI application.
+        :param minimum_size: Minimum body size in bytes to compress.
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Send the response compressed with the content coding accepted by the client.
+
+        :param scope: ASGI connection scope.
+        :param receive: ASGI receive channel.
+        :param send: ASGI send channel.
+        """
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+
+        async def send_wrapper(message: Message) -> None:
+            """
+            Compress the response messages, the start message is held until the first body message.
+
+            :param message: ASGI message.
+            """
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message["headers"]))
+                if message["status"] == 304 and "etag" in headers:
+                    etag = not_modified_etag(request_headers.get("if-none-match"), headers["etag"], encoding.value)
+                    headers["ETag"] = etag
+                    await send({**message, "headers": headers.raw})
+                    return
+                length = headers.get("content-length")
+                compressible = message["status"] >= 200 and message["status"] not in (204, 304)
+                if compressible and is_compressible(headers, int(length) if length else None, self.minimum_size):
+                    # Held until the first chunk tells whether the body is streamed.
+                    start = message
+                    return
+                await send(message)
+                return
+
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=list(start["headers"]))
+                if not more_body:
+                    if len(body) >= self.minimum_size:
+                        body = compress(body, encoding)
+                        set_content_encoding(headers, encoding, len(body))
+                    await send({**start, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = StreamCompressor(encoding)
+                set_content_encoding(headers, encoding, None)
+                await send({**start, "headers": headers.raw})
+
+            body = compressor.compress(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
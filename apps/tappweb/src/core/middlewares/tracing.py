@@ -0,0 +1,53 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.tracing import tracer
+from core.types import SpanKind
+
+
+class TracingMiddleware:
+    """
+    A pure ASGI middleware running each HTTP request in the root span of its trace, continuing the trace of the
+    caller from its ``traceparent`` header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        :param app: ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Process a request in a server span, when tracing is enabled and the trace is sampled.
+
+        :param scope: ASGI connection scope.
+        :param receive: ASGI receive channel.
+        :param send: ASGI send channel.
+        """
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = next((value for name, value in scope["headers"] if name == b"traceparent"), b"")
+        attributes = {"http.method": scope["method"], "http.target": scope["path"]}
+        with tracer.start_trace(
+            f"{scope['method']} {scope['path']}", SpanKind.SERVER, traceparent.decode("latin-1"), attributes
+        ) as span:
+            if span is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "ERROR"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.name = f"{scope['method']} {route.path}"
+                    span.set_attribute("http.route", route.path)
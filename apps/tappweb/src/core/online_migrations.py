@@ -0,0 +1,152 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence, Union
+
+from alembic import op
+from rich import print
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from config import settings
+
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def is_lock_timeout(exc: BaseException) -> bool:
+    """
+    Whether an error was raised because ``lock_timeout`` expired.
+
+    :param exc: Raised exception.
+    :return: Whether the lock could not be acquired in time.
+    """
+    return isinstance(exc, DBAPIError) and getattr(exc.orig, "pgcode", None) == LOCK_NOT_AVAILABLE
+
+
+@contextmanager
+def timeouts(lock_timeout: Optional[int] = None, statement_timeout: Optional[int] = None) -> Iterator[None]:
+    """
+    Override the session timeouts of the migration connection for a block, then restore the online mode ones.
+
+    :param lock_timeout: Milliseconds to wait for a lock, 0 to wait forever.
+    :param statement_timeout: Milliseconds a statement may run, 0 for no limit.
+    """
+    connection = op.get_bind()
+    values = {"lock_timeout": lock_timeout, "statement_timeout": statement_timeout}
+    previous = {
+        name: connection.execute(text(f"SHOW {name}")).scalar() for name, value in values.items() if value is not None
+    }
+    for name, value in values.items():
+        if value is not None:
+            connection.execute(text(f"SET {name} = {int(value)}"))
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            connection.execute(text(f"SET {name} = '{value}'"))
+
+
+def _index_state(name: str) -> Optional[bool]:
+    """
+    Validity of an index, None if it does not exist.
+    """
+    return (
+        op.get_bind()
+        .execute(
+            text("SELECT indisvalid FROM pg_index JOIN pg_class ON pg_class.oid = indexrelid WHERE relname = :name"),
+            {"name": name},
+        )
+        .scalar()
+    )
+
+
+def create_index_concurrently(name: str, table: str, columns: Sequence[Union[str, Any]], **kwargs: Any) -> None:
+    """
+    Build an index without blocking writes on its table, outside of the migration transaction.
+    An invalid index left by an interrupted build is dropped and rebuilt, a valid one is kept.
+
+    :param name: Index name.
+    :param table: Table name.
+    :param columns: Indexed columns or expressions.
+    :param kwargs: Options passed to :meth:`Operations.create_index`.
+    """
+    with op.get_context().autocommit_block(), timeouts(statement_timeout=0):
+        state = _index_state(name)
+        if state:
+            print(f"[bold yellow]Index {name} already exists, skipping.[/bold yellow]")
+            return None
+        if state is False:
+            print(f"[bold yellow]Dropping invalid index {name} left by an interrupted build.[/bold yellow]")
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        print(f"[bold yellow]Building index {name} on {table} concurrently.[/bold yellow]")
+        op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+    return None
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    """
+    Drop an index without blocking the queries on its table, outside of the migration transaction.
+
+    :param name: Index name.
+    :param table: Table name.
+    """
+    with op.get_context().autocommit_block(), timeouts(statement_timeout=0):
+        if _index_state(name) is not None:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    return None
+
+
+def backfill(
+    table: str,
+    assignments: str,
+    where: str,
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+    key: str = "id",
+    **params: Any,
+) -> int:
+    """
+    Update the rows of a table matching a condition in batches, each batch committed on its own so that
+    row locks are only held for one batch. Rows locked by the application are skipped and picked up by a
+    later batch, the condition must stop matching the rows once they are updated.
+
+    Example: ``backfill("users", "status = 'active'", "status IS NULL")``
+
+    :param table: Table name.
+    :param assignments: ``SET`` clause of the update.
+    :param where: Condition selecting the rows left to update.
+    :param batch_size: Rows per batch, defaults to ``MIGRATION_BACKFILL_BATCH_SIZE``.
+    :param pause: Seconds to sleep between batches, defaults to ``MIGRATION_BACKFILL_PAUSE``.
+    :param key: Unique column identifying the rows.
+    :param params: Bound parameters of the assignments and condition.
+    :return: Number of updated rows.
+    """
+    batch_size = batch_size or settings.MIGRATION_BACKFILL_BATCH_SIZE
+    pause = settings.MIGRATION_BACKFILL_PAUSE if pause is None else pause
+    statement = text(
+        f"UPDATE {table} SET {assignments} WHERE {key} IN "
+        f"(SELECT {key} FROM {table} WHERE {where} LIMIT :batch_size FOR UPDATE SKIP LOCKED)"
+    )
+    connection = op.get_bind()
+    with timeouts(statement_timeout=0):
+        remaining = connection.execute(text(f"SELECT count(*) FROM {table} WHERE {where}"), params).scalar()
+    print(f"[bold yellow]Backfilling {remaining} rows of {table}.[/bold yellow]")
+
+    updated, started = 0, time.monotonic()
+    with op.get_context().autocommit_block():
+        while True:
+            rowcount = connection.execute(statement, {**params, "batch_size": batch_size}).rowcount
+            if not rowcount:
+                # Either done, or the rows left are locked by the application for now.
+                if not connection.execute(
+                    text(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE {where})"), params
+                ).scalar():
+                    break
+                time.sleep(pause or 1)
+                continue
+            updated += rowcount
+            elapsed = time.monotonic() - started
+            print(f"{table}: {updated}/{remaining} rows, {updated / elapsed:.0f} rows/s")
+            time.sleep(pause)
+    print(f"[bold green]Backfilled {updated} rows of {table}.[/bold green]")
+    return updated
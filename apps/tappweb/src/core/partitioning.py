@@ -0,0 +1,173 @@
+import re
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple, Type
+
+from sqlalchemy import func, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column
+
+from core.db import Base, advisory_xact_lock
+from core.utils import logger
+
+
+_PARTITION_NAME = re.compile(r"^(?P<parent>.+)_p(?P<start>\d{8})$")
+
+
+class RangePartitionMixin:
+    """
+    A mixin class to partition the table of a model by range of ``created_at``.
+    List it before :class:`TimeStampMixin`, ``created_at`` becomes part of the primary key as Postgres requires, and
+    before the mixins with table arguments of their own, such as :class:`SearchableMixin`: they are kept.
+
+    Partitions cover ``__partition_interval__`` (``day``, ``week`` or ``month``), ``__partition_premake__`` future
+    partitions are kept ahead, and partitions older than ``__partition_retention__`` intervals are detached,
+    then dropped when ``__partition_drop__`` is set.
+    """
+
+    __partition_interval__: str = "month"
+    __partition_premake__: int = 2
+    __partition_retention__: Optional[int] = None
+    __partition_drop__: bool = False
+
+    created_at: Mapped[datetime] = mapped_column(
+        primary_key=True, default=datetime.utcnow, server_default=func.now(), nullable=False
+    )
+
+    @declared_attr.directive
+    def __table_args__(cls) -> tuple:
+        """
+        Partition the table, merged with the table arguments of the mixins listed after this one.
+        """
+        inherited = getattr(super(RangePartitionMixin, cls), "__table_args__", None) or ()
+        if isinstance(inherited, dict):
+            inherited = (inherited,)
+        options = inherited[-1] if inherited and isinstance(inherited[-1], dict) else {}
+        positional = inherited[:-1] if options else inherited
+        return (*positional, {**options, "postgresql_partition_by": "RANGE (created_at)"})
+
+
+def period_start(interval: str, moment: datetime) -> datetime:
+    """
+    Start of the partition period containing a moment.
+
+    :param interval: ``day``, ``week`` or ``month``.
+    :param moment: Naive UTC datetime.
+    :return: Start of the period.
+    """
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "day":
+        return day
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unsupported partition interval: {interval}")
+
+
+def shift_period(interval: str, start: datetime, periods: int) -> datetime:
+    """
+    Start of the period ``periods`` intervals away from a period start.
+
+    :param interval: ``day``, ``week`` or ``month``.
+    :param start: Start of a period.
+    :param periods: Number of intervals, negative to go back.
+    :return: Start of the shifted period.
+    """
+    if interval == "month":
+        month = start.year * 12 + start.month - 1 + periods
+        return start.replace(year=month // 12, month=month % 12 + 1)
+    return start + timedelta(days=periods * (7 if interval == "week" else 1))
+
+
+def partition_name(table: str, start: datetime) -> str:
+    """
+    Name of the partition of a table starting at a period start.
+
+    :param table: Partitioned table name.
+    :param start: Start of the period.
+    :return: Partition name.
+    """
+    return f"{table}_p{start:%Y%m%d}"
+
+
+def partitioned_models() -> List[Type[RangePartitionMixin]]:
+    """
+    Models partitioned with :class:`RangePartitionMixin`.
+
+    :return: Model classes.
+    """
+    return [mapper.class_ for mapper in Base.registry.mappers if issubclass(mapper.class_, RangePartitionMixin)]
+
+
+def is_partition(name: str, partitioned_tables: Optional[Iterable[str]] = None) -> bool:
+    """
+    Whether a table is a partition managed by :func:`maintain_partitions`.
+
+    :param name: Table name.
+    :param partitioned_tables: Partitioned table names, defaults to the tables of :func:`partitioned_models`.
+    :return: Whether the table is a partition.
+    """
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return False
+    if partitioned_tables is None:
+        partitioned_tables = {model.__tablename__ for model in partitioned_models()}
+    return match["parent"] in partitioned_tables
+
+
+def _attached_partitions(connection: Connection, table: str) -> List[Tuple[str, datetime]]:
+    """
+    Partitions attached to a table, with their period start.
+    """
+    names = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    ).scalars()
+    matches = [_PARTITION_NAME.match(name) for name in names]
+    return [
+        (match.string, datetime.strptime(match["start"], "%Y%m%d"))
+        for match in matches
+        if match and match["parent"] == table
+    ]
+
+
+def maintain_partitions(connection: Connection, now: Optional[datetime] = None, retention: bool = True) -> List[str]:
+    """
+    Create the current and upcoming partitions of every partitioned model, then detach or drop the expired ones.
+    Concurrent runs, from every worker, are serialized by an advisory lock held until the end of the transaction.
+
+    :param connection: A synchronous connection in a transaction, use :meth:`AsyncConnection.run_sync` from async code.
+    :param now: Reference moment, defaults to the current UTC time.
+    :param retention: Whether to apply the retention policy.
+    :return: The executed DDL statements.
+    """
+    connection.execute(advisory_xact_lock("maintain_partitions"))
+    now = now or datetime.utcnow()
+    statements = []
+    for model in partitioned_models():
+        table, interval = model.__tablename__, model.__partition_interval__
+        current = period_start(interval, now)
+        for offset in range(model.__partition_premake__ + 1):
+            start = shift_period(interval, current, offset)
+            statements.append(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(table, start)} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{shift_period(interval, start, 1).isoformat()}')"
+            )
+
+        if retention and model.__partition_retention__ is not None:
+            cutoff = shift_period(interval, current, -model.__partition_retention__)
+            for name, start in _attached_partitions(connection, table):
+                if shift_period(interval, start, 1) <= cutoff:
+                    statements.append(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                    if model.__partition_drop__:
+                        statements.append(f"DROP TABLE {name}")
+
+    for statement in statements:
+        logger.info(statement)
+        connection.execute(text(statement))
+    return statements
@@ -0,0 +1,223 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from core.exceptions import MemoryTracingNotStartedException, ProfileRunningException
+from core.types import MemoryStatKey
+
+
+def _frame_label(frame: FrameType) -> str:
+    """
+    Label of a stack frame in a collapsed stack, by function rather than by line so that samples merge.
+    """
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    A sampling profiler of all the threads of the worker. Nothing is installed in the interpreter, the stacks are
+    read with :func:`sys._current_frames` from a thread that only exists while a profile is running.
+    """
+
+    def __init__(self) -> None:
+        """
+        A lock lets a single profile run at a time.
+        """
+        self._lock = threading.Lock()
+
+    def sample(self, duration: float, interval: float) -> Dict[str, int]:
+        """
+        Sample the stacks of every thread, blocking for ``duration`` seconds.
+
+        :param duration: Seconds to profile for.
+        :param interval: Seconds between two samples.
+        :return: Number of samples by collapsed stack, root first and frames separated by ``;``.
+        :raises ProfileRunningException: If a profile is already running in this worker.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfileRunningException
+        try:
+            own, stacks = threading.get_ident(), Counter()
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(ident, str(ident)))
+                    stacks[";".join(reversed(labels))] += 1
+                time.sleep(interval)
+            return dict(stacks)
+        finally:
+            self._lock.release()
+
+    async def profile(self, duration: float, interval: float) -> str:
+        """
+        Profile the worker without blocking its event loop.
+
+        :param duration: Seconds to profile for.
+        :param interval: Seconds between two samples.
+        :return: Collapsed stacks, one ``stack count`` line each, as read by flamegraph.pl and speedscope.
+        """
+        stacks = await asyncio.to_thread(self.sample, duration, interval)
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+class TaskInspector:
+    """
+    Lists the pending asyncio tasks of the worker with their current stack and age.
+    The creation time of tasks is only recorded from the first dump on, older tasks are aged from that dump, and
+    until :meth:`stop` restores the task factory of the loop.
+    """
+
+    def __init__(self) -> None:
+        """
+        Creation times are kept per task, and the tracked loops, without holding any reference to them.
+        """
+        self._created: "WeakKeyDictionary[asyncio.Task, float]" = WeakKeyDictionary()
+        self._loops: "WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[Optional[Callable], Callable]]" = (
+            WeakKeyDictionary()
+        )
+
+    def _track(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Wrap the task factory of the loop to record the creation time of the tasks.
+        """
+        if loop in self._loops:
+            return None
+        factory = loop.get_task_factory()
+
+        def task_factory(_loop: asyncio.AbstractEventLoop, coro: Any, **kwargs: Any) -> asyncio.Future:
+            """
+            Create a task with the previous factory and record its creation time.
+
+            :param _loop: Event loop.
+            :param coro: Coroutine of the task.
+            :return: The task.
+            """
+            task = factory(_loop, coro, **kwargs) if factory else asyncio.Task(coro, loop=_loop, **kwargs)
+            self._created[task] = time.monotonic()
+            return task
+
+        loop.set_task_factory(task_factory)
+        self._loops[loop] = (factory, task_factory)
+        return None
+
+    def stop(self) -> None:
+        """
+        Stop recording the creation time of the tasks of the running loop, restoring its original task factory.
+        The factory is left alone if it was replaced again since the first dump.
+        """
+        loop = asyncio.get_running_loop()
+        factory, task_factory = self._loops.pop(loop, (None, None))
+        if task_factory is not None and loop.get_task_factory() is task_factory:
+            loop.set_task_factory(factory)
+        return None
+
+    def dump(self, frames: int = 10) -> List[Dict[str, Any]]:
+        """
+        Describe the pending tasks of the running loop, oldest first.
+
+        :param frames: Maximum number of frames of each stack.
+        :return: Name, coroutine, age in seconds and innermost frames of each task.
+        """
+        self._track(asyncio.get_running_loop())
+        now, tasks = time.monotonic(), []
+        for task in asyncio.all_tasks():
+            coro = task.get_coro()
+            tasks.append(
+                {
+                    "name": task.get_name(),
+                    "coroutine": getattr(coro, "__qualname__", repr(coro)),
+                    "age": now - self._created.setdefault(task, now),
+                    "stack": [f"{_frame_label(frame)} line {frame.f_lineno}" for frame in task.get_stack(limit=frames)],
+                }
+            )
+        return sorted(tasks, key=lambda task: task["age"], reverse=True)
+
+
+class MemoryTracer:
+    """
+    Compares :mod:`tracemalloc` snapshots to find growing allocations. Tracing costs nothing until it is started,
+    and should be stopped once done as it slows down every allocation.
+    """
+
+    def __init__(self) -> None:
+        """
+        No baseline is taken until :meth:`start` is called.
+        """
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        """
+        Snapshot of the traced allocations, without those of tracemalloc itself.
+        """
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            )
+        )
+
+    async def start(self, frames: int) -> None:
+        """
+        Start tracing the allocations and take the baseline snapshot.
+
+        :param frames: Number of frames stored for each allocation.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._baseline = await asyncio.to_thread(self._snapshot)
+        return None
+
+    async def diff(self, key: MemoryStatKey, limit: int) -> List[Dict[str, Any]]:
+        """
+        Compare the allocations with the previous snapshot, which is then replaced by the current one.
+
+        :param key: Grouping of the allocations.
+        :param limit: Maximum number of groups returned.
+        :return: Location and size and count differences of the groups that grew the most.
+        :raises MemoryTracingNotStartedException: If tracing is not started.
+        """
+        if not tracemalloc.is_tracing() or self._baseline is None:
+            raise MemoryTracingNotStartedException
+        snapshot = await asyncio.to_thread(self._snapshot)
+        stats = snapshot.compare_to(self._baseline, key.value)
+        self._baseline = snapshot
+        return [
+            {
+                "location": [str(frame) for frame in stat.traceback],
+                "size": stat.size,
+                "size_diff": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def stop(self) -> None:
+        """
+        Stop tracing the allocations and drop the snapshots.
+        """
+        tracemalloc.stop()
+        self._baseline = None
+        return None
+
+
+stack_sampler = StackSampler()
+task_inspector = TaskInspector()
+memory_tracer = MemoryTracer()
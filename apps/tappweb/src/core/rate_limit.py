@@ -0,0 +1,199 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.app.models.rate_limit import RateLimitBucket
+from config import settings
+from core.db import engine_options
+from core.types import RateLimitBackendType
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Token bucket parameters, ``capacity`` is the burst size and ``refill_rate`` the sustained requests per second.
+    """
+
+    capacity: int
+    refill_rate: float
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """
+    Outcome of a token bucket consumption.
+    """
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: int
+    retry_after: int
+
+    @classmethod
+    def from_tokens(cls, limit: RateLimit, tokens: float, allowed: bool, cost: int) -> "RateLimitResult":
+        """
+        Build a result from the tokens left in a bucket.
+
+        :param limit: Bucket parameters.
+        :param tokens: Tokens left after the consumption.
+        :param allowed: Whether the tokens were consumed.
+        :param cost: Tokens requested.
+        :return: Rate limit result.
+        """
+        return cls(
+            allowed=allowed,
+            limit=limit.capacity,
+            remaining=int(tokens),
+            reset_after=math.ceil((limit.capacity - tokens) / limit.refill_rate),
+            retry_after=0 if allowed else math.ceil((cost - tokens) / limit.refill_rate),
+        )
+
+    def headers(self) -> Dict[str, str]:
+        """
+        Standard rate limit response headers.
+
+        :return: Headers of the result.
+        """
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset_after),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage of the token buckets.
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        """
+        Take ``cost`` tokens from the bucket of ``key`` if it holds enough of them.
+
+        :param key: Bucket key.
+        :param limit: Bucket parameters.
+        :param cost: Tokens requested.
+        :return: Rate limit result.
+        """
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-worker token buckets, limits are enforced per worker process.
+    Once ``max_keys`` buckets are held, the least recently used one is forgotten for each new key: it is the most
+    likely to have refilled completely.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        """
+        :param max_keys: Maximum number of buckets held.
+        """
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, Tuple[float, float]] = OrderedDict()
+
+    async def consume(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        """
+        Take tokens from the bucket of ``key``, refilled since its last use.
+
+        :param key: Bucket key.
+        :param limit: Bucket parameters.
+        :param cost: Tokens requested.
+        :return: Rate limit result.
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            tokens = limit.capacity
+        else:
+            tokens = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.refill_rate)
+            self._buckets.move_to_end(key)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        return RateLimitResult.from_tokens(limit, tokens, allowed, cost)
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets shared by all the workers, each consumption is a single atomic upsert.
+    The upserts run on a pool of their own, so that rate limiting never waits for a connection of the request pool.
+    """
+
+    def __init__(self, pool_size: int, max_overflow: int) -> None:
+        """
+        :param pool_size: Connections kept in the pool.
+        :param max_overflow: Connections opened above ``pool_size`` under load.
+        """
+        self.engine = create_async_engine(
+            settings.DATABASE_URL, **engine_options(pool_size=pool_size, max_overflow=max_overflow)
+        )
+
+    async def consume(self, key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+        """
+        Take tokens from the shared bucket of ``key`` in a single upsert.
+
+        :param key: Bucket key.
+        :param limit: Bucket parameters.
+        :param cost: Tokens requested.
+        :return: Rate limit result.
+        """
+        now = time.time()
+        bucket = RateLimitBucket.__table__.c
+        refilled = func.least(limit.capacity, bucket.tokens + (now - bucket.updated_at) * limit.refill_rate)
+        # A new bucket starts full, it is subject to the same check as the refilled ones.
+        fits = limit.capacity >= cost
+        query = (
+            insert(RateLimitBucket)
+            .values(key=key, tokens=limit.capacity - cost if fits else limit.capacity, updated_at=now, allowed=fits)
+            .on_conflict_do_update(
+                index_elements=[bucket.key],
+                set_={
+                    "tokens": case((refilled >= cost, refilled - cost), else_=refilled),
+                    "updated_at": now,
+                    "allowed": refilled >= cost,
+                },
+            )
+            .returning(bucket.tokens, bucket.allowed)
+        )
+        async with self.engine.begin() as connection:
+            tokens, allowed = (await connection.execute(query)).one()
+        return RateLimitResult.from_tokens(limit, tokens, allowed, cost)
+
+
+def create_backend(backend: RateLimitBackendType) -> RateLimitBackend:
+    """
+    Create a rate limit backend.
+
+    :param backend: Backend type.
+    :return: Rate limit backend.
+    """
+    if backend is RateLimitBackendType.DATABASE:
+        return DatabaseRateLimitBackend(
+            pool_size=settings.RATE_LIMIT_DB_POOL_SIZE, max_overflow=settings.RATE_LIMIT_DB_MAX_OVERFLOW
+        )
+    return InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = create_backend(RateLimitBackendType(settings.RATE_LIMIT_BACKEND))
+
+default_rate_limit = (
+    RateLimit(capacity=settings.RATE_LIMIT_CAPACITY, refill_rate=settings.RATE_LIMIT_REFILL_RATE)
+    if settings.RATE_LIMIT_ENABLED
+    else None
+)
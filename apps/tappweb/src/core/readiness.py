@@ -0,0 +1,148 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from config import settings
+from core.db import engine
+from core.utils import logger
+from core.utils.webhook import webhook_backlog
+
+
+@dataclass
+class ReadinessReport:
+    """
+    Result of a readiness probe, each check has its measured value and whether it passed.
+    """
+
+    checked_at: float
+    checks: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether every check passed.
+        """
+        return all(check["ok"] for check in self.checks.values())
+
+    def add(self, name: str, ok: bool, value: Any = None) -> None:
+        """
+        Record a check.
+
+        :param name: Check name.
+        :param ok: Whether the check passed.
+        :param value: Measured value.
+        """
+        self.checks[name] = {"ok": ok, "value": value}
+        return None
+
+
+class ReadinessProber:
+    """
+    Probes the dependencies of the worker every ``interval`` seconds in the background and keeps the last report,
+    so that readiness requests are answered without any I/O. The event loop lag is measured on the probe sleep
+    itself, and a report that is not renewed in time counts as not ready: the loop is too busy to run the prober.
+    """
+
+    def __init__(
+        self, interval: float, db_timeout: float, max_pool_usage: float, max_loop_lag: float, max_webhook_backlog: int
+    ) -> None:
+        """
+        :param interval: Seconds between two probes.
+        :param db_timeout: Seconds allowed for the database check.
+        :param max_pool_usage: Ratio of checked out connections above which the worker is not ready.
+        :param max_loop_lag: Seconds of event loop lag above which the worker is not ready.
+        :param max_webhook_backlog: Pending webhook deliveries above which the worker is not ready.
+        """
+        self.interval = interval
+        self.db_timeout = db_timeout
+        self.max_pool_usage = max_pool_usage
+        self.max_loop_lag = max_loop_lag
+        self.max_webhook_backlog = max_webhook_backlog
+        self._report: Optional[ReadinessReport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Start probing on the running event loop.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return None
+
+    async def stop(self) -> None:
+        """
+        Stop probing.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        return None
+
+    @property
+    def report(self) -> Optional[ReadinessReport]:
+        """
+        The last report, None before the first probe or once it is outdated.
+        """
+        if self._report is None or time.monotonic() - self._report.checked_at > self.interval * 3:
+            return None
+        return self._report
+
+    async def _run(self) -> None:
+        """
+        Probe loop.
+        """
+        lag = 0.0
+        while True:
+            try:
+                self._report = await self.probe(lag)
+            except Exception:
+                logger.exception("Readiness probe failed")
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - start - self.interval)
+
+    async def probe(self, loop_lag: float) -> ReadinessReport:
+        """
+        Check the dependencies of the worker.
+
+        :param loop_lag: Seconds the event loop was late to resume the last probe sleep.
+        :return: Readiness report.
+        """
+        report = ReadinessReport(checked_at=time.monotonic())
+        start = time.monotonic()
+        try:
+            # Checks a connection out like any request: it times out as well when the pool is exhausted.
+            async with asyncio.timeout(self.db_timeout):
+                async with engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+            report.add("database", True, round(time.monotonic() - start, 4))
+        except Exception as exc:
+            report.add("database", False, exc.__class__.__name__)
+
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            usage = pool.checkedout() / (pool.size() + max(0, pool._max_overflow))
+            report.add("pool", usage < self.max_pool_usage, round(usage, 4))
+
+        report.add("event_loop_lag", loop_lag < self.max_loop_lag, round(loop_lag, 4))
+
+        backlog = webhook_backlog()
+        report.add("webhook_backlog", backlog < self.max_webhook_backlog, backlog)
+        return report
+
+
+readiness_prober = ReadinessProber(
+    interval=settings.READINESS_INTERVAL,
+    db_timeout=settings.READINESS_DB_TIMEOUT,
+    max_pool_usage=settings.READINESS_MAX_POOL_USAGE,
+    max_loop_lag=settings.READINESS_MAX_LOOP_LAG,
+    max_webhook_backlog=settings.READINESS_MAX_WEBHOOK_BACKLOG,
+)
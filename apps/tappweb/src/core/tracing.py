@@ -0,0 +1,353 @@
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional
+
+from sqlalchemy import event
+
+from config import settings
+from core.db import engine
+from core.index_advisor import shape_of
+from core.types import SpanKind, TraceExporterType
+
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """
+    A timed operation of a trace, following the OpenTelemetry span data model.
+    """
+
+    name: str
+    kind: SpanKind
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str] = None
+    start_time: int = field(default_factory=time.time_ns)
+    end_time: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "UNSET"
+    status_message: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set an attribute of the span.
+
+        :param key: Attribute name, following the OpenTelemetry semantic conventions where one applies.
+        :param value: Attribute value.
+        """
+        self.attributes[key] = value
+        return None
+
+    def record_exception(self, exc: BaseException) -> None:
+        """
+        Mark the span as failed by an exception.
+
+        :param exc: Raised exception.
+        """
+        self.status, self.status_message = "ERROR", str(exc)
+        self.attributes["exception.type"] = exc.__class__.__name__
+        return None
+
+    @property
+    def traceparent(self) -> str:
+        """
+        W3C ``traceparent`` header continuing the trace from this span.
+        """
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        The span as a flat JSON object with the OTLP field names.
+
+        :return: JSON serializable span.
+        """
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": int(self.kind),
+            "startTimeUnixNano": self.start_time,
+            "endTimeUnixNano": self.end_time,
+            "attributes": [{"key": key, "value": value} for key, value in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message or ""},
+            "resource": {"service.name": settings.APP_NAME},
+        }
+
+
+class SpanExporter:
+    """
+    Writes the finished spans as JSON lines to stdout or a file from a background thread.
+    """
+
+    def __init__(self, exporter: TraceExporterType, path: str) -> None:
+        """
+        :param exporter: Destination of the spans.
+        :param path: File the spans are appended to with the file exporter.
+        """
+        self.exporter = exporter
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """
+        Queue a finished span, the writer thread is started on first use in each process.
+
+        :param span: Finished span.
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.SimpleQueue()
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+        self._queue.put_nowait(span)
+        return None
+
+    def _run(self) -> None:
+        """
+        Thread target, writes the queued spans until the stop sentinel.
+        """
+        output = open(self.path, "a") if self.exporter is TraceExporterType.FILE else sys.stdout
+        try:
+            while True:
+                span = self._queue.get()
+                if span is None:
+                    return None
+                output.write(json.dumps(span.to_dict(), default=str) + "\n")
+                if self._queue.empty():
+                    output.flush()
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """
+        Write the queued spans and stop the writer thread.
+
+        :param timeout: Seconds to wait for the queue to be drained.
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return None
+        self._queue.put_nowait(None)
+        self._thread.join(timeout)
+        self._thread, self._pid = None, None
+        return None
+
+
+class Tracer:
+    """
+    Creates spans with head-based sampling: the decision is taken once per trace, by the incoming ``traceparent``
+    flags or with ``sample_rate`` probability, and unsampled traces create no span at all.
+    """
+
+    def __init__(self, enabled: bool, sample_rate: float, exporter: SpanExporter) -> None:
+        """
+        :param enabled: Whether traces are recorded.
+        :param sample_rate: Ratio of the traces started here that are recorded.
+        :param exporter: Exporter of the finished spans.
+        """
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        """
+        The span of the current context.
+
+        :return: The current span, None outside of a sampled trace.
+        """
+        return _current_span.get()
+
+    def start_trace(
+        self,
+        name: str,
+        kind: SpanKind = SpanKind.INTERNAL,
+        traceparent: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> ContextManager[Optional[Span]]:
+        """
+        Start the root span of a unit of work, continuing the trace of the caller when ``traceparent`` is given.
+
+        :param name: Span name.
+        :param kind: Span kind.
+        :param traceparent: W3C ``traceparent`` header of the caller.
+        :param attributes: Span attributes.
+        :return: Context manager of the span, it yields None when the trace is not sampled.
+        """
+        if not self.enabled:
+            return nullcontext()
+        match = _TRACEPARENT.match(traceparent or "")
+        if match:
+            if not int(match[3], 16) & 1:
+                return nullcontext()
+            trace_id, parent_span_id = match[1], match[2]
+        elif random.random() < self.sample_rate:
+            trace_id, parent_span_id = f"{random.getrandbits(128):032x}", None
+        else:
+            return nullcontext()
+        return self._span(Span(name, kind, trace_id, f"{random.getrandbits(64):016x}", parent_span_id), attributes)
+
+    def start_span(
+        self, name: str, kind: SpanKind = SpanKind.INTERNAL, attributes: Optional[Dict[str, Any]] = None
+    ) -> ContextManager[Optional[Span]]:
+        """
+        Start a child span of the current span.
+
+        :param name: Span name.
+        :param kind: Span kind.
+        :param attributes: Span attributes.
+        :return: Context manager of the span, it yields None outside of a sampled trace.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return nullcontext()
+        return self._span(
+            Span(name, kind, parent.trace_id, f"{random.getrandbits(64):016x}", parent.span_id), attributes
+        )
+
+    @contextmanager
+    def _span(self, span: Span, attributes: Optional[Dict[str, Any]]) -> Iterator[Span]:
+        """
+        Make a span current for a block, then export it.
+        """
+        if attributes:
+            span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time = time.time_ns()
+            self.exporter.export(span)
+
+    def inject(self, headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, str]]:
+        """
+        Add the ``traceparent`` of the current span to outbound request headers.
+
+        :param headers: Request headers.
+        :return: The headers, copied when the trace context was added.
+        """
+        span = _current_span.get()
+        if span is None:
+            return headers
+        return {**(headers or {}), "traceparent": span.traceparent}
+
+    def traced(self, name: Optional[str] = None, kind: SpanKind = SpanKind.INTERNAL) -> Callable:
+        """
+        Run a coroutine function in a child span of the current span.
+
+        :param name: Span name, defaults to the qualified name of the function.
+        :param kind: Span kind.
+        :return: Decorator.
+        """
+
+        def decorator(func: Callable) -> Callable:
+            """
+            Wrap a coroutine function in a span.
+
+            :param func: Coroutine function.
+            :return: Wrapped function.
+            """
+            span_name = name or func.__qualname__
+
+            @wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                """
+                Run the function in a child span of the current one, outside of any trace it runs as is.
+                """
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with self.start_span(span_name, kind):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def instrument_engine(self) -> None:
+        """
+        Record a span for each statement run on the engine within a sampled trace, with the query shape.
+        """
+        if not self.enabled or event.contains(engine.sync_engine, "before_cursor_execute", _before_execute):
+            return None
+        event.listen(engine.sync_engine, "before_cursor_execute", _before_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", _after_execute)
+        event.listen(engine.sync_engine, "handle_error", _handle_error)
+        return None
+
+    def shutdown(self) -> None:
+        """
+        Export the pending spans.
+        """
+        self.exporter.shutdown()
+        return None
+
+
+def _before_execute(connection, cursor, statement: str, parameters: Any, context, executemany: bool) -> None:
+    """
+    Engine ``before_cursor_execute`` listener, starts the span of a statement.
+    """
+    if _current_span.get() is None:
+        return None
+    span = tracer.start_span(
+        "db.query",
+        SpanKind.CLIENT,
+        {"db.system": "postgresql", "db.statement": shape_of(statement), "db.executemany": executemany},
+    )
+    span.__enter__()
+    context._trace_span = span
+    return None
+
+
+def _after_execute(connection, cursor, statement: str, parameters: Any, context, executemany: bool) -> None:
+    """
+    Engine ``after_cursor_execute`` listener, ends the span of a statement.
+    """
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        context._trace_span = None
+        span.__exit__(None, None, None)
+    return None
+
+
+def _handle_error(exception_context) -> None:
+    """
+    Engine ``handle_error`` listener, ends the span of a failed statement.
+    """
+    context = exception_context.execution_context
+    span = getattr(context, "_trace_span", None) if context is not None else None
+    if span is not None:
+        context._trace_span = None
+        exc = exception_context.original_exception
+        span.__exit__(type(exc), exc, exc.__traceback__)
+    return None
+
+
+tracer = Tracer(
+    settings.TRACING_ENABLED,
+    settings.TRACING_SAMPLE_RATE,
+    SpanExporter(settings.TRACING_EXPORTER, settings.TRACING_FILE),
+)
@@ -1,4 +1,4 @@
-from enum import IntEnum
+from enum import Enum, IntEnum
 
 
 class RoleType(IntEnum):
@@ -9,3 +9,103 @@ class RoleType(IntEnum):
     ADMIN = 1
     STAFF = 2
     USER = 3
+
+
+class JobExecutorType(str, Enum):
+    """
+    Enum class of the executors a scheduler job can run on.
+    """
+
+    ASYNCIO = "asyncio"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class RequestPriority(IntEnum):
+    """
+    Enum class of request priority classes, lower values are admitted first.
+    """
+
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+class RateLimitBackendType(str, Enum):
+    """
+    Enum class of the rate limiter storage backends.
+    """
+
+    MEMORY = "memory"
+    DATABASE = "database"
+
+
+class CountStrategy(str, Enum):
+    """
+    Enum class of the strategies counting the total of a paginated query.
+    """
+
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
+    NONE = "none"
+
+
+class SearchMode(str, Enum):
+    """
+    Enum class of the text search modes of a repository.
+    """
+
+    SUBSTRING = "substring"
+    PREFIX = "prefix"
+    FULLTEXT = "fulltext"
+
+
+class LogFormat(str, Enum):
+    """
+    Enum class of the application log formats.
+    """
+
+    TEXT = "text"
+    JSON = "json"
+
+
+class SpanKind(IntEnum):
+    """
+    Enum class of the span kinds, numbered as in the OpenTelemetry protocol.
+    """
+
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+    PRODUCER = 4
+    CONSUMER = 5
+
+
+class TraceExporterType(str, Enum):
+    """
+    Enum class of the destinations of the finished spans.
+    """
+
+    STDOUT = "stdout"
+    FILE = "file"
+
+
+class MemoryStatKey(str, Enum):
+    """
+    Enum class of the groupings of the traced memory allocations.
+    """
+
+    FILENAME = "filename"
+    LINENO = "lineno"
+    TRACEBACK = "traceback"
+
+
+class ContentEncoding(str, Enum):
+    """
+    Enum class of the supported response content codings, in order of server preference.
+    """
+
+    ZSTD = "zstd"
+    BROTLI = "br"
+    GZIP = "gzip"
@@ -1,10 +1,24 @@
 import logging
 
+from core.utils.conditional import ConditionalRequest
 from core.utils.http_client import HTTPClient
-from core.utils.scheduler import scheduler
-from core.utils.schema import CamelCaseModel, SuccessResponse
+from core.utils.log import log_pipeline
+from core.utils.scheduler import add_job, job_loop, scheduler
+from core.utils.schema import CamelCaseModel, CursorPage, SuccessResponse, UncountedPage
 
 
 logger = logging.getLogger("uvicorn")
 
-__all__ = ["HTTPClient", "scheduler", "CamelCaseModel", "SuccessResponse", "logger"]
+__all__ = [
+    "ConditionalRequest",
+    "HTTPClient",
+    "add_job",
+    "job_loop",
+    "log_pipeline",
+    "scheduler",
+    "CamelCaseModel",
+    "CursorPage",
+    "SuccessResponse",
+    "UncountedPage",
+    "logger",
+]
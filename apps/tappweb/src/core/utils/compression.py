@@ -0,0 +1,170 @@
+import zlib
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from config import settings
+from core.types import ContentEncoding
+from core.utils.conditional import encode_etag
+
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+AVAILABLE_ENCODINGS: Tuple[ContentEncoding, ...] = tuple(
+    encoding
+    for encoding, available in (
+        (ContentEncoding.ZSTD, zstandard is not None),
+        (ContentEncoding.BROTLI, brotli is not None),
+        (ContentEncoding.GZIP, True),
+    )
+    if available
+)
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[ContentEncoding]:
+    """
+    Pick the content coding of a response from the ``Accept-Encoding`` header of the request.
+    The highest quality value wins, ties go to the server preference: zstd, then brotli, then gzip.
+
+    :param accept_encoding: Value of the ``Accept-Encoding`` header.
+    :return: Content coding, None to send the identity body.
+    """
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in AVAILABLE_ENCODINGS:
+        quality = qualities.get(encoding.value, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(
+    headers: Headers, size: Optional[int], minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE
+) -> bool:
+    """
+    Whether a response is worth compressing: a textual type not encoded yet, of at least ``minimum_size`` bytes.
+
+    :param headers: Response headers.
+    :param size: Body size, None when it is not known yet.
+    :param minimum_size: Size threshold in bytes.
+    :return: Whether to compress the response.
+    """
+    if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+        return False
+    if size is not None and size < minimum_size:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return (
+        content_type.startswith("text/")
+        or content_type.endswith(("+json", "+xml"))
+        or content_type in COMPRESSIBLE_TYPES
+    )
+
+
+def set_content_encoding(headers: MutableHeaders, encoding: ContentEncoding, size: Optional[int]) -> None:
+    """
+    Describe a compressed body in the response headers. The ``ETag`` gets the content coding suffix, the compressed
+    representation having other bytes than the identity one.
+
+    :param headers: Response headers.
+    :param encoding: Content coding of the body.
+    :param size: Compressed body size, None when it is streamed.
+    """
+    headers["Content-Encoding"] = encoding.value
+    if size is None:
+        del headers["Content-Length"]
+    else:
+        headers["Content-Length"] = str(size)
+    if "etag" in headers:
+        headers["ETag"] = encode_etag(headers["etag"], encoding.value)
+    headers.add_vary_header("Accept-Encoding")
+    return None
+
+
+def compress(body: bytes, encoding: ContentEncoding) -> bytes:
+    """
+    Compress a complete body.
+
+    :param body: Identity body.
+    :param encoding: Content coding.
+    :return: Compressed body.
+    """
+    if encoding == ContentEncoding.ZSTD:
+        return zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compress(body)
+    if encoding == ContentEncoding.BROTLI:
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    """
+    Incremental compression of a streamed body. Every chunk is flushed, so that the client can decode it as soon as
+    it is received: streaming endpoints keep their latency at the cost of some compression ratio.
+    """
+
+    def __init__(self, encoding: ContentEncoding) -> None:
+        """
+        :param encoding: Content coding of the stream.
+        """
+        self.encoding = encoding
+        if encoding == ContentEncoding.ZSTD:
+            self._compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+        elif encoding == ContentEncoding.BROTLI:
+            self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """
+        Compress a chunk and flush it.
+
+        :param chunk: Identity chunk.
+        :return: Compressed bytes, decodable on their own with the previous ones.
+        """
+        if self.encoding == ContentEncoding.ZSTD:
+            return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == ContentEncoding.BROTLI:
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, chunk: bytes = b"") -> bytes:
+        """
+        Compress the last chunk and end the stream.
+
+        :param chunk: Identity chunk.
+        :return: Compressed bytes.
+        """
+        if self.encoding == ContentEncoding.BROTLI:
+            return self._compressor.process(chunk) + self._compressor.finish()
+        return self._compressor.compress(chunk) + self._compressor.flush()
@@ -0,0 +1,157 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import sha1
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response, status
+
+from core.types import ContentEncoding
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a weak entity tag from the parts identifying a representation.
+
+    :param parts: Values identifying the representation, e.g. a primary key and its update timestamp.
+    :return: Weak entity tag.
+    """
+    return f'W/"{sha1(repr(parts).encode()).hexdigest()[:20]}"'
+
+
+def encode_etag(etag: str, coding: str) -> str:
+    """
+    Entity tag of a compressed representation, the content coding is appended inside the quotes so that the identity
+    and compressed bodies are never taken for one another, e.g. ``W/"abc"`` becomes ``W/"abc-gzip"``.
+
+    :param etag: Entity tag of the identity representation.
+    :param coding: Content coding of the representation.
+    :return: Entity tag.
+    """
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{coding}"'
+    return f"{etag}-{coding}"
+
+
+def _opaque_tag(etag: str) -> str:
+    """
+    The opaque tag of an entity tag, without its weakness indicator and its content coding suffix.
+    """
+    tag = etag.strip().removeprefix("W/")
+    for encoding in ContentEncoding:
+        suffix = f'-{encoding.value}"'
+        if tag.endswith(suffix):
+            return f'{tag.removesuffix(suffix)}"'
+    return tag
+
+
+def not_modified_etag(if_none_match: Optional[str], etag: str, coding: str) -> str:
+    """
+    Entity tag of a ``304`` response to a client accepting a content coding: the compressed entity tag when the
+    client copy is the compressed representation.
+
+    :param if_none_match: Value of the ``If-None-Match`` header.
+    :param etag: Entity tag of the identity representation.
+    :param coding: Content coding negotiated with the client.
+    :return: Entity tag.
+    """
+    if not if_none_match:
+        return etag
+    encoded = encode_etag(etag, coding)
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return encoded if encoded.removeprefix("W/") in tags else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Weak comparison of an ``If-None-Match`` header with an entity tag, the tags of compressed representations match
+    the tag of their identity representation.
+
+    :param if_none_match: Value of the ``If-None-Match`` header.
+    :param etag: Current entity tag.
+    :return: Whether the client copy is current.
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque_tag(etag) in {_opaque_tag(tag) for tag in if_none_match.split(",")}
+
+
+def is_not_modified(
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    etag: Optional[str],
+    last_modified: Optional[datetime],
+) -> bool:
+    """
+    Evaluate the conditional request headers against the current validators.
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``.
+
+    :param if_none_match: Value of the ``If-None-Match`` header.
+    :param if_modified_since: Value of the ``If-Modified-Since`` header.
+    :param etag: Current entity tag.
+    :param last_modified: Current last modification date, timezone aware.
+    :return: Whether the client copy is current.
+    """
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+class ConditionalRequest:
+    """
+    A dependency answering conditional GET requests from validators computed before the response is built.
+    """
+
+    def __init__(self, request: Request) -> None:
+        """
+        :param request: FastAPI Request.
+        """
+        self.if_none_match = request.headers.get("If-None-Match")
+        self.if_modified_since = request.headers.get("If-Modified-Since")
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[datetime] = None
+
+    def set_validators(self, last_modified: Optional[datetime], *parts: Any) -> None:
+        """
+        Set the validators of the current representation.
+
+        :param last_modified: Last update of the representation, naive datetimes are considered UTC.
+        :param parts: Additional values identifying the representation.
+        """
+        if last_modified is not None and last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        self.last_modified = last_modified
+        self.etag = make_etag(last_modified, *parts)
+        return None
+
+    @property
+    def not_modified(self) -> bool:
+        """
+        Whether the client copy is current and a ``304`` can be returned.
+        """
+        return is_not_modified(self.if_none_match, self.if_modified_since, self.etag, self.last_modified)
+
+    def headers(self) -> Dict[str, str]:
+        """
+        Validator headers of the current representation.
+
+        :return: ``ETag`` and ``Last-Modified`` headers.
+        """
+        headers = {"ETag": self.etag} if self.etag else {}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def not_modified_response(self) -> Response:
+        """
+        An empty ``304`` response carrying the validators.
+
+        :return: Not modified response.
+        """
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers())
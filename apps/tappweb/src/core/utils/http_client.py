@@ -3,6 +3,8 @@ from typing import Any, Dict, List, Optional, Union
 from aiohttp.client import ClientSession
 
 from app.app.exceptions import RequestFailedException
+from core.tracing import tracer
+from core.types import SpanKind
 
 
 class HTTPClient:
@@ -22,12 +24,7 @@ class HTTPClient:
         :return: Union[Dict[str, Any], List[Dict[str, Any]]]: The response from the server, which can be either a
         dictionary or a list of dictionaries depending on the API endpoint being accessed.
         """
-        async with ClientSession(base_url=self.base_url, headers=self.headers) as session:
-            async with session.get(url if url else self.base_url, headers=headers, params=params) as response:
-                if response.status in [200, 201, 203, 204]:
-                    return await response.json()
-                else:
-                    raise RequestFailedException
+        return await self._request("GET", url, headers=headers, params=params)
 
     async def post(
         self,
@@ -47,14 +44,7 @@ class HTTPClient:
         Defaults to None.
         :return: Union[Dict[str, Any], List[Dict[str, Any]]]: The JSON response from the server.
         """
-        async with ClientSession(base_url=self.base_url, headers=self.headers) as session:
-            async with session.post(
-                url if url else self.base_url, headers=headers, params=params, json=json
-            ) as response:
-                if response.status in [200, 201, 203, 204]:
-                    return await response.json()
-                else:
-                    raise RequestFailedException
+        return await self._request("POST", url, headers=headers, params=params, json=json)
 
     async def put(
         self, url: Optional[str] = None, headers: Dict[str, str] = None, params: Dict[str, str] = None, json: str = None
@@ -69,14 +59,7 @@ class HTTPClient:
         :return: Union[Dict[str, Any], List[Dict[str, Any]]]: A dictionary or list of dictionaries containing the
         response data.
         """
-        async with ClientSession(base_url=self.base_url, headers=self.headers) as session:
-            async with session.put(
-                url if url else self.base_url, headers=headers, params=params, json=json
-            ) as response:
-                if response.status in [200, 201, 203, 204]:
-                    return await response.json()
-                else:
-                    raise RequestFailedException
+        return await self._request("PUT", url, headers=headers, params=params, json=json)
 
     async def delete(
         self, url: Optional[str] = None, headers: Dict[str, str] = None, params: Dict[str, str] = None
@@ -89,9 +72,27 @@ class HTTPClient:
         :param params: A dictionary of query string parameters to include with the request.
         :return: A dictionary or list of dictionaries representing the deleted resource(s).
         """
-        async with ClientSession(base_url=self.base_url, headers=self.headers) as session:
-            async with session.delete(url if url else self.base_url, headers=headers, params=params) as response:
-                if response.status in [200, 201, 203, 204]:
-                    return await response.json()
-                else:
-                    raise RequestFailedException
+        return await self._request("DELETE", url, headers=headers, params=params)
+
+    async def _request(
+        self, method: str, url: Optional[str] = None, headers: Dict[str, str] = None, **kwargs: Any
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Send a request in a client span, propagating the trace context to the server.
+
+        :param method: HTTP method.
+        :param url: The URL to send the request to, defaults to the base URL.
+        :param headers: Headers of the request.
+        :param kwargs: Query parameters and payload of the request.
+        :return: The JSON response from the server.
+        """
+        url = url if url else self.base_url
+        with tracer.start_span(f"HTTP {method}", SpanKind.CLIENT, {"http.method": method, "http.url": url}) as span:
+            async with ClientSession(base_url=self.base_url, headers=self.headers) as session:
+                async with session.request(method, url, headers=tracer.inject(headers), **kwargs) as response:
+                    if span is not None:
+                        span.set_attribute("http.status_code", response.status)
+                    if response.status in [200, 201, 203, 204]:
+                        return await response.json()
+                    else:
+                        raise RequestFailedException
@@ -0,0 +1,123 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+
+from fastapi import Request
+
+import constants
+from core.exceptions import UnsupportedMediaTypeError
+
+
+Row = Tuple[int, Union[Dict[str, str], str]]
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+CSV_MEDIA_TYPES = ("text/csv",)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a byte stream into lines without holding more than one line in memory.
+
+    :param chunks: Byte stream.
+    :param max_line_bytes: Longest accepted line, longer lines are discarded.
+    :return: Lines without their terminator, None for each discarded line.
+    """
+    buffer, skipping = b"", False
+    async for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            yield line.rstrip(b"\r") if len(line) <= max_line_bytes else None
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield None
+            buffer, skipping = b"", True
+    if buffer and not skipping:
+        yield buffer.rstrip(b"\r") if len(buffer) <= max_line_bytes else None
+
+
+async def iter_ndjson(lines: AsyncIterator[Optional[bytes]]) -> AsyncIterator[Row]:
+    """
+    Parse newline delimited JSON objects, blank lines are ignored.
+
+    :param lines: Lines of the stream.
+    :return: Line number and object, or error message, of every row.
+    """
+    number = 0
+    async for line in lines:
+        number += 1
+        if line is None:
+            yield number, constants.ROW_TOO_LONG
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, constants.INVALID_ROW
+            continue
+        yield number, row if isinstance(row, dict) else constants.INVALID_ROW
+
+
+async def iter_csv(lines: AsyncIterator[Optional[bytes]], max_record_chars: int) -> AsyncIterator[Row]:
+    """
+    Parse CSV records keyed by the header row, quoted fields may span several lines.
+
+    :param lines: Lines of the stream.
+    :param max_record_chars: Longest accepted record, a longer one is discarded up to its end of line.
+    :return: Record number and fields, or error message, of every record.
+    """
+    header, record, number = None, "", 0
+    async for line in lines:
+        if line is None:
+            number += 1
+            record = ""
+            yield number, constants.ROW_TOO_LONG
+            continue
+        try:
+            text = line.decode()
+        except UnicodeDecodeError:
+            number += 1
+            yield number, constants.INVALID_ROW
+            continue
+        record = f"{record}\n{text}" if record else text
+        if len(record) > max_record_chars:
+            number += 1
+            record = ""
+            yield number, constants.ROW_TOO_LONG
+            continue
+        if record.count('"') % 2:
+            # A quoted field continues on the next line.
+            continue
+        fields, record = next(csv.reader([record]), []), ""
+        if not fields:
+            continue
+        if header is None:
+            header = [field.strip().lstrip("\ufeff") for field in fields]
+            continue
+        number += 1
+        yield number, dict(zip(header, fields)) if len(fields) == len(header) else constants.INVALID_ROW
+    if record:
+        yield number + 1, constants.INVALID_ROW
+
+
+def stream_rows(request: Request, max_line_bytes: int) -> AsyncIterator[Row]:
+    """
+    Parse the NDJSON or CSV body of a request as it is received.
+
+    :param request: FastAPI Request.
+    :param max_line_bytes: Longest accepted line.
+    :return: Rows of the body.
+    :raises UnsupportedMediaTypeError: If the body is neither NDJSON nor CSV.
+    """
+    media_type = request.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    lines = iter_lines(request.stream(), max_line_bytes)
+    if media_type in NDJSON_MEDIA_TYPES:
+        return iter_ndjson(lines)
+    if media_type in CSV_MEDIA_TYPES:
+        return iter_csv(lines, max_line_bytes)
+    raise UnsupportedMediaTypeError(constants.UNSUPPORTED_MEDIA_TYPE)
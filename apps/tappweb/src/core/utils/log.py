@@ -0,0 +1,222 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from core.types import LogFormat
+
+
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "suppressed", "sample_key"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line, the extra attributes of a record are added as fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record as a JSON object.
+
+        :param record: Log record.
+        :return: JSON line.
+        """
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "suppressed", 0):
+            payload["suppressed"] = record.suppressed
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        payload.update({key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES})
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through at most ``burst`` records per ``window`` seconds from each call site and level, the number of
+    dropped records is reported on the first record let through in the next window.
+    Records logged with a ``sample_key`` extra are sampled per key instead of per call site only.
+    """
+
+    def __init__(self, burst: int, window: float) -> None:
+        """
+        :param burst: Records let through per window, call site and level.
+        :param window: Seconds of a sampling window.
+        """
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._counters: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Whether a record is let through.
+
+        :param record: Log record.
+        :return: False once the burst of its call site is spent in the current window.
+        """
+        key = (record.name, record.levelno, record.pathname, record.lineno, getattr(record, "sample_key", None))
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or now - counter[0] >= self.window:
+                suppressed = counter[2] if counter else 0
+                self._counters[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                    if settings.LOG_FORMAT is not LogFormat.JSON and isinstance(record.msg, str):
+                        record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+                return True
+            if counter[1] < self.burst:
+                counter[1] += 1
+                return True
+            counter[2] += 1
+            return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    A queue handler passing the records as they are, with their target handlers, to the in-process listener
+    thread of :class:`LogPipeline`. Message interpolation, traceback formatting and writing all happen on that
+    thread instead of the event loop.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, targets: List[logging.Handler]) -> None:
+        """
+        :param log_queue: Queue drained by the listener thread.
+        :param targets: Handlers writing the records.
+        """
+        super().__init__(log_queue)
+        self.targets = targets
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Queue a record with its target handlers.
+
+        :param record: Log record.
+        """
+        self.queue.put_nowait((self.targets, record))
+        return None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Keep the record as it is, it is formatted on the listener thread.
+
+        :param record: Log record.
+        :return: The record.
+        """
+        return record
+
+
+class LogPipeline:
+    """
+    Moves the handlers of the application loggers behind a queue drained by a listener thread.
+    Until :meth:`start` is called, and after :meth:`stop`, the loggers write synchronously.
+    """
+
+    def __init__(self, names: Tuple[str, ...], fallback: str) -> None:
+        """
+        :param names: Names of the queued loggers.
+        :param fallback: Name of the logger whose handlers write the records that would reach no handler.
+        """
+        self.names = names
+        self.fallback = fallback
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._saved: Dict[str, Tuple[List[logging.Handler], bool, int]] = {}
+
+    @staticmethod
+    def _reached(logger: logging.Logger) -> List[logging.Handler]:
+        """
+        The handlers the records of a logger reach: its own and those of its ancestors, up to the first one that
+        does not propagate.
+
+        :param logger: A logger.
+        :return: Handlers.
+        """
+        handlers: List[logging.Handler] = []
+        current = logger
+        while current is not None:
+            handlers.extend(handler for handler in current.handlers if handler not in handlers)
+            if not current.propagate:
+                break
+            current = current.parent
+        return handlers
+
+    def start(self) -> None:
+        """
+        Install a queue handler on the loggers and start the listener thread.
+
+        Each logger stops propagating and hands its records to the listener thread along with the handlers they
+        reached so far. Records reaching no handler, as those of the application logger under the gunicorn workers
+        where only ``uvicorn.error`` and ``uvicorn.access`` are configured, go to the handlers of the fallback logger
+        at its level instead of :data:`logging.lastResort`.
+        """
+        if self._thread is not None:
+            return None
+        self._queue = queue.SimpleQueue()
+        sampling = SamplingFilter(settings.LOG_SAMPLE_BURST, settings.LOG_SAMPLE_WINDOW)
+        fallback = logging.getLogger(self.fallback)
+        fallback_handlers = self._reached(fallback) or [logging.StreamHandler()]
+        targets = {name: self._reached(logging.getLogger(name)) for name in self.names}
+        for name, handlers in targets.items():
+            logger = logging.getLogger(name)
+            self._saved[name] = (logger.handlers[:], logger.propagate, logger.level)
+            if not handlers:
+                handlers = fallback_handlers
+                if logger.level == logging.NOTSET:
+                    logger.setLevel(fallback.getEffectiveLevel())
+            if settings.LOG_FORMAT is LogFormat.JSON:
+                for handler in handlers:
+                    handler.setFormatter(JSONFormatter())
+            handler = DeferredQueueHandler(self._queue, handlers)
+            handler.addFilter(sampling)
+            logger.handlers = [handler]
+            logger.propagate = False
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+        return None
+
+    def _run(self) -> None:
+        """
+        Thread target, writes the queued records until the stop sentinel.
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return None
+            targets, record = item
+            for handler in targets:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Restore the synchronous handlers, then write the queued records and stop the listener thread.
+
+        :param timeout: Seconds to wait for the queue to be drained.
+        """
+        if self._thread is None:
+            return None
+        for name, (handlers, propagate, level) in self._saved.items():
+            logger = logging.getLogger(name)
+            logger.handlers, logger.propagate = handlers, propagate
+            logger.setLevel(level)
+        self._saved = {}
+        self._queue.put_nowait(None)
+        self._thread.join(timeout)
+        self._queue, self._thread = None, None
+        return None
+
+
+log_pipeline = LogPipeline(("uvicorn", "uvicorn.error", "uvicorn.access"), fallback="uvicorn.error")
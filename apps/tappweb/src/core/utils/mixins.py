@@ -1,7 +1,106 @@
-from datetime import datetime
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
 
-from sqlalchemy import func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ColumnElement, Index, Text, cast, column, func, literal, literal_column
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column
+
+from core.partitioning import period_start
+
+
+_UUID7_VERSION = 0x7 << 76
+_UUID7_VARIANT = 0x2 << 62
+_UUID7_RANDOM_MASK = (1 << 62) - 1
+_UUID7_MAX_COUNTER = 0xFFF
+
+_uuid7_lock = threading.Lock()
+_uuid7_last = 0
+
+
+def _uuid7_clock(count: int = 1) -> int:
+    """
+    Reserve ``count`` monotonically increasing (milliseconds, counter) values, encoded as ``ms << 12 | counter``.
+    The 12 bit counter keeps ids ordered within a millisecond, it borrows the next millisecond when it overflows
+    or when the clock goes backwards.
+
+    :param count: Number of values.
+    :return: The first reserved value.
+    """
+    global _uuid7_last
+    now = time.time_ns() // 1_000_000 << 12
+    with _uuid7_lock:
+        start = now if now > _uuid7_last else _uuid7_last + 1
+        _uuid7_last = start + count - 1
+    return start
+
+
+def uuid7() -> UUID:
+    """
+    Generate a time-ordered UUID (version 7): 48 bits of Unix milliseconds, a 12 bit counter and 62 random bits.
+    Ids generated by a process are strictly increasing, so B-tree inserts land on the right-most index pages.
+
+    :return: Time-ordered UUID.
+    """
+    clock = _uuid7_clock()
+    random = int.from_bytes(os.urandom(8)) & _UUID7_RANDOM_MASK
+    return UUID(int=(clock >> 12) << 80 | _UUID7_VERSION | (clock & _UUID7_MAX_COUNTER) << 64 | _UUID7_VARIANT | random)
+
+
+def uuid7_batch(count: int) -> List[UUID]:
+    """
+    Generate ``count`` increasing time-ordered UUIDs with a single lock acquisition and random read.
+
+    :param count: Number of ids.
+    :return: Time-ordered UUIDs.
+    """
+    random = os.urandom(8 * count)
+    start = _uuid7_clock(count)
+    return [
+        UUID(
+            int=(clock >> 12) << 80
+            | _UUID7_VERSION
+            | (clock & _UUID7_MAX_COUNTER) << 64
+            | _UUID7_VARIANT
+            | int.from_bytes(random[index * 8 : index * 8 + 8]) & _UUID7_RANDOM_MASK
+        )
+        for index, clock in enumerate(range(start, start + count))
+    ]
+
+
+def uuid7_floor(moment: datetime) -> UUID:
+    """
+    The smallest time-ordered UUID of a moment, usable as a keyset pagination or time range bound on a
+    :class:`UUIDPrimaryKeyMixin` primary key.
+
+    :param moment: Moment, naive datetimes are considered UTC.
+    :return: Lower bound UUID.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return UUID(int=int(moment.timestamp() * 1000) << 80 | _UUID7_VERSION | _UUID7_VARIANT)
+
+
+def uuid7_datetime(uuid: UUID) -> datetime:
+    """
+    The creation moment encoded in a time-ordered UUID.
+
+    :param uuid: Time-ordered UUID.
+    :return: Aware UTC datetime with millisecond precision.
+    """
+    return datetime.fromtimestamp((uuid.int >> 80) / 1000, tz=timezone.utc)
+
+
+class UUIDPrimaryKeyMixin:
+    """
+    A mixin class to add a time-ordered UUID primary key in a model.
+    """
+
+    id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid7)
 
 
 class TimeStampMixin:
@@ -13,3 +112,123 @@ class TimeStampMixin:
     updated_at: Mapped[datetime] = mapped_column(
         default=datetime.utcnow, server_default=func.now(), onupdate=datetime.utcnow, nullable=False
     )
+
+
+class SearchableMixin:
+    """
+    A mixin class to make text columns of a model searchable with :meth:`Repository.search`.
+    The columns listed in ``__searchable__`` get a trigram GIN index each, for substring and prefix matching, and a
+    full-text GIN index over all of them using the ``__search_config__`` text search configuration.
+    """
+
+    __searchable__: Tuple[str, ...] = ()
+    __search_config__: str = "simple"
+
+    @classmethod
+    def search_vector(cls, columns: Sequence[ColumnElement] = None) -> ColumnElement:
+        """
+        The ``tsvector`` of the searchable columns, the expression of the full-text index.
+
+        :param columns: Columns of the vector, defaults to the mapped searchable columns.
+        :return: Text search vector expression.
+        """
+        columns = columns if columns is not None else [getattr(cls, name) for name in cls.__searchable__]
+        document = None
+        for item in columns:
+            part = func.coalesce(item, literal_column("''"), type_=Text)
+            document = part if document is None else document.op("||")(literal_column("' '")).op("||")(part)
+        return func.to_tsvector(cls.search_config(), document)
+
+    @classmethod
+    def search_config(cls) -> ColumnElement:
+        """
+        The text search configuration, as a constant so that the full-text index expression is immutable.
+
+        :return: ``regconfig`` literal.
+        """
+        return literal_column(f"'{cls.__search_config__}'::regconfig")
+
+    @declared_attr.directive
+    def __table_args__(cls) -> tuple:
+        """
+        Trigram and full-text GIN indexes of the searchable columns.
+
+        :return: Table arguments.
+        """
+        if not cls.__searchable__:
+            return ()
+        return (
+            *[
+                Index(
+                    f"ix_{cls.__tablename__}_{name}_trgm",
+                    name,
+                    postgresql_using="gin",
+                    postgresql_ops={name: "gin_trgm_ops"},
+                )
+                for name in cls.__searchable__
+            ],
+            Index(
+                f"ix_{cls.__tablename__}_search",
+                cls.search_vector([column(name, Text) for name in cls.__searchable__]),
+                postgresql_using="gin",
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    """
+    A row count of a model, by value of ``column`` truncated to the ``period`` (``day``, ``week`` or ``month``) of
+    a datetime column. Without a column the aggregate is the total row count, under the empty dimension.
+    """
+
+    name: str
+    column: Optional[str] = None
+    period: Optional[str] = None
+
+    def dimension(self, row: Any) -> str:
+        """
+        The dimension of a row, as :meth:`expression` computes it in the database.
+
+        :param row: Model instance or result row with the aggregate column.
+        :return: Dimension of the row.
+        """
+        if self.column is None:
+            return ""
+        value = getattr(row, self.column)
+        if value is None:
+            return ""
+        if self.period:
+            return period_start(self.period, value).date().isoformat()
+        if isinstance(value, Enum):
+            return value.name
+        if isinstance(value, bool):
+            return str(value).lower()
+        return str(value)
+
+    def expression(self, model: type) -> ColumnElement:
+        """
+        The dimension of the rows of a model.
+
+        :param model: Model type.
+        :return: Text expression.
+        """
+        if self.column is None:
+            return literal("", Text)
+        value = getattr(model, self.column)
+        # Constants rather than parameters, so that the expression can be grouped by.
+        if self.period:
+            return func.to_char(
+                func.date_trunc(literal_column(f"'{self.period}'"), value), literal_column("'YYYY-MM-DD'")
+            )
+        return func.coalesce(cast(value, Text), literal_column("''"))
+
+
+class AggregatedMixin:
+    """
+    A mixin class to maintain the ``__aggregates__`` of a model in sharded counters, updated by
+    :meth:`Repository.save`, :meth:`Repository.insert_many` and :meth:`Repository.delete` in the transaction of the
+    write, and corrected by the periodic reconciliation job.
+    """
+
+    __aggregates__: Tuple[Aggregate, ...] = ()
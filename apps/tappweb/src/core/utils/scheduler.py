@@ -1,4 +1,152 @@
+import asyncio
+import threading
+from contextlib import suppress
+from typing import Any, Callable, Coroutine, Optional
+
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.pool import ProcessPoolExecutor
+from apscheduler.job import Job
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from pytz import utc
 
-scheduler = AsyncIOScheduler(job_defaults={"coalesce": False, "max_instances": 1}, timezone=utc)
+from config import settings
+from core.db import bind_job_engine, unbind_job_engine
+from core.tracing import tracer
+from core.types import JobExecutorType, SpanKind
+
+
+JobFunction = Callable[..., Coroutine[Any, Any, Any]]
+
+
+class JobLoop:
+    """
+    A dedicated thread running its own event loop and job engine, so that scheduler jobs
+    do not compete with requests for the event loop or the request connection pool.
+    """
+
+    def __init__(self) -> None:
+        """
+        The loop and its thread are created by :meth:`start`.
+        """
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Start the job loop thread if it is not running yet.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, name="scheduler-job-loop", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """
+        Thread target, binds the job engine to the loop and runs it until stopped, then closes it.
+        """
+        loop = self.loop
+        asyncio.set_event_loop(loop)
+        loop.call_soon(bind_job_engine)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    async def run(self, func: JobFunction, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a job coroutine on the job loop and wait for it without blocking the calling loop.
+
+        :param func: Job coroutine function.
+        :param args: Positional arguments of the job.
+        :param kwargs: Keyword arguments of the job.
+        :return: Result of the job.
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(func(*args, **kwargs), self.loop)
+        return await asyncio.wrap_future(future)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Dispose the job engine and stop the job loop thread, without blocking the calling event loop.
+        The job loop is closed by its thread once it has stopped, a job still running after ``timeout`` delays it.
+
+        :param timeout: Seconds to wait for the engine to be disposed, then for the thread to exit.
+        """
+        with self._lock:
+            if self._thread is None:
+                return
+            loop, thread = self.loop, self._thread
+            self.loop, self._thread = None, None
+        try:
+            dispose = asyncio.run_coroutine_threadsafe(unbind_job_engine(), loop)
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(asyncio.wrap_future(dispose), timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+        await asyncio.to_thread(thread.join, timeout)
+        return None
+
+
+async def run_traced(func: JobFunction, *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a job coroutine in the root span of its own trace.
+
+    :param func: Job coroutine function.
+    :param args: Positional arguments of the job.
+    :param kwargs: Keyword arguments of the job.
+    :return: Result of the job.
+    """
+    with tracer.start_trace(f"job {func.__name__}", SpanKind.CONSUMER, attributes={"job.name": func.__name__}):
+        return await func(*args, **kwargs)
+
+
+def run_in_process(func: JobFunction, *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a job coroutine in a worker process, on a fresh event loop with its own job engine.
+
+    :param func: Job coroutine function, it must be importable at module level.
+    :param args: Positional arguments of the job.
+    :param kwargs: Keyword arguments of the job.
+    :return: Result of the job.
+    """
+
+    async def _run() -> Any:
+        bind_job_engine()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            await unbind_job_engine()
+
+    return asyncio.run(_run())
+
+
+def add_job(func: JobFunction, trigger: str, executor: Optional[JobExecutorType] = None, **kwargs: Any) -> Job:
+    """
+    Schedule a job coroutine on the configured executor.
+
+    :param func: Job coroutine function.
+    :param trigger: APScheduler trigger alias.
+    :param executor: Executor overriding ``SCHEDULER_EXECUTOR`` for this job.
+    :param kwargs: Trigger and job options passed to :meth:`AsyncIOScheduler.add_job`.
+    :return: The scheduled job.
+    """
+    executor = JobExecutorType(executor or settings.SCHEDULER_EXECUTOR)
+    args = kwargs.pop("args", ())
+    kwargs.setdefault("name", func.__name__)
+    if executor is JobExecutorType.THREAD:
+        return scheduler.add_job(job_loop.run, trigger, args=(run_traced, func, *args), **kwargs)
+    if executor is JobExecutorType.PROCESS:
+        return scheduler.add_job(run_in_process, trigger, args=(run_traced, func, *args), executor="process", **kwargs)
+    return scheduler.add_job(run_traced, trigger, args=(func, *args), **kwargs)
+
+
+job_loop = JobLoop()
+
+scheduler = AsyncIOScheduler(
+    executors={"default": AsyncIOExecutor(), "process": ProcessPoolExecutor(settings.SCHEDULER_PROCESS_WORKERS)},
+    job_defaults={"coalesce": False, "max_instances": 1},
+    timezone=utc,
+)
@@ -1,9 +1,17 @@
+from typing import Generic, List, Optional, TypeVar
+
+from fastapi_pagination import Page
+from fastapi_pagination.types import GreaterEqualZero
 from pydantic import BaseModel
+from pydantic.generics import GenericModel
 from pydantic.utils import to_lower_camel  # noqa
 
 import constants
 
 
+ItemType = TypeVar("ItemType")
+
+
 class CamelCaseModel(BaseModel):
     """
     A schemas for Camelcase.
@@ -20,3 +28,20 @@ class SuccessResponse(CamelCaseModel):
     """
 
     message = constants.SUCCESS
+
+
+class CursorPage(CamelCaseModel, GenericModel, Generic[ItemType]):
+    """
+    A schemas model for a keyset paginated result, ``next_cursor`` is None on the last page.
+    """
+
+    items: List[ItemType]
+    next_cursor: Optional[str]
+
+
+class UncountedPage(Page[ItemType], Generic[ItemType]):
+    """
+    A schemas model for a page of a listing that is not counted, ``total`` and ``pages`` are only set on the last page.
+    """
+
+    total: Optional[GreaterEqualZero]
@@ -1,14 +1,20 @@
 import asyncio
-from typing import Any, Dict
+from typing import Any, Dict, Set
 
 from sqlalchemy import select
 
 import constants
 from app.app.models.webhook import WebhookUrl
 from core.db import async_session
+from core.tracing import tracer
+from core.types import SpanKind
 from core.utils import HTTPClient, logger
 
 
+_pending: Set[asyncio.Task] = set()
+
+
+@tracer.traced("webhook.deliver", SpanKind.PRODUCER)
 async def send_webhook(headers: Dict[Any, Any] = None, payload: str = None) -> bool:
     async with async_session() as session:
         async with session.begin():
@@ -22,9 +28,20 @@ async def send_webhook(headers: Dict[Any, Any] = None, payload: str = None) -> b
 
 def webhook_handler(payload: str = None) -> None:
     task = asyncio.create_task(send_webhook(payload=payload))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
     task.add_done_callback(
         lambda _: logger.exception(constants.WEBHOOK_FAILED)
         if _.exception() or _.result() is False
         else logger.info(constants.WEBHOOK_SUCCESSFUL + payload)
     )
     return None
+
+
+def webhook_backlog() -> int:
+    """
+    Number of webhooks of this worker waiting to be delivered.
+
+    :return: Pending webhook deliveries.
+    """
+    return len(_pending)
@@ -1,3 +1,5 @@
+import asyncio
+import time
 from typing import Optional
 
 from alembic import command
@@ -5,13 +7,20 @@ from alembic.config import Config
 from alembic.util import AutogenerateDiffsDetected
 from rich import print
 from rich.panel import Panel
-from typer import Typer
+from typer import Option, Typer
 
 from app.server import Application, create_app
+from benchmarks import cli as benchmark_cli
+from benchmarks.utils import print_report
 from config import settings
+from core.db import engine
+from core.index_advisor import advise, load_shapes, render_migration
+from core.online_migrations import is_lock_timeout
+from core.partitioning import maintain_partitions
 
 
 cli = Typer(pretty_exceptions_show_locals=False)
+cli.add_typer(benchmark_cli, name="benchmark")
 
 
 @cli.command(
@@ -34,13 +43,41 @@ def make_migrations() -> None:
         command.revision(alembic_cfg, autogenerate=True)
 
 
-@cli.command(help="Migrate the database")
-def migrate() -> None:
+@cli.command(
+    help="""
+    Migrate the database.
+    With --online, each migration runs in its own transaction with lock and statement timeouts,
+    and is retried when it can not acquire its locks in time.
+    """
+)
+def migrate(online: Optional[bool] = False) -> None:
     print(Panel.fit("[bold yellow]Migrating database![/bold yellow]"))
     alembic_cfg = Config()
     alembic_cfg.set_main_option("script_location", "migrations")
     alembic_cfg.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
-    command.upgrade(alembic_cfg, "head")
+    alembic_cfg.attributes["online"] = online
+    attempts = max(1, settings.MIGRATION_LOCK_RETRIES)
+    for attempt in range(1, attempts + 1):
+        try:
+            command.upgrade(alembic_cfg, "head")
+            break
+        except Exception as exc:
+            if not online or not is_lock_timeout(exc) or attempt == attempts:
+                raise
+            delay = min(2**attempt, 30)
+            print(Panel.fit(f"[bold red]Lock timeout, retrying in {delay}s (attempt {attempt})![/bold red]"))
+            time.sleep(delay)
+    print(Panel.fit("[bold yellow]Creating partitions![/bold yellow]"))
+    asyncio.run(create_partitions())
+
+
+async def create_partitions() -> None:
+    """
+    Create the current and upcoming partitions of the partitioned tables.
+    """
+    async with engine.begin() as connection:
+        await connection.run_sync(maintain_partitions, retention=False)
+    await engine.dispose()
 
 
 @cli.command(help="Rollback the database by one migration")
@@ -52,6 +89,68 @@ def rollback() -> None:
     command.downgrade(alembic_cfg, "-1")
 
 
+@cli.command(
+    help="""
+    Explain the query shapes recorded with QUERY_SHAPES_RECORD and propose indexes for the sequential scans
+    and sorts of large tables, as a migration stub to review.
+    """
+)
+def advise_indexes(
+    shapes: str = Option(settings.QUERY_SHAPES_PATH, help="Recorded query shapes file."),
+    min_rows: int = Option(10_000, help="Rows from which a table is considered large."),
+    samples: int = Option(3, help="Parameter samples explained per shape."),
+    revision: bool = Option(True, help="Write the proposals as a migration stub."),
+) -> None:
+    """
+    Propose indexes for the recorded query shapes that scan large tables.
+
+    :param shapes: Recorded query shapes file.
+    :param min_rows: Rows from which a table is considered large.
+    :param samples: Parameter samples explained per shape.
+    :param revision: Whether to write the proposals as a migration stub.
+    """
+    print(Panel.fit("[bold yellow]Explaining recorded query shapes![/bold yellow]"))
+    recorded = load_shapes(shapes)
+    if not recorded:
+        print(Panel.fit(f"[bold red]No query shapes recorded in {shapes}![/bold red]"))
+        return
+    proposals = asyncio.run(advise(recorded, min_rows, samples))
+    if not proposals:
+        print(Panel.fit("[bold green]No index to propose![/bold green]"))
+        return
+    print_report(
+        "Proposed indexes",
+        [
+            {
+                "index": proposal.ddl,
+                "reasons": "; ".join(proposal.reasons),
+                "actual (ms)": f"{proposal.actual_ms:.2f}",
+                "buffers": str(proposal.buffers),
+                "estimated cost": (
+                    f"{proposal.cost_before:.0f} -> {proposal.cost_after:.0f}"
+                    if proposal.cost_before is not None
+                    else "n/a (install hypopg)"
+                ),
+            }
+            for proposal in proposals
+        ],
+    )
+    if revision:
+        alembic_cfg = Config()
+        alembic_cfg.set_main_option("script_location", "migrations")
+        alembic_cfg.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+        script = command.revision(alembic_cfg, message="advised indexes")
+        imports, upgrade, downgrade = render_migration(proposals)
+        with open(script.path) as file:
+            content = file.read()
+        content = content.replace("import sqlalchemy as sa\n", f"import sqlalchemy as sa\n{imports}", 1)
+        content = content.replace("def upgrade() -> None:\n    pass", f"def upgrade() -> None:\n{upgrade}", 1)
+        content = content.replace("def downgrade() -> None:\n    pass", f"def downgrade() -> None:\n{downgrade}", 1)
+        with open(script.path, "w") as file:
+            file.write(content)
+        print(Panel.fit(f"[bold green]Migration stub written to {script.path}![/bold green]"))
+
+
 @cli.command(no_args_is_help=True, help="Run the server")
 def run(host: str, port: int, workers: Optional[int] = 1, debug: Optional[bool] = False) -> None:
     Application(
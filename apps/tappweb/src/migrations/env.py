@@ -2,10 +2,14 @@ import asyncio
 from logging.config import fileConfig
 
 from alembic import context
+from sqlalchemy import text
 from sqlalchemy.engine import Connection
 
 from app.app.models import Base
+from config import settings
 from core.db import engine
+from core.partitioning import is_partition
+from core.utils.mixins import SearchableMixin
 
 
 config = context.config
@@ -16,9 +20,31 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_name(name: str, type_: str, parent_names: dict) -> bool:
+    """
+    Leave the partitions created by the partition maintenance out of autogenerate.
+    """
+    return not (type_ == "table" and is_partition(name))
+
+
 def do_run_migrations(connection: Connection) -> None:
+    if any(issubclass(mapper.class_, SearchableMixin) for mapper in Base.registry.mappers):
+        # The trigram indexes of the searchable models need the extension before they are created.
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.commit()
+    online = config.attributes.get("online", False)
+    if online:
+        # Session level timeouts, so that a migration waiting on a lock fails fast instead of queueing the traffic.
+        connection.execute(text(f"SET lock_timeout = {int(settings.MIGRATION_LOCK_TIMEOUT)}"))
+        connection.execute(text(f"SET statement_timeout = {int(settings.MIGRATION_STATEMENT_TIMEOUT)}"))
+        connection.commit()
     context.configure(
-        connection=connection, target_metadata=target_metadata, version_table="auth_alembic_version", compare_type=True
+        connection=connection,
+        target_metadata=target_metadata,
+        version_table="auth_alembic_version",
+        compare_type=True,
+        include_name=include_name,
+        transaction_per_migration=online,
     )
     with context.begin_transaction():
         context.run_migrations()
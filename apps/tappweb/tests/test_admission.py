@@ -0,0 +1,136 @@
+"""Admission control unit test module."""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from core.middlewares.admission import AdmissionLimiter
+from core.types import RequestPriority
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _admit(limiter: AdmissionLimiter, name: str, priority: RequestPriority, admitted: List[str]) -> bool:
+    acquired = await limiter.acquire(priority, timeout=1.0)
+    if acquired:
+        admitted.append(name)
+    return acquired
+
+
+async def test_slots_are_acquired_without_waiting():
+    """Test that requests are admitted at once below the concurrency limit, and LOW ones are shed above it."""
+    limiter = AdmissionLimiter(max_concurrency=2, max_queue=2)
+    assert await limiter.acquire(RequestPriority.LOW, timeout=0)
+    assert await limiter.acquire(RequestPriority.NORMAL, timeout=0)
+    assert limiter.in_flight == 2
+
+    assert not await limiter.acquire(RequestPriority.LOW, timeout=1.0)
+    assert (limiter.in_flight, limiter.queued) == (2, 0)
+
+
+async def test_full_queue_sheds_requests():
+    """Test that requests are shed at once when the wait queue is full."""
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=1)
+    await limiter.acquire(RequestPriority.NORMAL, timeout=0)
+    waiter = asyncio.create_task(limiter.acquire(RequestPriority.NORMAL, timeout=1.0))
+    await asyncio.sleep(0)
+
+    assert not await limiter.acquire(RequestPriority.HIGH, timeout=1.0)
+    limiter.release()
+    assert await waiter
+    assert (limiter.in_flight, limiter.queued) == (1, 0)
+
+
+async def test_slots_are_handed_over_by_priority():
+    """Test that released slots go to the waiters by priority, then in arrival order, ahead of newcomers."""
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=10)
+    admitted: List[str] = []
+    await limiter.acquire(RequestPriority.NORMAL, timeout=0)
+    waiters = []
+    for name, priority in [("first", RequestPriority.NORMAL), ("urgent", RequestPriority.HIGH)]:
+        waiters.append(asyncio.create_task(_admit(limiter, name, priority, admitted)))
+        await asyncio.sleep(0)
+    waiters.append(asyncio.create_task(_admit(limiter, "second", RequestPriority.NORMAL, admitted)))
+    await asyncio.sleep(0)
+    assert limiter.queued == 3
+
+    for _ in range(3):
+        limiter.release()
+        await asyncio.sleep(0)
+        # Only one request holds the slot at a time, and a slot freed with waiters is not up for grabs.
+        assert limiter.in_flight == 1
+        assert not await limiter.acquire(RequestPriority.LOW, timeout=0)
+    assert await asyncio.gather(*waiters) == [True, True, True]
+    assert admitted == ["urgent", "first", "second"]
+
+    limiter.release()
+    assert (limiter.in_flight, limiter.queued) == (0, 0)
+
+
+async def test_queue_timeout():
+    """Test that waiters give up after the queue timeout without leaking a slot."""
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=10)
+    await limiter.acquire(RequestPriority.NORMAL, timeout=0)
+    assert not await limiter.acquire(RequestPriority.HIGH, timeout=0.01)
+    assert (limiter.in_flight, limiter.queued) == (1, 0)
+
+    limiter.release()
+    assert (limiter.in_flight, limiter.queued) == (0, 0)
+
+
+async def test_cancelled_waiter_is_skipped():
+    """Test that a waiter cancelled in the queue leaves it, and the slot goes to the next waiter."""
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=10)
+    admitted: List[str] = []
+    await limiter.acquire(RequestPriority.NORMAL, timeout=0)
+    cancelled = asyncio.create_task(_admit(limiter, "cancelled", RequestPriority.HIGH, admitted))
+    waiter = asyncio.create_task(_admit(limiter, "waiter", RequestPriority.NORMAL, admitted))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert limiter.queued == 1
+
+    limiter.release()
+    assert await waiter
+    assert admitted == ["waiter"]
+    assert (limiter.in_flight, limiter.queued) == (1, 0)
+
+
+async def test_slot_handed_to_a_cancelled_waiter_is_passed_on():
+    """Test that a waiter cancelled after it was handed a slot is still cancelled, and passes the slot on."""
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=10)
+    admitted: List[str] = []
+    await limiter.acquire(RequestPriority.NORMAL, timeout=0)
+    cancelled = asyncio.create_task(_admit(limiter, "cancelled", RequestPriority.HIGH, admitted))
+    waiter = asyncio.create_task(_admit(limiter, "waiter", RequestPriority.NORMAL, admitted))
+    await asyncio.sleep(0)
+
+    limiter.release()
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert await waiter
+    assert admitted == ["waiter"]
+    assert (limiter.in_flight, limiter.queued) == (1, 0)
+
+    limiter.release()
+    assert (limiter.in_flight, limiter.queued) == (0, 0)
+
+
+async def test_slot_released_as_a_waiter_times_out():
+    """Test that a slot released as the first waiter times out ends up held by exactly one waiter."""
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=10)
+    await limiter.acquire(RequestPriority.NORMAL, timeout=0)
+    expiring = asyncio.create_task(limiter.acquire(RequestPriority.HIGH, timeout=0.05))
+    waiter = asyncio.create_task(limiter.acquire(RequestPriority.NORMAL, timeout=1.0))
+    await asyncio.sleep(0)
+
+    loop = asyncio.get_running_loop()
+    loop.call_at(loop.time() + 0.05, limiter.release)
+    results = await asyncio.gather(expiring, waiter)
+    assert results in ([False, True], [True, False])
+    assert (limiter.in_flight, limiter.queued) == (1, 0)
@@ -0,0 +1,203 @@
+"""Sharded aggregate counters unit test module."""
+
+import asyncio
+import random
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.app.models.user import UserModel
+from config import settings
+from core.aggregates import reconcile_counters, update_counters
+from core.utils.mixins import Aggregate
+
+
+pytestmark = pytest.mark.anyio
+
+
+class Rows:
+    """A result of returned rows."""
+
+    def __init__(self, rows: List[Tuple[str]]) -> None:
+        self.rows = rows
+
+    def all(self) -> List[Tuple[str]]:
+        """All the rows."""
+        return self.rows
+
+
+class Session:
+    """A session applying the counter upserts to in-memory shards, and returning fixed rows to other statements."""
+
+    def __init__(self, returned: List[Tuple[str]] = ()) -> None:
+        self.shards: Counter = Counter()
+        self.statements: List[str] = []
+        self.writes: List[List[Tuple[str, str, int]]] = []
+        self.returned = list(returned)
+
+    async def execute(self, statement) -> Rows:
+        """Run a statement."""
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.statements.append(str(compiled))
+        if "VALUES" in str(compiled):
+            params: Dict[str, object] = compiled.params
+            rows = []
+            for index in range(len(params) // 4):
+                key = (params[f"name_m{index}"], params[f"dimension_m{index}"], params[f"shard_m{index}"])
+                self.shards[key] += params[f"value_m{index}"]
+                rows.append(key)
+            self.writes.append(rows)
+        return Rows(self.returned)
+
+    def value(self, name: str, dimension: str = "") -> int:
+        """Sum of the shards of a dimension."""
+        return sum(value for (key, part, _), value in self.shards.items() if (key, part) == (name, dimension))
+
+
+class Database:
+    """Committed user counts and counter shards, with a single advisory lock."""
+
+    def __init__(self, rows: Counter, shards: Counter) -> None:
+        self.rows = rows
+        self.shards = shards
+        self.lock = asyncio.Lock()
+
+
+class Transaction:
+    """
+    A READ COMMITTED transaction: each statement reads the committed shards, and its writes are applied on commit.
+    """
+
+    def __init__(self, database: Database) -> None:
+        self.database = database
+        self.pending: Counter = Counter()
+        self.locked = False
+
+    async def execute(self, statement) -> Rows:
+        """Run the advisory lock statement or the reconciliation upsert of an aggregate."""
+        compiled = statement.compile(dialect=postgresql.dialect())
+        if "pg_advisory_xact_lock" in str(compiled):
+            await self.database.lock.acquire()
+            self.locked = True
+            return Rows([])
+        name = compiled.params["name_1"]
+        counted: Counter = Counter()
+        for (key, dimension, _), value in self.database.shards.items():
+            if key == name:
+                counted[dimension] += value
+        actual = {dimension: value for (key, dimension), value in self.database.rows.items() if key == name}
+        corrected = []
+        for dimension in sorted(set(actual) | set(counted)):
+            drift = actual.get(dimension, 0) - counted[dimension]
+            if drift:
+                self.pending[(name, dimension, 0)] += drift
+                corrected.append((dimension,))
+        return Rows(corrected)
+
+    async def commit(self) -> None:
+        """Apply the writes, then release the advisory lock."""
+        await asyncio.sleep(0)
+        self.database.shards.update(self.pending)
+        if self.locked:
+            self.database.lock.release()
+
+
+def _user(created_at: datetime) -> SimpleNamespace:
+    return SimpleNamespace(created_at=created_at)
+
+
+async def test_counters_follow_writes():
+    """Test that the summed shards count inserted and deleted rows per dimension."""
+    random.seed(0)
+    session = Session()
+    first, second = datetime(2024, 3, 4, 9), datetime(2024, 3, 5, 23, 59)
+    await update_counters(session, UserModel, [_user(first), _user(first), _user(second)])
+    await update_counters(session, UserModel, [_user(second), _user(first)])
+    await update_counters(session, UserModel, [_user(first)], -1)
+
+    assert session.value("users") == 4
+    assert session.value("users_per_day", "2024-03-04") == 2
+    assert session.value("users_per_day", "2024-03-05") == 2
+    for rows in session.writes:
+        assert len({shard for _, _, shard in rows}) == 1
+        assert rows == sorted(rows)
+
+
+async def test_counters_spread_over_shards():
+    """Test that writes are spread over the shards without changing the totals."""
+    random.seed(0)
+    session = Session()
+    for _ in range(64):
+        await update_counters(session, UserModel, [_user(datetime(2024, 3, 4))])
+
+    shards = {shard for _, _, shard in session.shards}
+    assert 1 < len(shards) and shards <= set(range(settings.AGGREGATE_SHARDS))
+    assert session.value("users") == session.value("users_per_day", "2024-03-04") == 64
+
+
+async def test_counters_without_aggregates():
+    """Test that writes to models without aggregates or without rows execute nothing."""
+    session = Session()
+    await update_counters(session, SimpleNamespace, [_user(datetime(2024, 3, 4))])
+    await update_counters(session, UserModel, [])
+    assert session.statements == []
+
+
+async def test_reconciliation():
+    """Test that each aggregate is reconciled in a single upsert against a full join of the real and summed counts."""
+    session = Session(returned=[("",), ("2024-03-04",)])
+    assert await reconcile_counters(session, UserModel) == 4
+
+    lock, total, daily = session.statements
+    assert lock == "SELECT pg_advisory_xact_lock(%(key)s)"
+    for statement in (total, daily):
+        assert statement.startswith("INSERT INTO aggregate_counters (name, dimension, shard, value) SELECT")
+        assert "FULL OUTER JOIN" in statement
+        assert (
+            "ON CONFLICT (name, dimension, shard) DO UPDATE SET value = (aggregate_counters.value + excluded.value)"
+            in statement
+        )
+        assert "RETURNING aggregate_counters.dimension" in statement
+    assert "GROUP BY users" not in total.split("FULL OUTER JOIN")[0]
+    assert "date_trunc('day', users.created_at)" in daily
+    assert "GROUP BY to_char(date_trunc('day', users.created_at), 'YYYY-MM-DD')" in daily
+
+
+async def test_concurrent_reconciliations():
+    """Test that reconciliations run by every worker at once correct the drift once."""
+    database = Database(
+        rows=Counter({("users", ""): 5, ("users_per_day", "2024-03-04"): 3, ("users_per_day", "2024-03-05"): 2}),
+        shards=Counter(
+            {("users", "", 3): 4, ("users_per_day", "2024-03-04", 3): 4, ("users_per_day", "2024-03-06", 1): 1}
+        ),
+    )
+
+    async def reconcile() -> int:
+        transaction = Transaction(database)
+        corrected = await reconcile_counters(transaction, UserModel)
+        await transaction.commit()
+        return corrected
+
+    assert sorted(await asyncio.gather(*[reconcile() for _ in range(4)])) == [0, 0, 0, 4]
+    for (name, dimension), value in database.rows.items():
+        assert sum(count for key, count in database.shards.items() if key[:2] == (name, dimension)) == value
+    assert sum(count for key, count in database.shards.items() if key[:2] == ("users_per_day", "2024-03-06")) == 0
+
+
+@pytest.mark.parametrize(
+    ("period", "created_at", "dimension"),
+    [
+        (None, datetime(2024, 3, 6, 12), "2024-03-06 12:00:00"),
+        ("day", datetime(2024, 3, 6, 23, 59), "2024-03-06"),
+        ("week", datetime(2024, 3, 6, 12), "2024-03-04"),
+        ("month", datetime(2024, 3, 6, 12), "2024-03-01"),
+        ("day", None, ""),
+    ],
+)
+def test_dimension(period, created_at, dimension):
+    """Test that rows are counted under the dimension of their period."""
+    assert Aggregate("users", "created_at", period).dimension(_user(created_at)) == dimension
@@ -0,0 +1,107 @@
+"""Response cache unit test module."""
+
+import asyncio
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, List
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, Response
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from core.cache import CacheConfig, CachedRoute, InMemoryCacheBackend, ResponseCache, cache_response
+
+
+pytestmark = pytest.mark.anyio
+
+CONFIG = CacheConfig(ttl=60, stale_ttl=60, namespace="tests")
+
+
+class Handler:
+    """A route handler call counting its runs and the closing of its dependencies."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls = 0
+        self.closed = 0
+
+    async def __call__(self, stack: AsyncExitStack) -> Response:
+        """Render a response, registering a dependency cleanup on the exit stack."""
+        self.calls += 1
+        stack.push_async_callback(self.close)
+        await asyncio.sleep(self.delay)
+        return JSONResponse({"calls": self.calls})
+
+    async def close(self) -> None:
+        """Dependency cleanup."""
+        self.closed += 1
+
+
+async def test_concurrent_misses_are_coalesced():
+    """Test that concurrent misses of a key run the handler once."""
+    cache = ResponseCache(InMemoryCacheBackend(max_entries=10))
+    handler = Handler(delay=0.05)
+    results = await asyncio.gather(*(cache.fetch("key", CONFIG, handler) for _ in range(5)))
+    assert handler.calls == 1
+    assert {status for _, _, status in results} == {"MISS"}
+    assert len({id(entry) for entry, _, _ in results}) == 1
+    assert (await cache.fetch("key", CONFIG, handler))[2] == "HIT"
+
+
+async def test_computation_closes_its_dependencies():
+    """Test that the dependencies of a computation are closed once it has returned."""
+    cache = ResponseCache(InMemoryCacheBackend(max_entries=10))
+    handler = Handler()
+    await cache.fetch("key", CONFIG, handler)
+    assert handler.closed == 1
+
+
+async def test_stale_entry_is_revalidated_in_the_background():
+    """Test that a stale entry is served while a background computation, closing its dependencies, renews it."""
+    cache = ResponseCache(InMemoryCacheBackend(max_entries=10))
+    handler = Handler()
+    entry, _, _ = await cache.fetch("key", CONFIG, handler)
+    entry.expires_at = 0
+
+    stale, _, status = await cache.fetch("key", CONFIG, handler)
+    assert status == "STALE" and stale is entry
+    await asyncio.sleep(0.01)
+    assert handler.calls == 2 and handler.closed == 2
+    assert (await cache.fetch("key", CONFIG, handler))[2] == "HIT"
+
+
+async def test_invalidation_drops_the_namespace():
+    """Test that an invalidated namespace is computed again."""
+    cache = ResponseCache(InMemoryCacheBackend(max_entries=10))
+    handler = Handler()
+    await cache.fetch("key", CONFIG, handler)
+    await cache.invalidate(CONFIG.namespace)
+    assert (await cache.fetch("key", CONFIG, handler))[2] == "MISS"
+    assert handler.calls == 2
+
+
+def test_cached_route_closes_yield_dependencies():
+    """Test that the yield dependencies of a cached endpoint are closed on misses and skipped on hits."""
+    events: List[str] = []
+
+    async def session() -> AsyncIterator[str]:
+        events.append("open")
+        yield "session"
+        events.append("close")
+
+    router = APIRouter(route_class=CachedRoute)
+
+    @router.get("/items")
+    @cache_response(ttl=60, namespace="tests.items")
+    async def items(value: str = Depends(session)):
+        return {"value": value}
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    first = client.get("/items")
+    second = client.get("/items")
+    assert first.json() == second.json() == {"value": "session"}
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert events == ["open", "close"]
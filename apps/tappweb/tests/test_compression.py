@@ -0,0 +1,161 @@
+"""Response compression unit test module."""
+
+import zlib
+from datetime import datetime
+from typing import Iterator
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from core.cache import CacheConfig, CacheEntry
+from core.middlewares import CompressionMiddleware
+from core.types import ContentEncoding
+from core.utils import ConditionalRequest, compression
+from core.utils.compression import StreamCompressor, negotiate
+from core.utils.conditional import etag_matches
+
+
+BODY = [{"id": index, "name": f"user-{index}"} for index in range(100)]
+ETAG = 'W/"0123456789abcdef0123"'
+CONFIG = CacheConfig(ttl=60, stale_ttl=60, namespace="tests")
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """A client of an application compressing the responses of at least 512 bytes."""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=512)
+
+    @app.get("/users")
+    async def list_users(size: int = 100) -> JSONResponse:
+        return JSONResponse(BODY[:size], headers={"ETag": ETAG})
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        def chunks() -> Iterator[bytes]:
+            for index in range(10):
+                yield f"line {index}\n".encode() * 100
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/user")
+    async def get_user(conditional: ConditionalRequest = Depends()) -> JSONResponse:
+        conditional.set_validators(datetime(2024, 3, 4))
+        if conditional.not_modified:
+            return conditional.not_modified_response()
+        return JSONResponse(BODY, headers=conditional.headers())
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "encoding"),
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", ContentEncoding.GZIP),
+        ("gzip, br, zstd", ContentEncoding.ZSTD),
+        ("gzip, br;q=0.9", ContentEncoding.GZIP),
+        ("br;q=0.5, gzip;q=0.8, zstd;q=0", ContentEncoding.GZIP),
+        ("*", ContentEncoding.ZSTD),
+        ("*;q=0.5, br", ContentEncoding.BROTLI),
+        ("gzip;q=invalid", None),
+    ],
+)
+def test_negotiation(monkeypatch, accept_encoding, encoding):
+    """Test that the content coding with the highest quality wins, ties going to the server preference."""
+    monkeypatch.setattr(compression, "AVAILABLE_ENCODINGS", tuple(ContentEncoding))
+    assert negotiate(accept_encoding) == encoding
+
+
+def test_compressed_response(client):
+    """Test that large responses are compressed with a suffixed entity tag."""
+    response = client.get("/users", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"0123456789abcdef0123-gzip"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == BODY
+
+
+@pytest.mark.parametrize(("size", "accept_encoding"), [(100, "identity"), (2, "gzip")])
+def test_identity_response(client, size, accept_encoding):
+    """Test that responses below the threshold or to clients without compression keep their body and entity tag."""
+    response = client.get("/users", params={"size": size}, headers={"Accept-Encoding": accept_encoding})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+    assert response.json() == BODY[:size]
+
+
+def test_streamed_response(client):
+    """Test that streamed responses are compressed chunk by chunk."""
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "".join(f"line {index}\n" * 100 for index in range(10))
+
+
+def test_stream_chunks_are_flushed():
+    """Test that every compressed chunk can be decoded as soon as it is received."""
+    compressor, decompressor = StreamCompressor(ContentEncoding.GZIP), zlib.decompressobj(31)
+    for chunk in (b"first chunk", b"second chunk"):
+        assert decompressor.decompress(compressor.compress(chunk)) == chunk
+    assert decompressor.decompress(compressor.finish(b"last")) == b"last"
+    assert decompressor.eof
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "etag", "status_code"),
+    [
+        (None, None, 200),
+        ("{etag}", "{etag}", 304),
+        ("{gzip}", "{gzip}", 304),
+        ('W/"other-gzip", {gzip}', "{gzip}", 304),
+        ('W/"other-gzip"', None, 200),
+    ],
+)
+def test_conditional_request(client, if_none_match, etag, status_code):
+    """Test that the entity tags of compressed representations are revalidated, and returned by the 304."""
+    current = client.get("/user", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    tags = {"etag": current, "gzip": f'{current[:-1]}-gzip"'}
+    headers = {"Accept-Encoding": "gzip"}
+    if if_none_match:
+        headers["If-None-Match"] = if_none_match.format(**tags)
+    response = client.get("/user", headers=headers)
+    assert response.status_code == status_code
+    if etag:
+        assert response.headers["etag"] == etag.format(**tags)
+
+
+def test_cache_entry_variants():
+    """Test that the compressed variants of cached responses get a suffixed entity tag and revalidate."""
+    entry = CacheEntry.from_response(JSONResponse(BODY, headers={"ETag": ETAG}), CONFIG)
+    compressed = entry.to_response("HIT", ContentEncoding.GZIP)
+    assert compressed.headers["etag"] == 'W/"0123456789abcdef0123-gzip"'
+    assert zlib.decompress(compressed.body, 31) == entry.body
+    assert entry.to_response("HIT").headers["etag"] == ETAG
+
+    request = Request({"type": "http", "headers": [(b"if-none-match", compressed.headers["etag"].encode())]})
+    assert entry.not_modified(request)
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "matches"),
+    [
+        (ETAG, True),
+        ('"0123456789abcdef0123"', True),
+        ('W/"0123456789abcdef0123-br"', True),
+        ('W/"0123456789abcdef0123-zstd", W/"other"', True),
+        ('W/"0123456789abcdef0123-deflate"', False),
+        ('W/"other-gzip"', False),
+        ("*", True),
+        (None, False),
+    ],
+)
+def test_etag_matches(if_none_match, matches):
+    """Test that entity tags are compared weakly, ignoring their content coding suffix."""
+    assert etag_matches(if_none_match, ETAG) is matches
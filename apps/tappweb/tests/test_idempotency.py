@@ -0,0 +1,159 @@
+"""Idempotency-Key unit test module."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI, Response
+from pydantic import BaseModel
+
+import core.idempotency
+from app.server import start_exception_handlers
+from core.idempotency import IdempotencyConfig, IdempotencyStore, IdempotentRoute, idempotent
+
+
+pytestmark = pytest.mark.anyio
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """An idempotency store keeping the keys in memory with the claim semantics of the table upsert."""
+
+    def __init__(self, lock_timeout: float = 30.0, wait_timeout: float = 1.0) -> None:
+        super().__init__(lock_timeout=lock_timeout, wait_timeout=wait_timeout, poll_interval=0.01)
+        self.rows: Dict[bytes, SimpleNamespace] = {}
+
+    async def _claim(
+        self, key: bytes, request_hash: bytes, config: IdempotencyConfig
+    ) -> Tuple[bool, Optional[SimpleNamespace]]:
+        """Claim a key unless it is in flight within its lock or already has a response."""
+        now = time.time()
+        row = self.rows.get(key)
+        if row is None or row.expires_at < now or (row.status_code is None and row.locked_until < now):
+            self.rows[key] = SimpleNamespace(
+                request_hash=request_hash,
+                status_code=None,
+                headers=None,
+                body=None,
+                locked_until=now + self.lock_timeout,
+                expires_at=now + config.ttl,
+            )
+            return True, None
+        return False, row
+
+    async def _store(self, key: bytes, response: Response) -> None:
+        """Store the response of a key."""
+        row = self.rows[key]
+        row.status_code, row.body = response.status_code, response.body
+        row.headers = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.raw_headers]
+        return None
+
+    async def _release(self, key: bytes) -> None:
+        """Drop the claim of a key."""
+        if self.rows.get(key) is not None and self.rows[key].status_code is None:
+            del self.rows[key]
+        return None
+
+
+class Order(BaseModel):
+    """An order request."""
+
+    item: str
+
+
+@pytest.fixture
+def store(monkeypatch) -> MemoryIdempotencyStore:
+    """Serve the idempotent routes from an in-memory store."""
+    store = MemoryIdempotencyStore()
+    monkeypatch.setattr(core.idempotency, "idempotency_store", store)
+    return store
+
+
+@pytest.fixture
+def calls() -> List[str]:
+    """Items ordered by the endpoint runs."""
+    return []
+
+
+@pytest.fixture
+def client(store, calls) -> httpx.AsyncClient:
+    """A client of an application with an idempotent endpoint."""
+    router = APIRouter(route_class=IdempotentRoute)
+
+    @router.post("/orders")
+    @idempotent(ttl=60)
+    async def create_order(order: Order):
+        calls.append(order.item)
+        await asyncio.sleep(0.5 if order.item == "slow" else 0.05)
+        if order.item == "broken":
+            raise RuntimeError("Order failed")
+        return {"item": order.item, "number": len(calls)}
+
+    app = FastAPI()
+    app.include_router(router)
+    start_exception_handlers(app)
+    return httpx.AsyncClient(app=app, base_url="http://test")
+
+
+async def test_response_is_replayed(client, calls):
+    """Test that a key sent again gets the stored response without running the endpoint."""
+    first = await client.post("/orders", json={"item": "book"}, headers={"Idempotency-Key": "a"})
+    second = await client.post("/orders", json={"item": "book"}, headers={"Idempotency-Key": "a"})
+    assert first.json() == second.json() == {"item": "book", "number": 1}
+    assert "idempotent-replayed" not in first.headers and second.headers["idempotent-replayed"] == "true"
+    assert calls == ["book"]
+
+
+async def test_requests_without_key_are_not_affected(client, calls):
+    """Test that requests without the header always run the endpoint."""
+    await client.post("/orders", json={"item": "book"})
+    await client.post("/orders", json={"item": "book"})
+    assert calls == ["book", "book"]
+
+
+async def test_concurrent_requests_run_once(client, calls):
+    """Test that concurrent requests of a key wait for the first one and replay its response."""
+    responses = await asyncio.gather(
+        *(client.post("/orders", json={"item": "book"}, headers={"Idempotency-Key": "b"}) for _ in range(5))
+    )
+    assert calls == ["book"]
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.text for response in responses}) == 1
+
+
+async def test_reused_key_is_rejected(client, calls):
+    """Test that a key sent again with another body is rejected with 422."""
+    await client.post("/orders", json={"item": "book"}, headers={"Idempotency-Key": "c"})
+    response = await client.post("/orders", json={"item": "pen"}, headers={"Idempotency-Key": "c"})
+    assert response.status_code == 422
+    assert calls == ["book"]
+
+
+async def test_in_flight_key_times_out(client, store, calls):
+    """Test that a request waiting longer than the wait timeout for an in-flight key gets 409 with Retry-After."""
+    store.wait_timeout = 0.05
+    first = asyncio.create_task(client.post("/orders", json={"item": "slow"}, headers={"Idempotency-Key": "d"}))
+    await asyncio.sleep(0.01)
+    second = await client.post("/orders", json={"item": "slow"}, headers={"Idempotency-Key": "d"})
+    assert second.status_code == 409 and second.headers["retry-after"] == "1"
+    assert (await first).status_code == 200
+    assert calls == ["slow"]
+
+
+async def test_failed_request_releases_the_key(client, store, calls):
+    """Test that a failed request releases its key, so that the client can retry it."""
+    with pytest.raises(RuntimeError):
+        await client.post("/orders", json={"item": "broken"}, headers={"Idempotency-Key": "e"})
+    assert store.rows == {}
+    with pytest.raises(RuntimeError):
+        await client.post("/orders", json={"item": "broken"}, headers={"Idempotency-Key": "e"})
+    assert calls == ["broken", "broken"]
+
+
+async def test_invalid_key_is_rejected(client, calls):
+    """Test that an oversized key is rejected with 400."""
+    response = await client.post("/orders", json={"item": "book"}, headers={"Idempotency-Key": "k" * 256})
+    assert response.status_code == 400
+    assert calls == []
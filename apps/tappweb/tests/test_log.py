@@ -0,0 +1,64 @@
+"""Log pipeline unit test module."""
+
+import logging
+import threading
+from typing import List, Tuple
+
+from config import settings
+from core.utils.log import LogPipeline
+
+
+class Capture(logging.Handler):
+    """A handler keeping the records it writes and the thread writing them."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[Tuple[logging.LogRecord, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Keep a record."""
+        self.records.append((record, threading.current_thread().name))
+
+
+def test_records_reaching_no_handler_go_to_the_fallback_handlers():
+    """Test that, as under the gunicorn workers, the handler-less application logger is queued and sampled."""
+    error_log, app_log = logging.getLogger("tests.worker.error"), logging.getLogger("tests.worker")
+    capture = Capture()
+    error_log.handlers, error_log.propagate = [capture], False
+    error_log.setLevel(logging.INFO)
+    # Nothing above the application logger handles its records, as the root logger under gunicorn.
+    app_log.propagate = False
+
+    pipeline = LogPipeline(("tests.worker",), fallback="tests.worker.error")
+    pipeline.start()
+    try:
+        app_log.info("Starting")
+        for _ in range(settings.LOG_SAMPLE_BURST + 10):
+            app_log.error("Failure")
+    finally:
+        pipeline.stop()
+
+    messages = [record.getMessage() for record, _ in capture.records]
+    assert messages == ["Starting"] + ["Failure"] * settings.LOG_SAMPLE_BURST
+    assert {thread for _, thread in capture.records} == {"log-listener"}
+    assert (app_log.handlers, app_log.propagate, app_log.level) == ([], False, logging.NOTSET)
+
+
+def test_records_are_written_once_to_the_handlers_they_reach():
+    """Test that a queued logger writes to its own and its ancestors handlers, once each."""
+    parent, child = logging.getLogger("tests.tree"), logging.getLogger("tests.tree.child")
+    own, inherited = Capture(), Capture()
+    parent.handlers, parent.propagate = [inherited], False
+    child.handlers = [own]
+    child.setLevel(logging.INFO)
+
+    pipeline = LogPipeline(("tests.tree.child", "tests.tree"), fallback="tests.tree")
+    pipeline.start()
+    try:
+        child.info("Hello")
+    finally:
+        pipeline.stop()
+
+    assert [record.getMessage() for record, _ in own.records] == ["Hello"]
+    assert [record.getMessage() for record, _ in inherited.records] == ["Hello"]
+    assert child.handlers == [own] and parent.handlers == [inherited]
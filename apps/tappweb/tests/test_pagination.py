@@ -0,0 +1,50 @@
+"""Repository pagination unit test module."""
+
+from typing import List
+
+import pytest
+from fastapi_pagination import Params
+from sqlalchemy import select
+
+from app.app.models.user import UserModel
+from app.app.repositories.repository import Repository
+from core.types import CountStrategy
+from core.utils import UncountedPage
+
+
+pytestmark = pytest.mark.anyio
+
+
+class Rows:
+    """A scalar result."""
+
+    def __init__(self, rows: List[str]) -> None:
+        self.rows = rows
+
+    def all(self) -> List[str]:
+        """All the rows."""
+        return self.rows
+
+
+class Session:
+    """A session serving a fixed list of rows, honouring the limit and offset of the queries."""
+
+    def __init__(self, rows: List[str]) -> None:
+        self.rows = rows
+
+    async def scalars(self, query) -> Rows:
+        """Rows of a query."""
+        return Rows(self.rows[query._offset : query._offset + query._limit])
+
+
+@pytest.mark.parametrize(
+    ("count", "page", "total", "items"),
+    [(0, 1, 0, 0), (5, 1, 5, 5), (10, 1, None, 5), (10, 2, 10, 5), (12, 2, None, 5), (12, 3, 12, 2), (10, 3, None, 0)],
+)
+async def test_uncounted_pagination(count, page, total, items):
+    """Test that pages are not counted with the NONE strategy, the total being only set on the last page."""
+    repository = Repository(Session([f"user-{index}" for index in range(count)]))
+    result = await repository.paginate(select(UserModel), Params(page=page, size=5), CountStrategy.NONE)
+    assert isinstance(result, UncountedPage)
+    assert (result.total, len(result.items), result.page, result.size) == (total, items, page, 5)
+    assert result.pages == (None if total is None else -(-total // 5))
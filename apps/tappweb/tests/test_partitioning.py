@@ -0,0 +1,62 @@
+"""Range partitioning unit test module."""
+
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.schema import CreateTable
+
+from core import partitioning
+from core.partitioning import RangePartitionMixin, maintain_partitions
+from core.utils.mixins import SearchableMixin, TimeStampMixin, UUIDPrimaryKeyMixin
+
+
+class Base(DeclarativeBase):
+    """A registry of its own, kept out of the application models."""
+
+
+class EventModel(Base, UUIDPrimaryKeyMixin, RangePartitionMixin, TimeStampMixin, SearchableMixin):
+    """A searchable partitioned model."""
+
+    __tablename__ = "events"
+    __searchable__ = ("name",)
+    __partition_premake__ = 1
+
+    name: Mapped[str] = mapped_column(String)
+
+
+class Connection:
+    """A synchronous connection recording the executed statements."""
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+
+    def execute(self, statement) -> None:
+        """Run a statement."""
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+
+
+def test_partitioned_table_keeps_the_mixin_table_arguments():
+    """Test that a partitioned table keeps the indexes of the mixins listed after the partitioning one."""
+    assert {index.name for index in EventModel.__table__.indexes} == {"ix_events_name_trgm", "ix_events_search"}
+    ddl = str(CreateTable(EventModel.__table__).compile(dialect=postgresql.dialect()))
+    assert "PRIMARY KEY (id, created_at)" in ddl
+    assert ddl.strip().endswith("PARTITION BY RANGE (created_at)")
+
+
+def test_maintenance_is_serialized(monkeypatch):
+    """Test that the partition maintenance takes its advisory lock before any DDL statement."""
+    monkeypatch.setattr(partitioning, "partitioned_models", lambda: [EventModel])
+    connection = Connection()
+    maintain_partitions(connection, now=datetime(2024, 3, 6))
+
+    lock, *statements = connection.statements
+    assert lock == "SELECT pg_advisory_xact_lock(%(key)s)"
+    assert statements == [
+        "CREATE TABLE IF NOT EXISTS events_p20240301 PARTITION OF events "
+        "FOR VALUES FROM ('2024-03-01T00:00:00') TO ('2024-04-01T00:00:00')",
+        "CREATE TABLE IF NOT EXISTS events_p20240401 PARTITION OF events "
+        "FOR VALUES FROM ('2024-04-01T00:00:00') TO ('2024-05-01T00:00:00')",
+    ]
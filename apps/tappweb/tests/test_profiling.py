@@ -0,0 +1,75 @@
+"""Worker profiling unit test module."""
+
+import asyncio
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.app.controllers.debug import router
+from core.auth import admin_token
+from core.profiling import TaskInspector
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """A client of the debug routes, authenticated as an administrator."""
+    app = FastAPI()
+    app.include_router(router, prefix="/debug")
+    app.dependency_overrides[admin_token] = lambda: None
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    ("method", "path"),
+    [("GET", "/debug/profile?duration=0.01"), ("GET", "/debug/tasks"), ("POST", "/debug/tasks/stop")],
+)
+def test_worker_pid(client, method, path):
+    """Test that every debug route tells which worker answered."""
+    response = client.request(method, path)
+    assert response.status_code == 200
+    assert response.headers["x-worker-pid"] == str(os.getpid())
+
+
+def test_profile(client):
+    """Test that profiles are returned as collapsed stacks."""
+    response = client.get("/debug/profile", params={"duration": 0.05, "interval": 0.01})
+    assert response.headers["content-type"].startswith("text/plain")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+
+@pytest.mark.anyio
+async def test_task_factory_is_restored():
+    """Test that task creation times are recorded from the first dump until stop restores the task factory."""
+    loop, inspector = asyncio.get_running_loop(), TaskInspector()
+    original = loop.get_task_factory()
+    inspector.dump()
+    assert loop.get_task_factory() is not original
+
+    task = asyncio.create_task(asyncio.sleep(1), name="sleeper")
+    (dumped,) = [item for item in inspector.dump() if item["name"] == "sleeper"]
+    assert dumped["coroutine"] == "sleep" and dumped["age"] >= 0
+    assert task in inspector._created
+
+    inspector.stop()
+    assert loop.get_task_factory() is original
+    assert asyncio.create_task(asyncio.sleep(0)) not in inspector._created
+    inspector.stop()
+    task.cancel()
+
+
+@pytest.mark.anyio
+async def test_replaced_task_factory_is_kept():
+    """Test that stop leaves alone a task factory replaced after the first dump."""
+    loop, inspector = asyncio.get_running_loop(), TaskInspector()
+    original = loop.get_task_factory()
+    inspector.dump()
+
+    def factory(_loop, coro, **kwargs):
+        return asyncio.Task(coro, loop=_loop, **kwargs)
+
+    loop.set_task_factory(factory)
+    inspector.stop()
+    assert loop.get_task_factory() is factory
+    loop.set_task_factory(original)
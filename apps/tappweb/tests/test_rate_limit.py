@@ -0,0 +1,123 @@
+"""Rate limiting unit test module."""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from core import rate_limit
+from core.rate_limit import DatabaseRateLimitBackend, InMemoryRateLimitBackend, RateLimit
+
+
+pytestmark = pytest.mark.anyio
+
+LIMIT = RateLimit(capacity=3, refill_rate=2.0)
+
+
+class Clock:
+    """A monotonic clock moved by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Result:
+    """A result of a single returned row."""
+
+    def __init__(self, row: tuple) -> None:
+        self.row = row
+
+    def one(self) -> tuple:
+        """The returned row."""
+        return self.row
+
+
+class Engine:
+    """An engine recording the executed statements, and returning the tokens and decision of a new bucket."""
+
+    def __init__(self) -> None:
+        self.statements: List = []
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator["Engine"]:
+        """Open a transaction."""
+        yield self
+
+    async def execute(self, statement) -> Result:
+        """Run a statement."""
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.statements.append(compiled)
+        return Result((compiled.params["tokens"], compiled.params["allowed"]))
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    """A clock replacing the monotonic time of the rate limiter."""
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+async def test_bucket_refill(clock):
+    """Test that buckets start full, are refilled at the sustained rate and never above their capacity."""
+    backend = InMemoryRateLimitBackend(max_keys=10)
+    results = [await backend.consume("client", LIMIT) for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    assert (results[-1].retry_after, results[-1].reset_after) == (1, 2)
+
+    clock.now += 0.5
+    assert (await backend.consume("client", LIMIT)).allowed
+    assert not (await backend.consume("client", LIMIT)).allowed
+
+    clock.now += 60
+    result = await backend.consume("client", LIMIT)
+    assert (result.allowed, result.remaining) == (True, 2)
+
+
+async def test_cost_above_capacity(clock):
+    """Test that a cost above the capacity is denied without taking any token."""
+    backend = InMemoryRateLimitBackend(max_keys=10)
+    result = await backend.consume("client", LIMIT, cost=5)
+    assert (result.allowed, result.remaining, result.retry_after) == (False, 3, 1)
+    assert (await backend.consume("client", LIMIT, cost=3)).allowed
+
+
+async def test_least_recently_used_eviction(clock):
+    """Test that the least recently used bucket is forgotten for a new key once the buckets are full."""
+    backend = InMemoryRateLimitBackend(max_keys=2)
+    for key in ("first", "second", "first"):
+        await backend.consume(key, LIMIT, cost=3)
+    await backend.consume("third", LIMIT, cost=3)
+
+    assert list(backend._buckets) == ["first", "third"]
+    assert not (await backend.consume("first", LIMIT)).allowed
+    assert (await backend.consume("second", LIMIT)).allowed
+
+
+async def test_headers(clock):
+    """Test that the rate limit headers are returned, with a Retry-After once the bucket is empty."""
+    backend = InMemoryRateLimitBackend(max_keys=10)
+    result = await backend.consume("client", LIMIT)
+    assert result.headers() == {"RateLimit-Limit": "3", "RateLimit-Remaining": "2", "RateLimit-Reset": "1"}
+
+    result = await backend.consume("client", LIMIT, cost=3)
+    assert result.headers()["Retry-After"] == "1"
+
+
+@pytest.mark.parametrize(("cost", "tokens", "allowed"), [(1, 2, True), (3, 0, True), (4, 3, False)])
+async def test_database_upsert(cost, tokens, allowed):
+    """Test that the upsert refills the bucket in the database, and inserts new buckets checked against their cost."""
+    backend = DatabaseRateLimitBackend(pool_size=1, max_overflow=0)
+    backend.engine = Engine()
+    result = await backend.consume("client", LIMIT, cost=cost)
+    assert (result.allowed, result.remaining) == (allowed, tokens)
+
+    (statement,) = backend.engine.statements
+    assert str(statement).startswith("INSERT INTO rate_limit_buckets (key, tokens, updated_at, allowed) VALUES")
+    assert "ON CONFLICT (key) DO UPDATE SET tokens = CASE WHEN (least(" in str(statement)
+    assert "RETURNING rate_limit_buckets.tokens, rate_limit_buckets.allowed" in str(statement)
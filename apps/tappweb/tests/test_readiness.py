@@ -0,0 +1,112 @@
+"""Readiness probe unit test module."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import QueuePool
+
+from app import server
+from core import readiness
+from core.readiness import ReadinessProber, ReadinessReport
+
+
+pytestmark = pytest.mark.anyio
+
+
+class Connection:
+    """A connection answering after a delay."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+
+    async def execute(self, statement) -> None:
+        """Run a statement."""
+        await asyncio.sleep(self.delay)
+
+
+class Engine:
+    """An engine with a pool of 4 connections and 1 overflow, ``checked_out`` of them in use."""
+
+    def __init__(self, checked_out: int = 0, delay: float = 0.0, error: bool = False) -> None:
+        self.pool = QueuePool(lambda: None, pool_size=4, max_overflow=1)
+        self.pool.checkedout = lambda: checked_out
+        self.delay = delay
+        self.error = error
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator[Connection]:
+        """Check a connection out."""
+        if self.error:
+            raise ConnectionRefusedError()
+        yield Connection(self.delay)
+
+
+@pytest.fixture
+def prober() -> ReadinessProber:
+    """A prober with a 0.05s database timeout, and a 2s interval."""
+    return ReadinessProber(interval=2.0, db_timeout=0.05, max_pool_usage=0.8, max_loop_lag=0.5, max_webhook_backlog=10)
+
+
+def _stub(monkeypatch, engine: Engine, backlog: int = 0) -> None:
+    monkeypatch.setattr(readiness, "engine", engine)
+    monkeypatch.setattr(readiness, "webhook_backlog", lambda: backlog)
+
+
+async def test_ready(monkeypatch, prober):
+    """Test that a worker with its dependencies below every threshold is ready."""
+    _stub(monkeypatch, Engine(checked_out=3), backlog=9)
+    report = await prober.probe(0.1)
+    assert report.ready
+    assert {name: check["value"] for name, check in report.checks.items() if name != "database"} == {
+        "pool": 0.6,
+        "event_loop_lag": 0.1,
+        "webhook_backlog": 9,
+    }
+
+
+@pytest.mark.parametrize(
+    ("engine", "loop_lag", "backlog", "failed", "value"),
+    [
+        (Engine(error=True), 0.0, 0, "database", "ConnectionRefusedError"),
+        (Engine(delay=1.0), 0.0, 0, "database", "TimeoutError"),
+        (Engine(checked_out=4), 0.0, 0, "pool", 0.8),
+        (Engine(), 0.5, 0, "event_loop_lag", 0.5),
+        (Engine(), 0.0, 10, "webhook_backlog", 10),
+    ],
+)
+async def test_not_ready(monkeypatch, prober, engine, loop_lag, backlog, failed, value):
+    """Test that a worker is not ready once any check reaches its threshold."""
+    _stub(monkeypatch, engine, backlog)
+    report = await prober.probe(loop_lag)
+    assert not report.ready
+    assert [name for name, check in report.checks.items() if not check["ok"]] == [failed]
+    assert report.checks[failed]["value"] == value
+
+
+async def test_stale_report(prober):
+    """Test that the last report is only served until it is three intervals old."""
+    assert prober.report is None
+    prober._report = ReadinessReport(checked_at=readiness.time.monotonic() - 5.5)
+    assert prober.report is prober._report
+    prober._report = ReadinessReport(checked_at=readiness.time.monotonic() - 6.5)
+    assert prober.report is None
+
+
+@pytest.mark.parametrize(
+    ("age", "checks", "status_code"),
+    [(0.0, {"database": True}, 200), (0.0, {"database": True, "pool": False}, 503), (7.0, {"database": True}, 503)],
+)
+def test_readiness_route(monkeypatch, prober, age, checks, status_code):
+    """Test that the readiness route answers 503 for a failed check or a stale report."""
+    report = ReadinessReport(checked_at=readiness.time.monotonic() - age)
+    for name, ok in checks.items():
+        report.add(name, ok)
+    prober._report = report
+    monkeypatch.setattr(server, "readiness_prober", prober)
+    app = FastAPI()
+    server.root_health_path(app)
+    assert TestClient(app).get("/readiness").status_code == status_code
@@ -0,0 +1,55 @@
+"""Scheduler job loop unit test module."""
+
+import asyncio
+import time
+
+import pytest
+
+from core.utils.scheduler import JobLoop
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _blocking(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+async def test_job_loop_runs_jobs_and_stops():
+    """Test that jobs run on the job loop thread, and that stopping it joins the thread and closes its loop."""
+    job_loop = JobLoop()
+    assert await job_loop.run(asyncio.sleep, 0, "done") == "done"
+    loop, thread = job_loop.loop, job_loop._thread
+    assert loop is not asyncio.get_running_loop()
+
+    await job_loop.stop()
+    assert not thread.is_alive() and loop.is_closed()
+    assert job_loop.loop is None
+    await job_loop.stop()
+
+
+async def test_stop_does_not_block_the_event_loop():
+    """Test that a job outliving the stop timeout neither blocks the caller nor gets its loop closed under it."""
+    job_loop = JobLoop()
+    job_loop.start()
+    loop, thread = job_loop.loop, job_loop._thread
+    job = asyncio.ensure_future(job_loop.run(_blocking, 0.5))
+    await asyncio.sleep(0.05)
+
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    await job_loop.stop(timeout=0.1)
+    assert ticks > 5
+    assert thread.is_alive() and not loop.is_closed()
+
+    await job
+    await asyncio.to_thread(thread.join, 1.0)
+    ticker.cancel()
+    assert not thread.is_alive() and loop.is_closed()
@@ -0,0 +1,100 @@
+"""Repository search unit test module."""
+
+import base64
+from types import SimpleNamespace
+from typing import List, Tuple
+from uuid import UUID
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.app.models.user import UserModel
+from app.app.repositories.repository import Repository, _decode_cursor, _encode_cursor
+from core.exceptions import InvalidCursorException
+from core.types import SearchMode
+
+
+pytestmark = pytest.mark.anyio
+
+USERS = [SimpleNamespace(id=UUID(int=index)) for index in range(3, 0, -1)]
+
+
+class Rows:
+    """A result of returned rows."""
+
+    def __init__(self, rows: List[Tuple[SimpleNamespace, float]]) -> None:
+        self.rows = rows
+
+    def all(self) -> List[Tuple[SimpleNamespace, float]]:
+        """All the rows."""
+        return self.rows
+
+
+class Session:
+    """A session recording the compiled statements, and returning fixed rows."""
+
+    def __init__(self, rows: List[Tuple[SimpleNamespace, float]]) -> None:
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement) -> Rows:
+        """Run a statement."""
+        self.statements.append(statement.compile(dialect=postgresql.dialect()))
+        return Rows(self.rows)
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes to the rank and primary key of the last result of its page."""
+    cursor = _encode_cursor(USERS[0], 0.25)
+    assert _decode_cursor(cursor) == (0.25, USERS[0].id)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        base64.urlsafe_b64encode(b"not json").decode(),
+        base64.urlsafe_b64encode(b"[0.5]").decode(),
+        base64.urlsafe_b64encode(b'["high", "00000000-0000-0000-0000-000000000001"]').decode(),
+        base64.urlsafe_b64encode(b'[0.5, "not a uuid"]').decode(),
+        base64.urlsafe_b64encode(b'{"rank": 0.5}').decode(),
+    ],
+)
+def test_invalid_cursor(cursor):
+    """Test that malformed cursors are rejected as a bad request."""
+    with pytest.raises(InvalidCursorException):
+        _decode_cursor(cursor)
+
+
+async def test_first_page():
+    """Test that a page fetches one extra row to know whether a next page exists, and ends on its last result."""
+    session = Session([(user, 0.5) for user in USERS])
+    users, cursor = await Repository(session).search(UserModel, "ada", limit=2)
+    assert users == USERS[:2]
+    assert _decode_cursor(cursor) == (0.5, USERS[1].id)
+
+    (statement,) = session.statements
+    assert str(statement).endswith("LIMIT %(param_1)s") and statement.params["param_1"] == 3
+    assert "ORDER BY CAST(similarity(users.name, %(similarity_2)s) AS REAL) DESC, users.id DESC" in str(statement)
+
+    session.rows = session.rows[:2]
+    assert await Repository(session).search(UserModel, "ada", limit=2) == (USERS[:2], None)
+
+
+@pytest.mark.parametrize(
+    ("mode", "rank"),
+    [
+        (SearchMode.SUBSTRING, "CAST(similarity(users.name, %(similarity_2)s) AS REAL)"),
+        (SearchMode.FULLTEXT, "CAST(ts_rank(to_tsvector("),
+    ],
+)
+async def test_keyset_predicate(mode, rank):
+    """Test that the next pages resume strictly after the (rank, primary key) of the cursor."""
+    session = Session([])
+    await Repository(session).search(UserModel, "ada", mode=mode, cursor=_encode_cursor(USERS[1], 0.5))
+
+    (statement,) = session.statements
+    where = str(statement).split("WHERE ")[1].split(" ORDER BY ")[0]
+    assert f" AND ({rank}" in where
+    assert where.endswith(", users.id) < (CAST(%(param_1)s AS REAL), %(param_2)s::UUID)")
+    assert (statement.params["param_1"], statement.params["param_2"]) == (0.5, USERS[1].id)
@@ -0,0 +1,144 @@
+"""Tracing unit test module."""
+
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from core import tracing
+from core.index_advisor import shape_of
+from core.tracing import Span, Tracer
+from core.types import SpanKind
+
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class Exporter:
+    """An exporter keeping the finished spans in memory."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        """Keep a finished span."""
+        self.spans.append(span)
+
+    def shutdown(self) -> None:
+        """Nothing to flush."""
+
+
+@pytest.fixture
+def tracer(monkeypatch) -> Tracer:
+    """An enabled tracer sampling a quarter of the new traces, replacing the application one."""
+    tracer = Tracer(enabled=True, sample_rate=0.25, exporter=Exporter())
+    monkeypatch.setattr(tracing, "tracer", tracer)
+    return tracer
+
+
+@pytest.mark.parametrize("traceparent", [f"00-{TRACE_ID}-{PARENT_ID}-01", f"00-{TRACE_ID}-{PARENT_ID}-03"])
+def test_sampled_traceparent(monkeypatch, tracer, traceparent):
+    """Test that a sampled caller trace is continued whatever the sample rate."""
+    monkeypatch.setattr(tracing.random, "random", lambda: 0.99)
+    with tracer.start_trace("GET /users", SpanKind.SERVER, traceparent, {"http.method": "GET"}) as span:
+        assert tracer.current_span() is span
+    assert tracer.current_span() is None
+
+    assert tracer.exporter.spans == [span]
+    assert (span.trace_id, span.parent_span_id, span.kind) == (TRACE_ID, PARENT_ID, SpanKind.SERVER)
+    assert len(span.span_id) == 16 and span.span_id != PARENT_ID
+    assert span.attributes == {"http.method": "GET"}
+    assert span.start_time <= span.end_time
+
+
+def test_unsampled_traceparent(tracer):
+    """Test that an unsampled caller trace creates no span, even for a sample rate of 1."""
+    tracer.sample_rate = 1.0
+    with tracer.start_trace("GET /users", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-00") as span:
+        assert span is None
+        with tracer.start_span("child") as child:
+            assert child is None
+    assert tracer.exporter.spans == []
+
+
+@pytest.mark.parametrize(("draw", "sampled"), [(0.1, True), (0.25, False), (0.9, False)])
+@pytest.mark.parametrize("traceparent", [None, "", "not a traceparent", f"01-{TRACE_ID}-{PARENT_ID}-01"])
+def test_sampling_decision(monkeypatch, tracer, draw, sampled, traceparent):
+    """Test that new traces, missing or malformed caller ones, are sampled with the sample rate probability."""
+    monkeypatch.setattr(tracing.random, "random", lambda: draw)
+    with tracer.start_trace("job", traceparent=traceparent) as span:
+        assert (span is not None) is sampled
+    if sampled:
+        assert span.parent_span_id is None and len(span.trace_id) == 32 and span.trace_id != TRACE_ID
+
+
+def test_disabled_tracer():
+    """Test that a disabled tracer never samples."""
+    tracer = Tracer(enabled=False, sample_rate=1.0, exporter=Exporter())
+    with tracer.start_trace("GET /users", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01") as span:
+        assert span is None
+    assert tracer.exporter.spans == []
+
+
+def test_child_spans(tracer):
+    """Test that child spans share the trace of their parent, and are exported before it."""
+    with tracer.start_trace("GET /users", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01") as root:
+        with tracer.start_span("load") as child:
+            with tracer.start_span("query") as grandchild:
+                pass
+        assert tracer.current_span() is root
+
+    assert tracer.exporter.spans == [grandchild, child, root]
+    assert {span.trace_id for span in tracer.exporter.spans} == {TRACE_ID}
+    assert (child.parent_span_id, grandchild.parent_span_id) == (root.span_id, child.span_id)
+    assert len({root.span_id, child.span_id, grandchild.span_id}) == 3
+
+
+def test_failed_span(tracer):
+    """Test that an exception raised in a span marks it as failed and is propagated."""
+    with pytest.raises(ValueError):
+        with tracer.start_trace("job", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01"):
+            raise ValueError("boom")
+    (span,) = tracer.exporter.spans
+    assert (span.status, span.status_message, span.attributes["exception.type"]) == ("ERROR", "boom", "ValueError")
+
+
+def test_inject(tracer):
+    """Test that the trace context is added to outbound headers within a sampled trace only."""
+    headers = {"Accept": "application/json"}
+    assert tracer.inject(headers) is headers
+    assert tracer.inject() is None
+
+    with tracer.start_trace("job", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01") as span:
+        injected = tracer.inject(headers)
+    assert injected == {"Accept": "application/json", "traceparent": f"00-{TRACE_ID}-{span.span_id}-01"}
+    assert headers == {"Accept": "application/json"}
+
+
+def test_engine_listeners(tracer):
+    """Test that the engine listeners record a client span per statement of a sampled trace, failed or not."""
+    statement = "SELECT users.id FROM users WHERE users.name = $1"
+    tracing._before_execute(None, None, statement, ("ada",), SimpleNamespace(), False)
+
+    with tracer.start_trace("GET /users", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01") as root:
+        context = SimpleNamespace()
+        tracing._before_execute(None, None, statement, ("ada",), context, False)
+        assert tracer.current_span() is not root
+        tracing._after_execute(None, None, statement, ("ada",), context, False)
+        assert tracer.current_span() is root and context._trace_span is None
+
+        failed = SimpleNamespace()
+        tracing._before_execute(None, None, statement, ("ada",), failed, True)
+        tracing._handle_error(
+            SimpleNamespace(execution_context=failed, original_exception=RuntimeError("connection reset"))
+        )
+        assert tracer.current_span() is root
+        tracing._handle_error(SimpleNamespace(execution_context=None, original_exception=RuntimeError()))
+
+    query, failed_query, _ = tracer.exporter.spans
+    for span in (query, failed_query):
+        assert (span.name, span.kind, span.parent_span_id) == ("db.query", SpanKind.CLIENT, root.span_id)
+        assert span.attributes["db.statement"] == shape_of(statement)
+    assert (query.status, failed_query.status) == ("UNSET", "ERROR")
+    assert failed_query.attributes["db.executemany"] is True